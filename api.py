@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+API HTTP somente leitura dos binders públicos (JSON)
+
+Endpoints:
+    GET /api/users                          diretório de usuários (email e nº de cards)
+    GET /api/users/<email>/cards?page=&per_page=   cards de um usuário, paginados
+    GET /api/users/<email>/sets/<set>/cards?from=&to=   intervalo de números de uma coleção
+    GET /api/cards/<id>                     detalhe de um card
+    GET /api/stats                          estatísticas gerais
+
+As respostas têm ETag forte derivado da quantidade de cards e do maior
+updated_at (created_at quando não há atualização). Os binders vêm do cache
+atualizado por deltas (binder_cache), então uma requisição condicional
+(If-None-Match) que não mudou custa no máximo uma consulta de delta vazia e
+recebe 304 sem corpo. Corpos são comprimidos com gzip quando o cliente aceita.
+
+Uso:
+    python api.py                  # porta API_PORT (padrão 8502)
+    python api.py --port 9000
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import async_data
+import realtime_sync
+from binder_cache import binder_summary, get_binder
+from card_numbers import parse_set_key
+from metrics import counter, histogram
+
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "8502"))
+
+# Paginação dos cards de um usuário
+DEFAULT_PER_PAGE = 24
+MAX_PER_PAGE = 100
+
+# Corpos menores que isso não compensam a compressão
+GZIP_MIN_BYTES = 512
+
+API_REQUESTS = counter('pokebinder_api_requests_total', 'Requisições à API JSON por rota e status')
+API_DURATION = histogram('pokebinder_api_request_duration_seconds', 'Latência das requisições à API JSON')
+
+
+class ApiError(Exception):
+    """Erro com status HTTP e mensagem para o cliente"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def collection_etag(rows, *extra):
+    """
+    ETag forte de um conjunto de cards
+
+    Args:
+        rows: Linhas com updated_at/created_at
+        *extra: Partes adicionais da representação (ex.: página)
+
+    Returns:
+        str: ETag entre aspas
+    """
+    latest = max((row.get('updated_at') or row.get('created_at') or '' for row in rows), default='')
+    key = '|'.join([str(len(rows)), latest] + [str(part) for part in extra])
+    return f'"{len(rows)}-{hashlib.sha256(key.encode("utf-8")).hexdigest()[:20]}"'
+
+
+def _positive_int(query, name, default):
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        raise ApiError(400, f"Parâmetro {name} inválido")
+    if value < 1:
+        raise ApiError(400, f"Parâmetro {name} deve ser maior que zero")
+    return value
+
+
+def users_resource(query):
+    """Diretório de usuários com a quantidade de cards de cada um"""
+    rows = get_binder()
+
+    def body():
+        summary = binder_summary()
+        return {'users': [{'email': email, 'cards': summary['counts'][email]} for email in summary['users']]}
+
+    return collection_etag(rows), body
+
+
+def user_cards_resource(query, user_email):
+    """Página dos cards de um usuário"""
+    page = _positive_int(query, 'page', 1)
+    per_page = min(_positive_int(query, 'per_page', DEFAULT_PER_PAGE), MAX_PER_PAGE)
+    rows = get_binder(user_email)
+    if not rows:
+        raise ApiError(404, "Usuário sem cards públicos")
+
+    total_pages = max(1, -(-len(rows) // per_page))
+
+    def body():
+        ordered = sorted(rows, key=lambda card: ((card.get('name') or '').lower(), str(card.get('id'))))
+        start = (page - 1) * per_page
+        cards = ordered[start:start + per_page]
+        return {
+            'user_email': user_email,
+            'page': page,
+            'per_page': per_page,
+            'total': len(rows),
+            'total_pages': total_pages,
+            'cards': cards,
+        }
+
+    return collection_etag(rows, user_email, page, per_page), body
+
+
+def set_range_resource(query, user_email, set_key):
+    """Cards de uma coleção (ex.: TG30 ou 182) entre os números from e to"""
+    parsed = parse_set_key(set_key)
+    if parsed is None:
+        raise ApiError(400, "Coleção inválida (ex.: 182 ou TG30)")
+    prefix, set_total = parsed
+    first = _positive_int(query, 'from', 1)
+    last = _positive_int(query, 'to', set_total)
+    if last < first:
+        raise ApiError(400, "Parâmetro to deve ser maior ou igual a from")
+
+    cards = async_data.run(async_data.fetch_set_range(user_email, prefix, set_total, first, last))
+    body = {
+        'user_email': user_email,
+        'set': {'prefix': prefix, 'total': set_total},
+        'from': first,
+        'to': last,
+        'cards': cards,
+    }
+    return collection_etag(cards, user_email, set_key, first, last), lambda: body
+
+
+def card_resource(query, card_id):
+    """Detalhe de um card"""
+    try:
+        uuid.UUID(card_id)
+    except ValueError:
+        # O PostgREST responderia 400 para um id que não é UUID
+        raise ApiError(404, "Card não encontrado")
+    card = async_data.run(async_data.fetch_card_by_id(card_id))
+    if card is None:
+        raise ApiError(404, "Card não encontrado")
+    return collection_etag([card], card_id), lambda: {'card': card}
+
+
+def stats_resource(query):
+    """Estatísticas gerais (cards, usuários e valor total)"""
+    rows = get_binder()
+
+    def body():
+        summary = binder_summary()
+        return {**summary['stats'], 'total_users': len(summary['users'])}
+
+    return collection_etag(rows), body
+
+
+ROUTES = [
+    ('users', re.compile(r'^/api/users/?$'), users_resource),
+    ('user_cards', re.compile(r'^/api/users/([^/]+)/cards/?$'), user_cards_resource),
+    ('set_range', re.compile(r'^/api/users/([^/]+)/sets/([^/]+)/cards/?$'), set_range_resource),
+    ('card', re.compile(r'^/api/cards/([^/]+)/?$'), card_resource),
+    ('stats', re.compile(r'^/api/stats/?$'), stats_resource),
+]
+
+
+def _etag_matches(header, etag):
+    """
+    Compara If-None-Match com o ETag
+
+    Usa a comparação fraca (RFC 9110): o prefixo W/ é ignorado, já que
+    proxies que recomprimem a resposta enfraquecem o ETag. O sufixo da
+    versão gzip também é ignorado.
+    """
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = []
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        candidates.append(tag.replace('-gzip"', '"'))
+    return etag in candidates
+
+
+def _accepts_gzip(header):
+    """
+    Se o Accept-Encoding aceita gzip
+
+    Respeita os q-values: "gzip;q=0" recusa gzip, e "*" vale para gzip
+    quando gzip não aparece explicitamente.
+    """
+    qualities = {}
+    for item in (header or '').split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    if 'gzip' in qualities:
+        return qualities['gzip'] > 0
+    if 'x-gzip' in qualities:
+        return qualities['x-gzip'] > 0
+    return qualities.get('*', 0) > 0
+
+
+def _upstream_status(error):
+    """Status HTTP da resposta do PostgREST que originou o erro (ou None)"""
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "PokeBinderAPI/1.0"
+
+    def do_GET(self):
+        self._handle(send_body=True)
+
+    def do_HEAD(self):
+        self._handle(send_body=False)
+
+    def _handle(self, send_body):
+        started = time.perf_counter()
+        route_name = 'unknown'
+        try:
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            for name, pattern, resource in ROUTES:
+                match = pattern.match(url.path)
+                if match:
+                    route_name = name
+                    etag, body = resource(query, *[unquote(group) for group in match.groups()])
+                    break
+            else:
+                raise ApiError(404, "Rota não encontrada")
+
+            if _etag_matches(self.headers.get('If-None-Match'), etag):
+                status = 304
+                self._send(304, None, etag, send_body)
+            else:
+                status = 200
+                self._send(200, body(), etag, send_body)
+        except ApiError as e:
+            status = e.status
+            self._send(e.status, {'error': e.message}, None, send_body)
+        except Exception as e:
+            upstream = _upstream_status(e)
+            if upstream == 400:
+                # Parâmetro que o PostgREST recusou (ex.: tipo inválido): erro do cliente
+                status = 400
+                self._send(400, {'error': "Requisição inválida"}, None, send_body)
+            else:
+                status = 502
+                self._send(502, {'error': f"Falha ao consultar o banco: {type(e).__name__}"}, None, send_body)
+        finally:
+            API_REQUESTS.inc(route=route_name, status=str(status))
+            API_DURATION.observe(time.perf_counter() - started, route=route_name)
+
+    def _send(self, status, payload, etag, send_body):
+        self.send_response(status)
+        self.send_header('Cache-Control', 'public, no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Vary', 'Accept-Encoding')
+
+        if payload is None:
+            if etag:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        data = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        gzip_ok = _accepts_gzip(self.headers.get('Accept-Encoding'))
+        if gzip_ok and len(data) >= GZIP_MIN_BYTES:
+            data = gzip.compress(data, compresslevel=6)
+            self.send_header('Content-Encoding', 'gzip')
+            # Representações com codificações diferentes precisam de ETags fortes diferentes
+            if etag:
+                etag = etag[:-1] + '-gzip"'
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Sem log por requisição (clientes fazem polling)
+        pass
+
+
+def create_server(host=API_HOST, port=API_PORT):
+    """Cria o servidor HTTP da API (sem iniciar)"""
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="API JSON somente leitura dos binders públicos")
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT)
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port)
+    realtime_sync.start()
+    print(f"🎴 MyPokeBinder API em http://{args.host}:{args.port}/api/users")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 API encerrada")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
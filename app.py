@@ -1,15 +1,51 @@
 import streamlit as st
-import os
-from PIL import Image
-import io
-import base64
-from datetime import datetime
-from config import supabase, STREAMLIT_CONFIG
+from datetime import datetime, timezone
+from config import get_supabase, warm_up_connections, STREAMLIT_CONFIG
+from metrics import observe, observe_render, start_metrics_server
 from cloudinary_utils import upload_image_to_cloudinary, delete_image_from_cloudinary, validate_image_file, get_optimized_image_url
+from card_grid import show_card_grid, render_public_card
+from profiling import run_profiled, section
+from tracing import traced
+from snapshot import snapshot_url
+from binder_cache import get_binder
+from card_numbers import number_columns
+from export import EXPORT_FORMATS, export_file_name, export_to_tempfile
+from resilience import is_unavailable, record_stale
+import shared_cache
+import realtime_sync
 
 # Configuração da página
 st.set_page_config(**STREAMLIT_CONFIG)
 
+# Abre conexões keep-alive com o Supabase em segundo plano (uma vez por processo)
+warm_up_connections()
+
+# Endpoint /metrics (Prometheus) em segundo plano (uma vez por processo)
+start_metrics_server(default_port=9464)
+
+# Listener de mudanças que atualiza os binders em cache (REALTIME_SOURCE)
+realtime_sync.start()
+
+# Rótulos dos filtros do binder (sem emojis, como no restante da página)
+BINDER_LABELS = {
+    'name': "Filtrar por nome",
+    'language': "Filtrar por linguagem",
+    'all_languages': "Todas",
+    'sort': "Ordenar por",
+}
+
+# Formatos de exportação oferecidos no binder (o Streamlit guarda o arquivo
+# inteiro em memória para o download: ZIP com imagens e backup da tabela
+# inteira ficam no export.py pela linha de comando)
+EXPORT_LABELS = {
+    'csv': "CSV (planilha)",
+    'jsonl': "JSON Lines",
+    'parquet': "Parquet",
+}
+
+# Última leitura bem-sucedida de cada consulta da sessão (exibida com o Supabase fora)
+LAST_GOOD_KEY = '_last_good'
+
 # Função para verificar se o usuário está logado
 def is_user_logged_in():
     return 'user' in st.session_state and st.session_state.user is not None
@@ -29,7 +65,27 @@ def upload_image_to_cloudinary_wrapper(image_file, user_id):
     result = upload_image_to_cloudinary(image_file, user_id)
     return result
 
+def remember_result(name, data):
+    """Guarda o resultado de uma consulta para usar se o Supabase cair"""
+    st.session_state.setdefault(LAST_GOOD_KEY, {})[name] = data
+    return data
+
+def last_good_result(name, error):
+    """
+    Resultado anterior de uma consulta, quando a falha é da dependência
+    
+    Returns:
+        O último resultado guardado, ou None (erro comum ou nada guardado)
+    """
+    data = st.session_state.get(LAST_GOOD_KEY, {}).get(name)
+    if data is None or not is_unavailable(error):
+        return None
+    record_stale(name)
+    st.warning("⚠️ Banco de dados indisponível no momento: exibindo os últimos dados carregados")
+    return data
+
 # Função para cadastrar um novo card
+@traced("add_card")
 def add_card(user_id, card_data, image_file):
     try:
         # Upload da imagem para o Cloudinary
@@ -43,11 +99,17 @@ def add_card(user_id, card_data, image_file):
         card_data['image_url'] = upload_result['url']
         card_data['cloudinary_public_id'] = upload_result['public_id']
         card_data['created_at'] = datetime.now().isoformat()
+        # Número estruturado (ordenação natural e intervalos por coleção)
+        card_data.update(number_columns(card_data.get('number')))
         
         # Inserir no banco de dados
-        result = supabase.table('cards').insert(card_data).execute()
+        with observe('supabase', 'add_card') as obs:
+            result = get_supabase().table('cards').insert(card_data).execute()
+            obs.set_result(result.data)
         
         if result.data:
+            # Nova versão dos cards: caches das outras réplicas sincronizam na próxima leitura
+            shared_cache.bump_sync('cards')
             return True
         else:
             return False
@@ -59,22 +121,27 @@ def add_card(user_id, card_data, image_file):
 # Função para buscar cards de um usuário
 def get_user_cards(user_id):
     try:
-        result = supabase.table('cards').select('*').eq('user_id', user_id).execute()
-        return result.data
+        with observe('supabase', 'get_user_cards') as obs:
+            result = get_supabase().table('cards').select('*').eq('user_id', user_id).is_('deleted_at', 'null').execute()
+            obs.set_result(result.data)
+        return remember_result('get_user_cards', result.data)
     except Exception as e:
+        cached = last_good_result('get_user_cards', e)
+        if cached is not None:
+            return cached
         st.error(f"Erro ao buscar cards: {str(e)}")
         return []
 
 # Função para buscar cards por email (para páginas públicas)
 def get_cards_by_email(user_email):
     try:
-        # Buscar cards pelo email do usuário
-        result = supabase.table('cards').select('*').eq('user_email', user_email).execute()
+        # Cards pelo email do usuário (cache de binders atualizado por deltas)
+        cards = get_binder(user_email)
         
-        if not result.data:
+        if not cards:
             return [], "Usuário não encontrado ou sem cards cadastrados"
         
-        return result.data, None
+        return cards, None
         
     except Exception as e:
         return None, f"Erro ao buscar cards por email: {str(e)}"
@@ -82,7 +149,9 @@ def get_cards_by_email(user_email):
 # Função para buscar cards públicos (todos os cards disponíveis)
 def get_public_cards():
     try:
-        result = supabase.table('cards').select('*').execute()
+        with observe('supabase', 'get_public_cards') as obs:
+            result = get_supabase().table('cards').select('*').is_('deleted_at', 'null').execute()
+            obs.set_result(result.data)
         return result.data if result.data else []
     except Exception as e:
         st.error(f"Erro ao buscar cards públicos: {str(e)}")
@@ -91,21 +160,39 @@ def get_public_cards():
 # Função para buscar um card específico
 def get_card_by_id(card_id):
     try:
-        result = supabase.table('cards').select('*').eq('id', card_id).single().execute()
+        with observe('supabase', 'get_card_by_id') as obs:
+            result = get_supabase().table('cards').select('*').eq('id', card_id).is_('deleted_at', 'null').single().execute()
+            obs.set_result(result.data)
         return result.data
     except Exception as e:
+        # O card costuma estar na última lista do binder carregada na sessão
+        cached = last_good_result('get_user_cards', e)
+        card = next((row for row in cached or [] if row.get('id') == card_id), None)
+        if card is not None:
+            return card
         st.error(f"Erro ao buscar card: {str(e)}")
         return None
 
 # Função para atualizar um card
-def update_card(card_id, card_data, image_file=None):
+@traced("update_card")
+def update_card(card_id, card_data, image_file=None, previous_public_id=None):
+    """
+    Atualiza um card, trocando a foto quando image_file é enviado
+
+    A nova foto sobe com um public_id único e a linha só é atualizada se ainda
+    apontar para previous_public_id (a foto que o formulário mostrava). A foto
+    antiga entra na fila image_deletions pelo trigger da migration 005 e é
+    removida em lote pelo image_gc.py; se a troca não acontecer, a foto nova
+    é removida na hora.
+    """
+    new_public_id = None
     try:
         if image_file:
             # Upload da nova imagem para o Cloudinary
             upload_result = upload_image_to_cloudinary_wrapper(image_file, card_data['user_id'])
             if upload_result:
                 card_data['image_url'] = upload_result['url']
-                card_data['cloudinary_public_id'] = upload_result['public_id']
+                card_data['cloudinary_public_id'] = new_public_id = upload_result['public_id']
         
         # Adicionar email do usuário se não estiver presente
         if 'user_email' not in card_data:
@@ -113,32 +200,52 @@ def update_card(card_id, card_data, image_file=None):
         
         card_data['updated_at'] = datetime.now().isoformat()
         
-        result = supabase.table('cards').update(card_data).eq('id', card_id).execute()
+        # Número estruturado acompanha o texto
+        if 'number' in card_data:
+            card_data.update(number_columns(card_data['number']))
+        
+        with observe('supabase', 'update_card') as obs:
+            query = get_supabase().table('cards').update(card_data).eq('id', card_id).is_('deleted_at', 'null')
+            if new_public_id:
+                # Troca condicional: outra edição da foto no meio do caminho não é sobrescrita
+                if previous_public_id:
+                    query = query.eq('cloudinary_public_id', previous_public_id)
+                else:
+                    query = query.is_('cloudinary_public_id', 'null')
+            result = query.execute()
+            obs.set_result(result.data)
         
         if result.data:
+            shared_cache.bump_sync('cards')
             st.success("Card atualizado com sucesso!")
             return True
+        elif new_public_id:
+            delete_image_from_cloudinary(new_public_id)
+            st.error("A foto deste card foi alterada ou o card foi removido em outra sessão. Recarregue e tente novamente.")
+            return False
         else:
             st.error("Erro ao atualizar o card")
             return False
             
     except Exception as e:
+        if new_public_id:
+            delete_image_from_cloudinary(new_public_id)
         st.error(f"Erro ao atualizar card: {str(e)}")
         return False
 
 # Função para deletar um card
+@traced("delete_card")
 def delete_card(card_id):
     try:
-        # Primeiro, buscar o card para obter o public_id do Cloudinary
-        card = get_card_by_id(card_id)
-        if card and card.get('cloudinary_public_id'):
-            # Deletar imagem do Cloudinary
-            delete_image_from_cloudinary(card['cloudinary_public_id'])
-        
-        # Deletar do banco de dados
-        result = supabase.table('cards').delete().eq('id', card_id).execute()
+        # Exclusão lógica: o tombstone (deleted_at) propaga a remoção para os caches por delta
+        deleted_at = datetime.now(timezone.utc).isoformat()
+        with observe('supabase', 'delete_card') as obs:
+            result = get_supabase().table('cards').update({'deleted_at': deleted_at}).eq('id', card_id).is_('deleted_at', 'null').execute()
+            obs.set_result(result.data)
         
         if result.data:
+            shared_cache.bump_sync('cards')
+            # A imagem entra na fila image_deletions (trigger da migration 005) e é removida pelo image_gc.py
             st.success("Card deletado com sucesso!")
             return True
         else:
@@ -162,10 +269,11 @@ def auth_page():
         
         if st.button("Entrar"):
             try:
-                response = supabase.auth.sign_in_with_password({
-                    "email": email,
-                    "password": password
-                })
+                with observe('supabase', 'sign_in'):
+                    response = get_supabase().auth.sign_in_with_password({
+                        "email": email,
+                        "password": password
+                    })
                 
                 if response.user:
                     st.session_state.user = response.user
@@ -188,10 +296,11 @@ def auth_page():
                 st.error("As senhas não coincidem")
             else:
                 try:
-                    response = supabase.auth.sign_up({
-                        "email": email,
-                        "password": password
-                    })
+                    with observe('supabase', 'sign_up'):
+                        response = get_supabase().auth.sign_up({
+                            "email": email,
+                            "password": password
+                        })
                     
                     if response.user:
                         st.success("Registro realizado com sucesso! Verifique seu email para confirmar a conta.")
@@ -211,11 +320,12 @@ def main_page():
     st.divider()
     
     # Sidebar com informações do usuário
-    with st.sidebar:
+    with st.sidebar, section("sidebar"):
         st.header(f"Bem-vindo, {st.session_state.user.email}!")
         
         if st.button("Sair"):
-            supabase.auth.sign_out()
+            with observe('supabase', 'sign_out'):
+                get_supabase().auth.sign_out()
             del st.session_state.user
             st.rerun()
         
@@ -252,12 +362,13 @@ def main_page():
     current_page = st.session_state.get('current_page', 'Meu Binder')
     
     # Conteúdo da página
-    if current_page == "Meu Binder":
-        show_my_binder()
-    elif current_page == "Adicionar Card":
-        add_card_page()
-    elif current_page == "Minha Página Pública":
-        show_public_page()
+    with section(f"página:{current_page}"):
+        if current_page == "Meu Binder":
+            show_my_binder()
+        elif current_page == "Adicionar Card":
+            add_card_page()
+        elif current_page == "Minha Página Pública":
+            show_public_page()
 
 # Página para adicionar novo card
 def add_card_page():
@@ -346,65 +457,55 @@ def show_my_binder():
             st.rerun()
         return
     
-    # Filtros
+    show_card_grid(cards, "binder", render_binder_card, labels=BINDER_LABELS, show_count=False)
+    
+    show_export_section(st.session_state.user.email)
+
+# Exportação do binder (o arquivo só é gerado quando o botão é clicado)
+def show_export_section(user_email):
+    with st.expander("📦 Exportar binder"):
+        export_format = st.selectbox("Formato", list(EXPORT_LABELS), format_func=EXPORT_LABELS.get,
+                                     key="export_format")
+        st.download_button(
+            "⬇️ Baixar exportação",
+            data=lambda: export_to_tempfile(export_format, user_email),
+            file_name=export_file_name(export_format, user_email),
+            mime=EXPORT_FORMATS[export_format][1],
+            on_click="ignore",
+            use_container_width=True
+        )
+
+# Renderizador dos cards no binder do dono (com ações)
+def render_binder_card(card):
+    st.image(card['image_url'], width=150)
+    st.write(f"**{card['name']}**")
+    st.write(f"Nº {card['number']}")
+    st.write(f"R$ {card['estimated_value']:.2f}")
+    
+    # Botões de ação
     col1, col2, col3 = st.columns(3)
     with col1:
-        filter_name = st.text_input("Filtrar por nome")
+        if st.button("👁️ Ver", key=f"view_{card['id']}"):
+            st.session_state.viewing_card = card['id']
+            st.rerun()
     with col2:
-        filter_language = st.selectbox("Filtrar por linguagem", ["Todas"] + list(set([card['language'] for card in cards])))
+        if st.button("✏️ Editar", key=f"edit_{card['id']}"):
+            st.session_state.editing_card = card['id']
+            st.rerun()
     with col3:
-        sort_by = st.selectbox("Ordenar por", ["Nome", "Número", "Valor", "Data de Criação"])
-    
-    # Aplicar filtros
-    filtered_cards = cards
-    if filter_name:
-        filtered_cards = [card for card in filtered_cards if filter_name.lower() in card['name'].lower()]
-    if filter_language != "Todas":
-        filtered_cards = [card for card in filtered_cards if card['language'] == filter_language]
-    
-    # Aplicar ordenação
-    if sort_by == "Nome":
-        filtered_cards.sort(key=lambda x: x['name'])
-    elif sort_by == "Número":
-        filtered_cards.sort(key=lambda x: x['number'])
-    elif sort_by == "Valor":
-        filtered_cards.sort(key=lambda x: x['estimated_value'], reverse=True)
-    elif sort_by == "Data de Criação":
-        filtered_cards.sort(key=lambda x: x['created_at'], reverse=True)
-    
-    # Exibir cards em grid
-    cols = st.columns(4)
-    for i, card in enumerate(filtered_cards):
-        with cols[i % 4]:
-            st.image(card['image_url'], width=150)
-            st.write(f"**{card['name']}**")
-            st.write(f"Nº {card['number']}")
-            st.write(f"R$ {card['estimated_value']:.2f}")
-            
-            # Botões de ação
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button("👁️ Ver", key=f"view_{card['id']}"):
-                    st.session_state.viewing_card = card['id']
-                    st.rerun()
-            with col2:
-                if st.button("✏️ Editar", key=f"edit_{card['id']}"):
-                    st.session_state.editing_card = card['id']
+        if st.button("🗑️ Deletar", key=f"delete_{card['id']}"):
+            with st.spinner("🗑️ Deletando card..."):
+                if delete_card(card['id']):
+                    st.success("✅ Card deletado com sucesso!")
+                    st.info("🔄 Redirecionando...")
+                    
+                    # Aguardar um pouco para mostrar a mensagem
+                    import time
+                    time.sleep(2)
+                    
                     st.rerun()
-            with col3:
-                if st.button("🗑️ Deletar", key=f"delete_{card['id']}"):
-                    with st.spinner("🗑️ Deletando card..."):
-                        if delete_card(card['id']):
-                            st.success("✅ Card deletado com sucesso!")
-                            st.info("🔄 Redirecionando...")
-                            
-                            # Aguardar um pouco para mostrar a mensagem
-                            import time
-                            time.sleep(2)
-                            
-                            st.rerun()
-                        else:
-                            st.error("❌ Erro ao deletar o card")
+                else:
+                    st.error("❌ Erro ao deletar o card")
 
 # Página para visualizar um card específico
 def show_card_detail(card_id):
@@ -533,7 +634,7 @@ def edit_card_page(card_id):
                     'user_id': card['user_id']
                 }
                 
-                if update_card(card_id, card_data, image_file):
+                if update_card(card_id, card_data, image_file, card.get('cloudinary_public_id')):
                     st.success("✅ Card atualizado com sucesso!")
                     st.info("🔄 Redirecionando...")
                     
@@ -562,6 +663,11 @@ def show_public_page():
         st.markdown("### 🌐 Sua Página Pública")
         st.markdown(f"**Link:** `{public_url}`")
         
+        # Versão estática servida pela CDN (se o snapshot estiver publicado)
+        static_url = snapshot_url(st.session_state.user.email)
+        if static_url:
+            st.markdown(f"**Link estático (carrega mais rápido):** `{static_url}`")
+        
         # Botão de compartilhamento
         if st.button("🔗 Compartilhar", use_container_width=True):
             st.info("📤 Compartilhe este link:")
@@ -622,54 +728,16 @@ def show_public_page():
     st.markdown("---")
     st.markdown("### 🎴 Sua Coleção Completa")
     
-    # Filtros para a página pública
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        filter_name = st.text_input("🔍 Filtrar por nome", key="public_filter_name")
-    with col2:
-        filter_language = st.selectbox("🌍 Filtrar por idioma", ["Todos"] + list(set([card['language'] for card in cards])), key="public_filter_lang")
-    with col3:
-        sort_by = st.selectbox("📊 Ordenar por", ["Nome", "Número", "Valor", "Data de Criação"], key="public_sort")
-    
-    # Aplicar filtros
-    filtered_cards = cards
-    if filter_name:
-        filtered_cards = [card for card in filtered_cards if filter_name.lower() in card['name'].lower()]
-    if filter_language != "Todos":
-        filtered_cards = [card for card in filtered_cards if card['language'] == filter_language]
-    
-    # Aplicar ordenação
-    if sort_by == "Nome":
-        filtered_cards.sort(key=lambda x: x['name'])
-    elif sort_by == "Número":
-        filtered_cards.sort(key=lambda x: x['number'])
-    elif sort_by == "Valor":
-        filtered_cards.sort(key=lambda x: x['estimated_value'], reverse=True)
-    elif sort_by == "Data de Criação":
-        filtered_cards.sort(key=lambda x: x['created_at'], reverse=True)
-    
-    # Exibir cards em grid responsivo
-    if filtered_cards:
-        st.markdown(f"**Mostrando {len(filtered_cards)} de {len(cards)} cards**")
-        
-        # Grid responsivo
-        cols = st.columns(4)
-        for i, card in enumerate(filtered_cards):
-            with cols[i % 4]:
-                # Container para cada card
-                with st.container():
-                    st.image(card['image_url'], width=150, use_container_width=True)
-                    st.markdown(f"**{card['name']}**")
-                    st.markdown(f"📋 Nº {card['number']}")
-                    st.markdown(f"💰 R$ {card['estimated_value']:.2f}")
-                    st.markdown(f"🌍 {card['language']}")
-                    
-                    # Botão para ver detalhes
-                    if st.button(f"👁️ Ver {card['name']}", key=f"public_view_{card['id']}"):
-                        st.session_state.viewing_card = card['id']
-                        st.rerun()
-    else:
-        st.info("🔍 Nenhum card encontrado com os filtros aplicados.")
+    show_card_grid(cards, "public", render_public_card_with_details)
+
+# Renderizador dos cards na página pública do próprio usuário
+def render_public_card_with_details(card):
+    render_public_card(card)
+    
+    # Botão para ver detalhes
+    if st.button(f"👁️ Ver {card['name']}", key=f"public_view_{card['id']}"):
+        st.session_state.viewing_card = card['id']
+        st.rerun()
 
 # Página pública de outro usuário
 def show_user_public_page(user_email):
@@ -737,92 +805,70 @@ def show_user_public_page(user_email):
                 st.query_params.clear()
                 st.rerun()
         return
-        
-        # Estatísticas da coleção
-        st.markdown("### 📊 Estatísticas da Coleção")
-        
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Total de Cards", len(cards))
-        with col2:
-            total_value = sum(card['estimated_value'] for card in cards)
-            st.metric("Valor Total", f"R$ {total_value:.2f}")
-        with col3:
-            languages = set(card['language'] for card in cards)
-            st.metric("Idiomas", len(languages))
-        with col4:
-            most_valuable = max(cards, key=lambda x: x['estimated_value'])
-            st.metric("Card Mais Valioso", f"R$ {most_valuable['estimated_value']:.2f}")
-        
-        st.markdown("---")
-        st.markdown("### 🎴 Coleção")
-        
-        # Filtros para visualização
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            filter_name = st.text_input("🔍 Filtrar por nome", key="view_filter_name")
+    
+    # Estatísticas da coleção
+    st.markdown("### 📊 Estatísticas da Coleção")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total de Cards", len(cards))
+    with col2:
+        total_value = sum(card['estimated_value'] for card in cards)
+        st.metric("Valor Total", f"R$ {total_value:.2f}")
+    with col3:
+        languages = set(card['language'] for card in cards)
+        st.metric("Idiomas", len(languages))
+    with col4:
+        most_valuable = max(cards, key=lambda x: x['estimated_value'])
+        st.metric("Card Mais Valioso", f"R$ {most_valuable['estimated_value']:.2f}")
+    
+    st.markdown("---")
+    st.markdown("### 🎴 Coleção")
+    
+    show_card_grid(cards, "view", render_visitor_card)
+    
+    # Botão para voltar ao início
+    st.markdown("---")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if st.button("🏠 Voltar ao Início", use_container_width=True):
+            # Limpar parâmetros da URL
+            st.query_params.clear()
+            st.rerun()
+    
+    # Botão de login para usuários não logados
+    if not current_user_logged_in:
         with col2:
-            filter_language = st.selectbox("🌍 Filtrar por idioma", ["Todos"] + list(set([card['language'] for card in cards])), key="view_filter_lang")
-        with col3:
-            sort_by = st.selectbox("📊 Ordenar por", ["Nome", "Número", "Valor", "Data de Criação"], key="view_sort")
-        
-        # Aplicar filtros
-        filtered_cards = cards
-        if filter_name:
-            filtered_cards = [card for card in filtered_cards if filter_name.lower() in card['name'].lower()]
-        if filter_language != "Todos":
-            filtered_cards = [card for card in filtered_cards if card['language'] == filter_language]
-        
-        # Aplicar ordenação
-        if sort_by == "Nome":
-            filtered_cards.sort(key=lambda x: x['name'])
-        elif sort_by == "Número":
-            filtered_cards.sort(key=lambda x: x['number'])
-        elif sort_by == "Valor":
-            filtered_cards.sort(key=lambda x: x['estimated_value'], reverse=True)
-        elif sort_by == "Data de Criação":
-            filtered_cards.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        # Exibir cards em grid responsivo
-        if filtered_cards:
-            st.markdown(f"**Mostrando {len(filtered_cards)} de {len(cards)} cards**")
-            
-            # Grid responsivo
-            cols = st.columns(4)
-            for i, card in enumerate(filtered_cards):
-                with cols[i % 4]:
-                    # Container para cada card
-                    with st.container():
-                        st.image(card['image_url'], width=150, use_container_width=True)
-                        st.markdown(f"**{card['name']}**")
-                        st.markdown(f"📋 Nº {card['number']}")
-                        st.markdown(f"💰 R$ {card['estimated_value']:.2f}")
-                        st.markdown(f"🌍 {card['language']}")
-                        
-                        # Botão para ver detalhes
-                        if st.button(f"👁️ Ver {card['name']}", key=f"view_public_{card['id']}"):
-                            st.session_state.viewing_card = card['id']
-                            st.rerun()
-        else:
-            st.info("🔍 Nenhum card encontrado com os filtros aplicados.")
-        
-        # Botão para voltar ao início
-        st.markdown("---")
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            if st.button("🏠 Voltar ao Início", use_container_width=True):
-                # Limpar parâmetros da URL
+            if st.button("🔐 Fazer Login", use_container_width=True):
+                # Limpar parâmetros da URL para ir para a página de login
                 st.query_params.clear()
                 st.rerun()
-        
-        # Botão de login para usuários não logados
-        if not current_user_logged_in:
-            with col2:
-                if st.button("🔐 Fazer Login", use_container_width=True):
-                    # Limpar parâmetros da URL para ir para a página de login
-                    st.query_params.clear()
-                    st.rerun()
+
+# Renderizador dos cards na página pública de outro usuário
+def render_visitor_card(card):
+    render_public_card(card)
+    
+    # Botão para ver detalhes
+    if st.button(f"👁️ Ver {card['name']}", key=f"view_public_{card['id']}"):
+        st.session_state.viewing_card = card['id']
+        st.rerun()
+
+# Nome da página que será exibida nesta execução (usado nas métricas)
+def current_page_label():
+    if 'viewing_card' in st.session_state:
+        return "detail"
+    if 'editing_card' in st.session_state:
+        return "edit"
+    if 'user' in st.query_params:
+        return "own_public" if is_user_logged_in() and st.session_state.user.email == st.query_params['user'] else "visitor_public"
+    if not is_user_logged_in():
+        return "auth"
+    return {
+        "Meu Binder": "binder",
+        "Adicionar Card": "add",
+        "Minha Página Pública": "public",
+    }.get(st.session_state.get('current_page', 'Meu Binder'), "binder")
 
 # Função principal
 def main():
@@ -849,4 +895,7 @@ def main():
         auth_page()
 
 if __name__ == "__main__":
-    main()
+    page_label = current_page_label()
+    user_email = st.session_state.user.email if is_user_logged_in() else None
+    with observe_render("app", page_label):
+        run_profiled(main, "app", page_label, st.query_params, user_email)
@@ -0,0 +1,339 @@
+"""
+Camada de acesso a dados assíncrona (leituras públicas)
+
+As consultas independentes de uma página são disparadas ao mesmo tempo com
+asyncio.gather, então a latência da página passa a ser a da consulta mais
+lenta e não a soma de todas. O código Streamlit é síncrono, por isso as
+corrotinas rodam em um event loop dedicado (uma thread por processo) e são
+expostas por funções síncronas como load_public_page().
+
+As leituras usam a API REST do Supabase (PostgREST) com httpx.AsyncClient,
+com um pool de conexões keep-alive que vive junto com o event loop.
+"""
+
+import asyncio
+import contextvars
+import threading
+from config import SUPABASE_URL, SUPABASE_KEY, HTTP_POOL_SIZE, HTTP_TIMEOUT, HTTP_KEEPALIVE_EXPIRY
+from metrics import observe
+
+# Prazo máximo para o conjunto de consultas de uma página (segundos)
+PAGE_TIMEOUT = HTTP_TIMEOUT
+
+# Filtro das leituras normais: cards deletados ficam como tombstone (deleted_at)
+ACTIVE = {'deleted_at': 'is.null'}
+
+_loop = None
+_client = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop():
+    """Retorna o event loop dedicado, iniciando sua thread no primeiro uso"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="async-data", daemon=True)
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+def _get_client():
+    """Cliente httpx assíncrono (criado dentro do event loop dedicado)"""
+    global _client
+    if _client is None:
+        import httpx
+        from limiter import limited_transport
+        from resilience import resilient_transport
+        _client = httpx.AsyncClient(
+            base_url=f"{SUPABASE_URL}/rest/v1",
+            timeout=HTTP_TIMEOUT,
+            headers={
+                "apikey": SUPABASE_KEY,
+                "Authorization": f"Bearer {SUPABASE_KEY}",
+            },
+            # Mesmos limites, tentativas e circuito do cliente síncrono (por processo)
+            transport=resilient_transport(limited_transport(httpx.AsyncHTTPTransport(limits=httpx.Limits(
+                max_connections=HTTP_POOL_SIZE,
+                max_keepalive_connections=HTTP_POOL_SIZE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            ))))
+        )
+    return _client
+
+
+async def select(operation, table, params):
+    """
+    Executa um SELECT via PostgREST
+
+    Args:
+        operation: Nome da operação (para métricas)
+        table: Nome da tabela
+        params: Parâmetros da query string (ex.: {'select': '*', 'user_email': 'eq.x'})
+
+    Returns:
+        list: Linhas retornadas
+    """
+    with observe('supabase', operation) as obs:
+        response = await _get_client().get(f"/{table}", params=params)
+        response.raise_for_status()
+        rows = response.json()
+        obs.add_bytes(len(response.content))
+        obs.set_result(rows)
+    return rows
+
+
+async def fetch_all_cards():
+    """Todos os cards de todos os usuários"""
+    return await fetch_cards_paged()
+
+
+async def fetch_cards_by_email(user_email):
+    """Cards de um usuário específico"""
+    return await fetch_cards_paged(user_email)
+
+
+async def fetch_active_cards(user_email=None):
+    """Cards ativos de um usuário ou de todos os usuários (carga completa, em páginas)"""
+    return await fetch_cards_paged(user_email)
+
+
+async def fetch_changes(since, user_email=None, page_size=1000):
+    """
+    Linhas alteradas desde um cursor, incluindo tombstones
+
+    Lê em páginas por keyset (updated_at, id) até uma página vazia: uma
+    gravação em massa com mais linhas que o max-rows do PostgREST na mesma
+    janela faria cada delta reler sempre a mesma primeira página.
+
+    Args:
+        since: Timestamp ISO (updated_at >= since)
+        user_email: Restringe a um usuário (None para todos)
+        page_size: Linhas por consulta
+
+    Returns:
+        list: Linhas em ordem de updated_at; as com deleted_at foram removidas
+    """
+    rows = []
+    while True:
+        params = {'select': '*', 'order': 'updated_at.asc,id.asc', 'limit': str(page_size)}
+        if rows:
+            # Depois da última linha lida; valores entre aspas (o timestamp tem '.' e ':')
+            stamp, last_id = rows[-1]['updated_at'], rows[-1]['id']
+            params['or'] = f'(updated_at.gt."{stamp}",and(updated_at.eq."{stamp}",id.gt."{last_id}"))'
+        else:
+            params['updated_at'] = f'gte.{since}'
+        if user_email:
+            params['user_email'] = f'eq.{user_email}'
+        page = await select('fetch_changes', 'cards', params)
+        if not page:
+            return rows
+        rows.extend(page)
+
+
+async def fetch_cards_after(last_id, user_email=None, limit=1000, columns='*'):
+    """
+    Próxima página de cards em ordem de id (paginação por keyset)
+
+    Args:
+        last_id: Último id da página anterior (None na primeira)
+        user_email: Restringe a um usuário (None para todos)
+        limit: Tamanho da página
+        columns: Colunas retornadas (deve incluir id para a próxima página)
+
+    Returns:
+        list: Até `limit` cards com id maior que last_id
+    """
+    params = {'select': columns, 'order': 'id.asc', 'limit': str(limit), **ACTIVE}
+    if last_id is not None:
+        params['id'] = f'gt.{last_id}'
+    if user_email:
+        params['user_email'] = f'eq.{user_email}'
+    return await select('fetch_cards_after', 'cards', params)
+
+
+async def fetch_cards_paged(user_email=None, page_size=1000, columns='*'):
+    """
+    Todos os cards ativos (de um usuário ou de todos) em páginas por keyset
+
+    Termina na primeira página vazia: cada resposta é cortada no max-rows do
+    PostgREST, então uma página curta não indica o fim.
+
+    Returns:
+        list: Cards em ordem de id
+    """
+    rows = []
+    last_id = None
+    while True:
+        page = await fetch_cards_after(last_id, user_email, page_size, columns)
+        if not page:
+            return rows
+        rows.extend(page)
+        last_id = page[-1]['id']
+
+
+async def fetch_referenced_public_ids(public_ids):
+    """
+    Quais public_id do Cloudinary ainda são usados por cards ativos
+
+    Args:
+        public_ids: Lista de public_id (até ~100 por chamada, por causa do tamanho da URL)
+
+    Returns:
+        set: Os public_id da lista que algum card ativo referencia
+    """
+    if not public_ids:
+        return set()
+    quoted = ','.join(f'"{public_id}"' for public_id in public_ids)
+    rows = await select('fetch_referenced_public_ids', 'cards', {
+        'select': 'cloudinary_public_id', 'cloudinary_public_id': f'in.({quoted})', **ACTIVE
+    })
+    return {row['cloudinary_public_id'] for row in rows}
+
+
+async def fetch_set_range(user_email, prefix, set_total, first, last):
+    """
+    Cards de uma coleção dentro de um intervalo de números (ex.: 1 a 50 de TG30)
+
+    Args:
+        user_email: Dono dos cards
+        prefix: Prefixo do número ("" para números sem prefixo)
+        set_total: Total da coleção
+        first: Primeiro número do intervalo
+        last: Último número do intervalo
+
+    Returns:
+        list: Cards em ordem de número (índice idx_cards_active_user_set_number)
+    """
+    params = {
+        'select': '*',
+        'user_email': f'eq.{user_email}',
+        'number_prefix': f'eq.{prefix}',
+        'set_total': f'eq.{set_total}',
+        'and': f'(set_number.gte.{first},set_number.lte.{last})',
+        'order': 'set_number.asc,id.asc',
+        **ACTIVE,
+    }
+    return await select('fetch_set_range', 'cards', params)
+
+
+async def fetch_unique_users():
+    """Emails dos usuários que têm cards, em ordem alfabética"""
+    rows = await select('fetch_unique_users', 'cards', {'select': 'user_email', 'user_email': 'not.is.null', **ACTIVE})
+    return sorted({row['user_email'] for row in rows if row.get('user_email')})
+
+
+async def fetch_card_by_id(card_id):
+    """Um card pelo id (ou None)"""
+    rows = await select('fetch_card_by_id', 'cards', {'select': '*', 'id': f'eq.{card_id}', **ACTIVE})
+    return rows[0] if rows else None
+
+
+async def fetch_card_versions(columns, user_email=None, page_size=1000):
+    """
+    Colunas leves (ex.: id, datas) de todos os cards ou dos cards de um usuário
+
+    Lê em páginas por keyset até uma página vazia: uma consulta única seria
+    cortada no max-rows do PostgREST, e o snapshot trata como removido todo
+    binder que não aparece na lista.
+
+    Args:
+        columns: Colunas retornadas (deve incluir id, para a próxima página)
+        user_email: Restringe a um usuário (None para todos)
+        page_size: Linhas por consulta
+    """
+    rows = []
+    last_id = None
+    while True:
+        params = {'select': columns, 'order': 'id.asc', 'limit': str(page_size),
+                  'user_email': f'eq.{user_email}' if user_email else 'not.is.null', **ACTIVE}
+        if last_id is not None:
+            params['id'] = f'gt.{last_id}'
+        page = await select('fetch_card_versions', 'cards', params)
+        if not page:
+            return rows
+        rows.extend(page)
+        last_id = page[-1]['id']
+
+
+async def fetch_stats():
+    """Estatísticas gerais (baixa apenas a coluna de valor)"""
+    rows = await select('fetch_stats', 'cards', {'select': 'estimated_value', **ACTIVE})
+    return compute_stats(rows)
+
+
+def compute_stats(cards):
+    """Calcula total de cards e valor total a partir das linhas"""
+    return {
+        'total_cards': len(cards),
+        'total_value': sum(float(card.get('estimated_value') or 0) for card in cards),
+    }
+
+
+async def _gather(coros):
+    names = list(coros)
+    results = await asyncio.gather(*coros.values(), return_exceptions=True)
+    return dict(zip(names, results))
+
+
+async def _in_context(coro, context):
+    # A tarefa herda o contexto de quem chamou (ex.: coletor do profiling)
+    return await context.run(asyncio.ensure_future, coro)
+
+
+def run(coro, timeout=PAGE_TIMEOUT):
+    """Executa uma corrotina no event loop dedicado e espera o resultado"""
+    future = asyncio.run_coroutine_threadsafe(_in_context(coro, contextvars.copy_context()), _get_loop())
+    try:
+        return future.result(timeout)
+    except Exception:
+        future.cancel()
+        raise
+
+
+def gather(timeout=PAGE_TIMEOUT, **coros):
+    """
+    Executa várias corrotinas ao mesmo tempo
+
+    Args:
+        timeout: Prazo total em segundos
+        **coros: nome -> corrotina
+
+    Returns:
+        dict: nome -> resultado, ou a exceção levantada por aquela consulta
+    """
+    return run(_gather(coros), timeout)
+
+
+def load_public_page(search_email=None):
+    """
+    Busca em paralelo tudo que a página do public_app precisa
+
+    Args:
+        search_email: Email do usuário pesquisado ou None para todas as coleções
+
+    Returns:
+        dict: 'users', 'stats' e 'cards' (None quando a consulta falhou) e
+              'errors' (nome -> exceção)
+    """
+    # Cards, diretório de usuários e estatísticas vêm do cache de binders (carga
+    # completa uma vez, depois deltas ou mudanças do listener de realtime_sync)
+    from binder_cache import get_cards, get_summary
+
+    results = gather(summary=get_summary(), cards=get_cards(search_email))
+    summary = results.pop('summary')
+    if isinstance(summary, Exception):
+        # Sem filtro a falha é a mesma dos cards (mesmo binder): não repete a mensagem
+        results['users'] = summary if search_email else []
+        results['stats'] = None
+    else:
+        results['users'] = summary['users']
+        results['stats'] = summary['stats']
+
+    errors = {name: value for name, value in results.items() if isinstance(value, Exception)}
+    page = {name: (None if name in errors else value) for name, value in results.items()}
+    page['errors'] = errors
+    return page
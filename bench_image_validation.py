@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Mede o custo da validação de imagem por upload
+
+Gera em memória imagens típicas (foto de card em PNG, foto de celular em
+JPEG, WEBP, GIF) e uma "bomba de descompressão" (PNG pequeno em bytes com
+dimensões acima do orçamento de pixels). Para cada uma, compara:
+
+    validação   validate_image_file (magic bytes + cabeçalho, sem decodificar)
+    decodificar Image.open + load (o que o upload fazia antes de qualquer limite)
+
+Falha se a validação passar do orçamento por upload, se uma imagem válida
+for recusada ou se a bomba for aceita.
+
+Uso:
+    python bench_image_validation.py
+    python bench_image_validation.py --repeat 2000 --budget-us 300
+"""
+
+import argparse
+import io
+import sys
+import time
+
+# Orçamento da validação por upload (microssegundos)
+VALIDATION_BUDGET_US = 500
+
+# Repetições da validação por amostra (a decodificação roda uma vez)
+REPEAT = 1000
+
+
+class FakeUpload(io.BytesIO):
+    """Arquivo como o UploadedFile do Streamlit (tipo informado pelo navegador)"""
+
+    def __init__(self, data, name, type):
+        super().__init__(data)
+        self.name = name
+        self.type = type
+        self.size = len(data)
+
+
+def build_samples():
+    """
+    Imagens de teste em memória
+
+    Returns:
+        list: Tuplas (nome, bytes, deve_ser_aceita)
+    """
+    from PIL import Image
+
+    def encode(image, image_format, **options):
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, **options)
+        return buffer.getvalue()
+
+    card = Image.new('RGB', (600, 840), (255, 204, 0))
+    phone = Image.effect_noise((4032, 3024), 64).convert('RGB')
+    # 8000 x 8000 em tons de cinza: ~60 KB de PNG, 64 milhões de pixels
+    bomb = Image.new('L', (8000, 8000), 0)
+    return [
+        ('card 600x840 PNG', encode(card, 'PNG'), True),
+        ('celular 4032x3024 JPEG', encode(phone, 'JPEG', quality=90), True),
+        ('card 600x840 WEBP', encode(card, 'WEBP'), True),
+        ('card 600x840 GIF', encode(card, 'GIF'), True),
+        ('bomba 8000x8000 PNG', encode(bomb, 'PNG', compress_level=9), False),
+        ('texto com tipo image/png', b'not an image' * 100, False),
+    ]
+
+
+def time_validation(data, repeat):
+    """Tempo médio de validate_image_file (µs) e o resultado"""
+    from cloudinary_utils import validate_image_file
+    upload = FakeUpload(data, 'card.png', 'image/png')
+    result = validate_image_file(upload)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        validate_image_file(upload)
+    return (time.perf_counter() - started) / repeat * 1_000_000, result
+
+
+def time_decode(data):
+    """Tempo de decodificação completa (ms) e memória decodificada estimada (MB)"""
+    from PIL import Image
+    previous, Image.MAX_IMAGE_PIXELS = Image.MAX_IMAGE_PIXELS, None
+    try:
+        started = time.perf_counter()
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        elapsed = time.perf_counter() - started
+        return elapsed * 1000, image.width * image.height * len(image.getbands()) / (1024 * 1024)
+    except Exception:
+        return None, None
+    finally:
+        Image.MAX_IMAGE_PIXELS = previous
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mede o custo da validação de imagem por upload")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="repetições da validação por amostra")
+    parser.add_argument('--budget-us', type=float, default=VALIDATION_BUDGET_US,
+                        help="orçamento da validação por upload (µs)")
+    return parser.parse_args()
+
+
+def main():
+    """Função principal"""
+    args = parse_args()
+    print("🎴 MyPokeBinder - Custo da Validação de Imagem")
+    print("=" * 50)
+
+    all_ok = True
+    for name, data, should_pass in build_samples():
+        validation_us, (is_valid, message) = time_validation(data, args.repeat)
+        decode_ms, decoded_mb = time_decode(data)
+        ok = is_valid == should_pass and validation_us <= args.budget_us
+        all_ok = all_ok and ok
+        verdict = "aceita" if is_valid else f"recusada ({message})"
+        print(f"{'✅' if ok else '❌'} {name}: {len(data) / 1024:.0f} KB, {verdict}")
+        decode = "não decodifica" if decode_ms is None else f"{decode_ms:.1f} ms, {decoded_mb:.0f} MB decodificados"
+        print(f"     validação {validation_us:7.1f} µs | decodificar {decode}")
+
+    print("=" * 50)
+    if all_ok:
+        print(f"🎉 Validação dentro do orçamento ({args.budget_us:.0f} µs por upload)!")
+    else:
+        print("⚠️ Validação fora do orçamento ou com resultado errado")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
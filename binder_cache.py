@@ -0,0 +1,354 @@
+"""
+Cache de binders atualizado por deltas (updated_at + tombstones)
+
+Cada binder em cache (de um usuário, ou de todos os usuários) guarda as
+linhas por id e um cursor com o maior updated_at já visto. Na primeira
+leitura o binder é carregado inteiro; depois, no máximo a cada
+BINDER_DELTA_INTERVAL segundos, busca apenas as linhas alteradas desde o
+cursor. Linhas com deleted_at preenchido (tombstones) removem o card do cache.
+
+O cursor é recuado em CURSOR_OVERLAP a cada consulta: updated_at é o horário
+de início da transação, então uma transação lenta pode gravar um valor
+menor que o de outra já lida. Reaplicar as linhas da janela é idempotente.
+
+Com o listener de mudanças ativo (realtime_sync), cada INSERT/UPDATE/DELETE
+é aplicado direto nos binders em cache por apply_change() e o intervalo entre
+deltas passa a ser BINDER_LIVE_DELTA_INTERVAL (apenas uma rede de segurança).
+Ao conectar ou perder a conexão do listener, todos os binders fazem um delta
+de recuperação na próxima leitura (eventos perdidos no meio tempo).
+
+Com o cache compartilhado entre réplicas ligado (shared_cache), cada
+gravação de card incrementa a versão 'cards'. Um binder sincronizado na
+versão atual não consulta o delta (no máximo a cada BINDER_SHARED_DELTA_INTERVAL,
+como rede de segurança para gravações feitas fora do app); quando a versão
+muda, o delta é consultado na hora, em qualquer réplica. A carga completa
+de um binder e o resumo (diretório e estatísticas) ficam no cache
+compartilhado na versão em que foram lidos, então uma réplica nova não
+repete a consulta que outra já fez.
+
+Se o delta falhar porque o Supabase está fora (rede, timeout ou circuito
+aberto em resilience), o binder já carregado continua sendo servido como
+está e a próxima tentativa fica para o intervalo seguinte; só a primeira
+carga de um binder depende do Supabase estar no ar.
+
+Todo o estado vive no event loop de async_data (uma thread), então não há
+locks de thread; get_binder() é a porta de entrada para código síncrono.
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import async_data
+import shared_cache
+from resilience import is_unavailable, record_stale
+
+# Intervalo mínimo entre consultas de delta de um mesmo binder (segundos)
+DELTA_MIN_INTERVAL = float(os.getenv("BINDER_DELTA_INTERVAL", "2"))
+
+# O mesmo intervalo enquanto o listener de mudanças está conectado
+LIVE_DELTA_INTERVAL = float(os.getenv("BINDER_LIVE_DELTA_INTERVAL", "300"))
+
+# O mesmo intervalo quando a versão do cache compartilhado não mudou
+SHARED_DELTA_INTERVAL = float(os.getenv("BINDER_SHARED_DELTA_INTERVAL", "30"))
+
+# Janela reconsultada a cada delta (transações concorrentes)
+CURSOR_OVERLAP = timedelta(seconds=5)
+
+# Tombstones mais antigos que isso podem ter sido expurgados: recarrega tudo
+TOMBSTONE_RETENTION = timedelta(days=int(os.getenv("TOMBSTONE_RETENTION_DAYS", "30")))
+
+# Binders mantidos em memória (o de todos os usuários conta como um)
+MAX_BINDERS = 256
+
+ALL_USERS = '*'
+
+_binders = OrderedDict()
+
+# True enquanto o listener de mudanças (realtime_sync) está conectado
+_live = False
+
+# Versões das listas de cards (únicas no processo)
+_versions = itertools.count(1)
+
+
+def parse_timestamp(value):
+    """Converte um timestamp do PostgREST em datetime com fuso (ou None)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def row_timestamp(row):
+    """Momento da última mudança de uma linha (updated_at ou created_at)"""
+    return parse_timestamp(row.get('updated_at')) or parse_timestamp(row.get('created_at'))
+
+
+class CardList(list):
+    """Cards de um binder com a versão do conteúdo (muda a cada alteração)"""
+
+    version = None
+
+
+class CachedBinder:
+    """Linhas ativas de um binder e o cursor de sincronização"""
+
+    def __init__(self, key):
+        self.key = key
+        self.rows = {}
+        self.cursor = None
+        self.synced_at = 0.0
+        self.loaded_at = None
+        self.lock = asyncio.Lock()
+        self.pending = []
+        self.shared_version = None
+        self._cards = None
+        self._summary = None
+
+    def reset(self, rows):
+        """Substitui o conteúdo por uma carga completa"""
+        self.rows = {}
+        self.cursor = None
+        self.apply(rows)
+        self.loaded_at = datetime.now(timezone.utc)
+        if self.cursor is None:
+            # Binder vazio: os deltas partem do momento da carga (o recuo de
+            # CURSOR_OVERLAP cobre gravações durante a consulta)
+            self.cursor = self.loaded_at
+
+    def apply(self, rows):
+        """
+        Aplica linhas alteradas (upsert ou remoção por tombstone)
+
+        Returns:
+            int: Quantidade de linhas que mudaram o conteúdo do cache
+        """
+        changed = 0
+        for row in rows:
+            stamp = row_timestamp(row)
+            if stamp and (self.cursor is None or stamp > self.cursor):
+                self.cursor = stamp
+
+            card_id = row.get('id')
+            current = self.rows.get(card_id)
+            if current is not None and stamp and (row_timestamp(current) or stamp) > stamp:
+                # Versão mais antiga que a já aplicada (ex.: janela de sobreposição)
+                continue
+            if row.get('deleted_at'):
+                if self.rows.pop(card_id, None) is not None:
+                    changed += 1
+            elif current != row:
+                self.rows[card_id] = row
+                changed += 1
+
+        if changed:
+            self._cards = None
+            self._summary = None
+        return changed
+
+    def discard(self, card_id):
+        """Remove um card pelo id (DELETE físico, sem tombstone)"""
+        if self.rows.pop(card_id, None) is None:
+            return False
+        self._cards = None
+        self._summary = None
+        return True
+
+    @property
+    def cards(self):
+        """Cards ativos (lista reaproveitada enquanto nada muda)"""
+        if self._cards is None:
+            self._cards = CardList(self.rows.values())
+            # Chave dos caches do card_grid sem precisar percorrer os cards
+            self._cards.version = f"binder:{next(_versions)}"
+        return self._cards
+
+    @property
+    def summary(self):
+        """Diretório de usuários (nº de cards de cada um) e estatísticas dos cards"""
+        if self._summary is None:
+            counts = {}
+            for row in self.rows.values():
+                if row.get('user_email'):
+                    counts[row['user_email']] = counts.get(row['user_email'], 0) + 1
+            self._summary = {
+                'users': sorted(counts),
+                'counts': counts,
+                'stats': async_data.compute_stats(self.cards),
+            }
+        return self._summary
+
+    def needs_full_load(self):
+        if self.loaded_at is None or self.cursor is None:
+            return True
+        return datetime.now(timezone.utc) - self.loaded_at > TOMBSTONE_RETENTION
+
+
+def _binder(key):
+    binder = _binders.get(key)
+    if binder is None:
+        binder = CachedBinder(key)
+        _binders[key] = binder
+        while len(_binders) > MAX_BINDERS:
+            _binders.popitem(last=False)
+    _binders.move_to_end(key)
+    return binder
+
+
+def _delta_interval():
+    return LIVE_DELTA_INTERVAL if _live else DELTA_MIN_INTERVAL
+
+
+def _needs_delta(binder, shared_version):
+    """Decide se o binder consulta o delta nesta leitura"""
+    elapsed = time.monotonic() - binder.synced_at
+    if shared_version is None:
+        return elapsed >= _delta_interval()
+    if shared_version != binder.shared_version:
+        # Houve gravação (em qualquer réplica) desde a última sincronização
+        return True
+    return elapsed >= max(_delta_interval(), SHARED_DELTA_INTERVAL)
+
+
+async def get_cards(user_email=None):
+    """
+    Cards ativos de um usuário (ou de todos), atualizados por delta
+
+    Args:
+        user_email: Email do dono ou None para todos os usuários
+
+    Returns:
+        list: Cards ativos (não modificar a lista retornada)
+    """
+    key = user_email or ALL_USERS
+    binder = _binder(key)
+    async with binder.lock:
+        # Lida antes das consultas: o que vier delas é no mínimo desta versão
+        shared_version = await shared_cache.version('cards')
+        if binder.needs_full_load():
+            rows = await shared_cache.get(f"binder:{key}", shared_version, local=False)
+            if rows is None:
+                rows = await async_data.fetch_active_cards(user_email)
+                await shared_cache.put(f"binder:{key}", shared_version, rows, local=False)
+            binder.reset(rows)
+            binder.synced_at = time.monotonic()
+            binder.shared_version = shared_version
+        elif _needs_delta(binder, shared_version):
+            since = binder.cursor - CURSOR_OVERLAP
+            try:
+                binder.apply(await async_data.fetch_changes(since.isoformat(), user_email))
+                binder.shared_version = shared_version
+            except Exception as e:
+                if not is_unavailable(e):
+                    raise
+                # Dependência fora: segue com o binder em cache (desatualizado)
+                record_stale('binder')
+            binder.synced_at = time.monotonic()
+        # Mudanças recebidas durante a consulta podem ser mais novas que o resultado
+        if binder.pending:
+            pending, binder.pending = binder.pending, []
+            binder.apply(pending)
+    return binder.cards
+
+
+async def get_summary():
+    """Diretório de usuários e estatísticas gerais (do binder de todos os usuários)"""
+    shared_version = await shared_cache.version('cards')
+    summary = await shared_cache.get('summary', shared_version)
+    if summary is None:
+        await get_cards()
+        summary = _binder(ALL_USERS).summary
+        await shared_cache.put('summary', shared_version, summary)
+    return summary
+
+
+def apply_change(change):
+    """
+    Aplica uma mudança da tabela cards aos binders em cache
+
+    Chamado pelo listener de realtime_sync dentro do event loop de async_data.
+    Só binders já carregados são alterados; os demais carregam na primeira leitura.
+
+    Args:
+        change: {'type': 'INSERT'|'UPDATE'|'DELETE', 'record': linha nova,
+                 'old_record': linha anterior (às vezes só o id)}
+
+    Returns:
+        int: Quantidade de binders alterados
+    """
+    record = change.get('record') or {}
+    old_record = change.get('old_record') or {}
+
+    if change.get('type') == 'DELETE':
+        card_id = old_record.get('id')
+        if card_id is None:
+            expire()
+            return 0
+        changed = 0
+        for binder in _binders.values():
+            if binder.lock.locked():
+                # Tombstone sintético: remove o card depois da carga em andamento
+                binder.pending.append({'id': card_id, 'deleted_at': change.get('commit_timestamp') or True})
+            changed += binder.discard(card_id)
+        return changed
+
+    if record.get('id') is None or 'user_email' not in record:
+        # Payload incompleto (ex.: NOTIFY truncado): recupera pelo próximo delta
+        expire()
+        return 0
+
+    changed = 0
+    for key, binder in _binders.items():
+        if key in (ALL_USERS, record['user_email']):
+            if binder.lock.locked():
+                # Carga em andamento: aplicada quando a consulta terminar
+                binder.pending.append(record)
+            else:
+                changed += bool(binder.apply([record]))
+        elif binder.discard(record['id']):
+            # O card mudou de dono
+            changed += 1
+    return changed
+
+
+def set_live(live):
+    """
+    Liga/desliga o modo de intervalo longo (listener de mudanças conectado)
+
+    Em qualquer transição os binders fazem um delta na próxima leitura, para
+    recuperar mudanças que aconteceram enquanto o listener estava fora.
+    """
+    global _live
+    _live = bool(live)
+    expire()
+
+
+def expire():
+    """Faz todos os binders consultarem o delta na próxima leitura"""
+    for binder in _binders.values():
+        binder.synced_at = float('-inf')
+
+
+def get_binder(user_email=None):
+    """Versão síncrona de get_cards()"""
+    return async_data.run(get_cards(user_email))
+
+
+def binder_summary():
+    """Versão síncrona de get_summary()"""
+    return async_data.run(get_summary())
+
+
+def clear():
+    """Esvazia o cache (ex.: ao trocar o conjunto de dados em verificações)"""
+    async def _clear():
+        _binders.clear()
+        shared_cache.clear()
+    async_data.run(_clear())
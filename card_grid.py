@@ -0,0 +1,435 @@
+"""
+Grid unificado de cards do MyPokeBinder
+
+Concentra a barra de filtros, a ordenação, a paginação e a renderização em
+colunas usadas por todas as páginas (binder, páginas públicas e public_app).
+As chaves de ordenação são pré-calculadas uma vez por versão do conjunto de
+cards, em colunas Arrow/NumPy (carregados só quando o primeiro grid é
+montado, fora do cold start), e os índices do resultado filtrado/ordenado
+ficam em cache por (versão, filtros).
+
+A busca por nome traz primeiro os nomes que contêm o texto digitado e, em
+seguida, nomes parecidos (erros de digitação) pelo índice de trigramas,
+construído uma vez por versão. O campo de busca é o st_keyup (pacote
+streamlit-keyup): a busca roda enquanto o usuário digita (com debounce).
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from card_numbers import number_parts
+from profiling import section
+
+# Configurações padrão do grid
+DEFAULT_COLUMNS = 4
+DEFAULT_PAGE_SIZE = 24
+DEFAULT_SORT_OPTIONS = ["Nome", "Número", "Valor", "Data de Criação"]
+
+# Campo e direção de cada opção de ordenação
+SORT_FIELDS = {
+    "Nome": ('name', False),
+    "Número": ('number', False),
+    "Valor": ('estimated_value', True),
+    "Data de Criação": ('created_at', True),
+    "Usuário": ('user_email', False),
+}
+
+# Rótulos dos filtros (versão com emojis usada nas páginas públicas)
+PUBLIC_LABELS = {
+    'name': "🔍 Filtrar por nome",
+    'language': "🌍 Filtrar por idioma",
+    'all_languages': "Todos",
+    'sort': "📊 Ordenar por",
+}
+
+# Busca aproximada: tamanho mínimo do texto e espera após a última tecla (ms)
+FUZZY_MIN_LENGTH = 3
+SEARCH_DEBOUNCE_MS = int(os.getenv("SEARCH_DEBOUNCE_MS", "300"))
+
+# Limites dos caches em memória (compartilhados entre sessões do processo)
+_MAX_PREPARED_DATASETS = 64
+_MAX_CACHED_RESULTS = 512
+
+_cache_lock = threading.Lock()
+_prepared_cache = OrderedDict()
+_result_cache = OrderedDict()
+
+
+class _PreparedCards:
+    """
+    Conjunto de cards em colunas, com chaves de filtro e ordenação pré-calculadas
+
+    Nome (em minúsculas) e idioma são codificados por dicionário: um inteiro
+    por card e os valores distintos em arrays Arrow. O valor estimado é um
+    array float64. As demais chaves de ordenação (número, data, usuário) são
+    montadas só quando a ordenação é pedida. Cada ordenação é uma permutação
+    int32 calculada uma única vez (o número do card ordena por prefixo, total
+    e número da coleção, não pelo texto). Filtros viram máscaras booleanas
+    sobre essas colunas; os dicionários dos cards só são acessados para
+    montar a página exibida.
+    """
+
+    def __init__(self, cards):
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        self.cards = cards if isinstance(cards, list) else list(cards)
+        names = pc.utf8_lower(pa.array([card.get('name') or '' for card in self.cards], pa.string()))
+        names = names.dictionary_encode()
+        self.name_codes = names.indices.to_numpy(zero_copy_only=False)
+        self.name_dictionary = names.dictionary
+        languages = pa.array([card.get('language') or '' for card in self.cards], pa.string()).dictionary_encode()
+        self.language_codes = languages.indices.to_numpy(zero_copy_only=False)
+        self.language_dictionary = languages.dictionary.to_pylist()
+        self.language_options = sorted(self.language_dictionary)
+        self.values = np.fromiter((float(card.get('estimated_value') or 0) for card in self.cards),
+                                  dtype=np.float64, count=len(self.cards))
+        self._orders = {}
+        self._trigrams = None
+        self._trigrams_lock = threading.Lock()
+
+    @property
+    def trigrams(self):
+        """
+        Índice de trigramas dos nomes distintos (construído na primeira busca)
+
+        O objeto é compartilhado entre sessões: buscas simultâneas esperam a
+        primeira construir o índice em vez de cada uma construir o seu. O lock
+        é do conjunto (não o _cache_lock), então a construção não trava os
+        grids dos outros conjuntos.
+        """
+        if self._trigrams is None:
+            with self._trigrams_lock:
+                if self._trigrams is None:
+                    from trigram_index import TrigramIndex
+                    self._trigrams = TrigramIndex(self.name_dictionary.to_pylist())
+        return self._trigrams
+
+    def _sort_table(self, field):
+        """Colunas de ordenação de um campo (o número usa prefixo, total e número)"""
+        import pyarrow as pa
+        if field == 'estimated_value':
+            return pa.table({'value': self.values})
+        if field == 'number':
+            prefixes, totals, numbers = zip(*map(number_parts, self.cards)) if self.cards else ((), (), ())
+            return pa.table({
+                # Números que não puderam ser interpretados vão para o fim
+                'unparsed': pa.array([number is None for number in numbers], pa.bool_()),
+                'prefix': pa.array(prefixes, pa.string()),
+                # Sem nulos: coleção sem total vem antes das demais do mesmo prefixo
+                'total': pa.array([-1 if total is None else total for total in totals], pa.int64()),
+                'number': pa.array([number or 0 for number in numbers], pa.int64()),
+                'text': pa.array([card.get('number') or '' for card in self.cards], pa.string()),
+            })
+        return pa.table({'key': pa.array([card.get(field) or '' for card in self.cards], pa.string())})
+
+    def order(self, sort_by):
+        """Permutação dos cards na ordem pedida (estável, calculada uma única vez)"""
+        if sort_by not in self._orders:
+            import numpy as np
+            import pyarrow.compute as pc
+            field, reverse = SORT_FIELDS.get(sort_by, SORT_FIELDS["Nome"])
+            table = self._sort_table(field)
+            direction = 'descending' if reverse else 'ascending'
+            indices = pc.sort_indices(table, sort_keys=[(name, direction) for name in table.column_names])
+            self._orders[sort_by] = indices.to_numpy().astype(np.int32)
+        return self._orders[sort_by]
+
+    def select(self, needle, language, sort_by):
+        """
+        Índices dos cards que passam nos filtros
+
+        Cards cujo nome contém o texto vêm primeiro, na ordem pedida; depois os
+        de nome parecido, do mais para o menos relevante.
+        """
+        import numpy as np
+        import pyarrow.compute as pc
+        order = self.order(sort_by)
+        by_language = None
+        if language is not None:
+            if language not in self.language_dictionary:
+                return order[:0]
+            by_language = self.language_codes == self.language_dictionary.index(language)
+        if not needle:
+            return order if by_language is None else order[by_language[order]]
+
+        # Filtros avaliados uma vez por nome distinto e expandidos para os cards
+        contains = pc.match_substring(self.name_dictionary, needle).to_numpy(zero_copy_only=False)
+        mask = contains[self.name_codes]
+        if by_language is not None:
+            mask &= by_language
+        result = order[mask[order]]
+        if len(needle) < FUZZY_MIN_LENGTH:
+            return result
+
+        name_ids, _ = self.trigrams.search(needle)
+        name_rank = np.full(len(self.name_dictionary), -1, dtype=np.int32)
+        name_rank[name_ids] = np.arange(len(name_ids), dtype=np.int32)
+        name_rank[contains] = -1
+        rank = name_rank[self.name_codes]
+        similar = rank >= 0
+        if by_language is not None:
+            similar &= by_language
+        similar = order[similar[order]]
+        similar = similar[np.argsort(rank[similar], kind='stable')]
+        return np.concatenate([result, similar])
+
+    def stats(self):
+        """Totais do conjunto: quantidade, valor, idiomas e maior valor"""
+        return {
+            'total_cards': len(self.cards),
+            'total_value': float(self.values.sum()),
+            'languages': len(self.language_dictionary),
+            'max_value': float(self.values.max()) if len(self.values) else 0.0,
+        }
+
+
+def _lru_get(cache, key):
+    with _cache_lock:
+        if key not in cache:
+            return None
+        cache.move_to_end(key)
+        return cache[key]
+
+
+def _lru_put(cache, key, value, max_size):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+
+
+def dataset_version(cards):
+    """
+    Calcula a versão de um conjunto de cards
+
+    Args:
+        cards: Lista de cards (dicionários vindos do Supabase)
+
+    Returns:
+        str: Identificador que muda sempre que um card é incluído, removido ou atualizado
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for card in cards:
+        stamp = card.get('updated_at') or card.get('created_at') or ''
+        digest.update(f"{card.get('id')}|{stamp}|{card.get('number')}\n".encode('utf-8'))
+    return f"{len(cards)}:{digest.hexdigest()}"
+
+
+def _get_prepared(cards, version):
+    prepared = _lru_get(_prepared_cache, version)
+    if prepared is None:
+        prepared = _PreparedCards(cards)
+        _lru_put(_prepared_cache, version, prepared, _MAX_PREPARED_DATASETS)
+    return prepared
+
+
+def _version(cards, version):
+    # Listas do binder_cache já trazem a versão (evita percorrer todos os cards)
+    return version or getattr(cards, 'version', None) or dataset_version(cards)
+
+
+def get_language_options(cards, version=None):
+    """Retorna os idiomas presentes no conjunto de cards, em ordem alfabética"""
+    version = _version(cards, version)
+    return _get_prepared(cards, version).language_options
+
+
+def collection_stats(cards, version=None):
+    """
+    Totais de um conjunto de cards a partir das colunas pré-calculadas
+
+    Returns:
+        dict: 'total_cards', 'total_value', 'languages' (nº de idiomas) e 'max_value'
+    """
+    version = _version(cards, version)
+    return _get_prepared(cards, version).stats()
+
+
+def filter_indices(cards, filter_name="", language=None, sort_by="Nome", version=None):
+    """
+    Índices dos cards filtrados e ordenados (com cache de resultados)
+
+    Args:
+        cards: Lista de cards
+        filter_name: Trecho do nome (busca sem diferenciar maiúsculas)
+        language: Idioma exato ou None para todos
+        sort_by: Uma das opções de SORT_FIELDS
+        version: Versão do conjunto (calculada se não informada)
+
+    Returns:
+        numpy.ndarray: Posições em cards, na ordem pedida (não modificar)
+    """
+    version = _version(cards, version)
+    needle = (filter_name or "").lower()
+    key = (version, needle, language, sort_by)
+
+    cached = _lru_get(_result_cache, key)
+    if cached is not None:
+        return cached
+
+    result = _get_prepared(cards, version).select(needle, language, sort_by)
+    _lru_put(_result_cache, key, result, _MAX_CACHED_RESULTS)
+    return result
+
+
+def filter_and_sort(cards, filter_name="", language=None, sort_by="Nome", version=None):
+    """
+    Filtra e ordena cards usando chaves pré-calculadas e cache de resultados
+
+    Args:
+        cards: Lista de cards
+        filter_name: Trecho do nome (busca sem diferenciar maiúsculas)
+        language: Idioma exato ou None para todos
+        sort_by: Uma das opções de SORT_FIELDS
+        version: Versão do conjunto (calculada se não informada)
+
+    Returns:
+        list: Cards filtrados na ordem pedida
+    """
+    return [cards[i] for i in filter_indices(cards, filter_name, language, sort_by, version).tolist()]
+
+
+def render_grid(cards, renderer, columns=DEFAULT_COLUMNS):
+    """
+    Renderiza cards em colunas
+
+    Args:
+        cards: Cards a exibir (já filtrados/paginados)
+        renderer: Função que recebe um card e desenha seu conteúdo
+        columns: Número de colunas do grid
+    """
+    cols = st.columns(columns)
+    for i, card in enumerate(cards):
+        with cols[i % columns]:
+            renderer(card)
+
+
+def search_input(label, key):
+    """
+    Campo de busca por nome
+
+    Usa o st_keyup (streamlit-keyup, em requirements.txt): o valor chega a
+    cada pausa de SEARCH_DEBOUNCE_MS na digitação, sem precisar de Enter. Se
+    o pacote não estiver instalado, cai no st.text_input padrão (Enter).
+    """
+    try:
+        from st_keyup import st_keyup
+    except ImportError:
+        return st.text_input(label, key=key)
+    return st_keyup(label, key=key, debounce=SEARCH_DEBOUNCE_MS) or ""
+
+
+def _current_page(key_prefix, total_items, page_size, filter_state):
+    """
+    Seletor de página; volta para a primeira página quando os filtros mudam
+
+    Mudanças nos dados (versão do conjunto) não reiniciam a paginação: a
+    página atual só é ajustada para a última se o conjunto encolher.
+    """
+    total_pages = max(1, -(-total_items // page_size))
+    page_key = f"{key_prefix}_page"
+    state_key = f"{key_prefix}_page_filters"
+
+    if st.session_state.get(state_key) != filter_state:
+        st.session_state[state_key] = filter_state
+        st.session_state[page_key] = 1
+
+    if total_pages == 1:
+        return 1
+
+    if st.session_state.get(page_key, 1) > total_pages:
+        st.session_state[page_key] = total_pages
+
+    return st.number_input(
+        f"Página (de {total_pages})",
+        min_value=1,
+        max_value=total_pages,
+        step=1,
+        key=page_key
+    )
+
+
+def show_card_grid(cards, key_prefix, renderer, sort_options=None, labels=None,
+                   columns=DEFAULT_COLUMNS, page_size=DEFAULT_PAGE_SIZE,
+                   show_count=True, version=None):
+    """
+    Exibe barra de filtros, ordenação, paginação e o grid de cards
+
+    Args:
+        cards: Lista completa de cards do conjunto
+        key_prefix: Prefixo das chaves dos widgets (ex.: "public" -> public_filter_name)
+        renderer: Função que desenha um card dentro da coluna
+        sort_options: Opções de ordenação exibidas (padrão: DEFAULT_SORT_OPTIONS)
+        labels: Rótulos dos filtros (padrão: PUBLIC_LABELS)
+        columns: Número de colunas do grid
+        page_size: Cards por página (apenas a página atual é renderizada)
+        show_count: Exibe "Mostrando X de Y cards"
+        version: Versão do conjunto (calculada se não informada)
+
+    Returns:
+        numpy.ndarray: Posições dos cards filtrados, na ordem exibida
+    """
+    sort_options = sort_options or DEFAULT_SORT_OPTIONS
+    labels = labels or PUBLIC_LABELS
+    version = _version(cards, version)
+    all_languages = labels['all_languages']
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        filter_name = search_input(labels['name'], key=f"{key_prefix}_filter_name")
+    with col2:
+        filter_language = st.selectbox(
+            labels['language'],
+            [all_languages] + get_language_options(cards, version),
+            key=f"{key_prefix}_filter_lang"
+        )
+    with col3:
+        sort_by = st.selectbox(labels['sort'], sort_options, key=f"{key_prefix}_sort")
+
+    language = None if filter_language == all_languages else filter_language
+    with section(f"grid:{key_prefix}:filtro"):
+        filtered = filter_indices(cards, filter_name, language, sort_by, version)
+
+    if not len(filtered):
+        st.info("🔍 Nenhum card encontrado com os filtros aplicados.")
+        return filtered
+
+    page = _current_page(key_prefix, len(filtered), page_size,
+                         (filter_name, filter_language, sort_by))
+    start = (page - 1) * page_size
+    # Só os cards da página atual saem das colunas para dicionários
+    page_cards = [cards[i] for i in filtered[start:start + page_size].tolist()]
+
+    if show_count:
+        if len(page_cards) < len(filtered):
+            total_note = f" ({len(cards)} no total)" if len(filtered) < len(cards) else ""
+            st.markdown(f"**Mostrando {start + 1}–{start + len(page_cards)} de "
+                        f"{len(filtered)} cards{total_note}**")
+        else:
+            st.markdown(f"**Mostrando {len(filtered)} de {len(cards)} cards**")
+
+    with section(f"grid:{key_prefix}:render"):
+        render_grid(page_cards, renderer, columns)
+    return filtered
+
+
+def render_public_card(card):
+    """Renderizador padrão: imagem, nome, número, valor e idioma"""
+    with st.container():
+        st.image(card.get('image_url', ''), width=150, use_container_width=True)
+        st.markdown(f"**{card.get('name', '')}**")
+        st.markdown(f"📋 Nº {card.get('number', '')}")
+        st.markdown(f"💰 R$ {float(card.get('estimated_value') or 0):.2f}")
+        st.markdown(f"🌍 {card.get('language', '')}")
+
+
+def render_public_card_with_owner(card):
+    """Renderizador padrão acrescido do email do dono do card"""
+    render_public_card(card)
+    st.markdown(f"👤 {card.get('user_email', 'N/A')}")
@@ -0,0 +1,78 @@
+"""
+Números de card estruturados (prefixo, número na coleção e total da coleção)
+
+O texto de `number` ("027/182", "TG05/TG30", "SV-P 001") é quebrado em
+colunas indexadas: number_prefix (texto, "" quando não há), set_number e
+set_total (inteiros ou None). A ordenação por número usa essas colunas, e
+consultas de intervalo ("cards 1 a 50 da coleção") usam o índice
+(user_email, number_prefix, set_total, set_number).
+
+As regras são as mesmas da função card_number_parts() da migration 004,
+que preenche as linhas já existentes.
+"""
+
+import re
+
+# Dígitos no fim de cada lado da barra e o que vem antes deles
+_TRAILING_DIGITS = re.compile(r'(\d+)\s*$')
+_TRAILING_NUMBER = re.compile(r'[\s-]*\d+\s*$')
+
+# Números maiores que isso não cabem em INTEGER (e não são números de card)
+_MAX_DIGITS = 9
+
+
+def _trailing_int(text):
+    match = _TRAILING_DIGITS.search(text)
+    if not match or len(match.group(1).lstrip('0')) > _MAX_DIGITS:
+        return None
+    return int(match.group(1))
+
+
+def parse_card_number(number):
+    """
+    Quebra o número de um card em (prefixo, número, total)
+
+    Args:
+        number: Texto como "027/182", "TG05/TG30" ou "SV-P 001"
+
+    Returns:
+        tuple: (prefixo em maiúsculas, set_number ou None, set_total ou None)
+    """
+    parts = (number or '').split('/')
+    left = parts[0]
+    set_number = _trailing_int(left)
+    if set_number is None:
+        return '', None, None
+    prefix = _TRAILING_NUMBER.sub('', left).strip().upper()
+    set_total = _trailing_int(parts[1]) if len(parts) > 1 else None
+    return prefix, set_number, set_total
+
+
+def number_columns(number):
+    """Colunas estruturadas para gravar junto com `number` (insert/update)"""
+    prefix, set_number, set_total = parse_card_number(number)
+    return {'number_prefix': prefix, 'set_number': set_number, 'set_total': set_total}
+
+
+def parse_set_key(set_key):
+    """
+    Identifica uma coleção a partir de um texto como "182" ou "TG30"
+
+    Returns:
+        tuple: (prefixo, total) ou None se não houver um total numérico
+    """
+    prefix, total, _ = parse_card_number(set_key)
+    return None if total is None else (prefix, total)
+
+
+def number_parts(card):
+    """
+    (prefixo, total, número) de um card para ordenação
+
+    Usa as colunas quando a linha já as tem; linhas antigas (antes da
+    migration 004) ou parciais são interpretadas a partir de `number`.
+    """
+    if 'set_number' in card and 'number_prefix' in card:
+        return card.get('number_prefix') or '', card.get('set_total'), card.get('set_number')
+    prefix, set_number, set_total = parse_card_number(card.get('number'))
+    return prefix, set_total, set_number
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Verifica o tempo de cold start (import) de cada ponto de entrada
+
+Executa `python -X importtime` em um processo novo para cada aplicação,
+soma o tempo acumulado dos imports e compara com o orçamento em ms.
+Também falha se módulos pesados aparecerem onde não deveriam
+(ex.: PIL ou cloudinary no public_app).
+
+Uso:
+    python check_importtime.py
+    python check_importtime.py --budget app=1800 --budget public_app=1500
+"""
+
+import os
+import subprocess
+import sys
+
+# Orçamento de cold start por ponto de entrada (ms)
+IMPORT_BUDGETS_MS = {
+    'app': 1200,
+    'public_app': 1200,
+}
+
+# Módulos que não podem ser carregados no import de cada ponto de entrada
+FORBIDDEN_AT_IMPORT = {
+    'app': ['PIL', 'cloudinary', 'supabase', 'numpy', 'pyarrow'],
+    'public_app': ['PIL', 'cloudinary', 'cloudinary_utils', 'supabase', 'numpy', 'pyarrow'],
+}
+
+# Quantidade de imports diretos mais pesados exibidos no relatório
+TOP_N = 8
+
+
+def measure_import(module_name):
+    """
+    Importa um módulo em um processo novo com -X importtime
+
+    Args:
+        module_name: Nome do módulo do ponto de entrada (ex.: 'app')
+
+    Returns:
+        list: Tuplas (nível, self_us, cumulativo_us, nome) na ordem do relatório
+    """
+    env = dict(os.environ)
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'falha no import')
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        self_us = int(parts[0].strip())
+        cumulative_us = int(parts[1].strip())
+        raw_name = parts[2][1:]
+        level = (len(raw_name) - len(raw_name.lstrip(' '))) // 2
+        entries.append((level, self_us, cumulative_us, raw_name.strip()))
+    return entries
+
+
+def report(module_name, budget_ms):
+    """Mede, imprime o relatório e retorna True se estiver dentro do orçamento"""
+    entries = measure_import(module_name)
+    top_level = [entry for entry in entries if entry[0] == 0]
+    total_ms = sum(entry[2] for entry in top_level) / 1000
+    loaded = {entry[3] for entry in entries}
+
+    status = "✅" if total_ms <= budget_ms else "❌"
+    print(f"{status} {module_name}: {total_ms:.0f} ms (orçamento {budget_ms} ms)")
+
+    # Imports diretos mais pesados (filhos imediatos dos módulos de topo)
+    children = [entry for entry in entries if entry[0] == 1]
+    for _, _, cumulative_us, name in sorted(children, key=lambda e: e[2], reverse=True)[:TOP_N]:
+        print(f"     {cumulative_us / 1000:8.1f} ms  {name}")
+
+    forbidden = [name for name in FORBIDDEN_AT_IMPORT.get(module_name, []) if name in loaded]
+    if forbidden:
+        print(f"   ❌ Módulos pesados carregados no import: {', '.join(forbidden)}")
+
+    return total_ms <= budget_ms and not forbidden
+
+
+def parse_budgets(argv):
+    """Lê argumentos --budget nome=ms"""
+    budgets = dict(IMPORT_BUDGETS_MS)
+    for i, arg in enumerate(argv):
+        if arg == '--budget' and i + 1 < len(argv):
+            name, value = argv[i + 1].split('=', 1)
+            budgets[name] = int(value)
+    return budgets
+
+
+def main():
+    """Função principal"""
+    print("🎴 MyPokeBinder - Orçamento de Cold Start")
+    print("=" * 50)
+
+    budgets = parse_budgets(sys.argv[1:])
+    all_ok = True
+    for module_name, budget_ms in budgets.items():
+        try:
+            if not report(module_name, budget_ms):
+                all_ok = False
+        except Exception as e:
+            print(f"❌ {module_name}: erro ao medir import: {e}")
+            all_ok = False
+
+    print("=" * 50)
+    if all_ok:
+        print("🎉 Todos os pontos de entrada estão dentro do orçamento!")
+    else:
+        print("⚠️ Orçamento de cold start excedido")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+Verifica o número de idas ao backend e os bytes trafegados por página
+
+Cada página (e ações como deletar um card) é executada com o AppTest do
+Streamlit contra fakes que gravam as chamadas às camadas de dados (Supabase,
+síncrono e assíncrono) e de imagens (Cloudinary). Se uma página passar do
+orçamento de round trips ou de bytes, a verificação falha: consultas
+duplicadas e padrões N+1 aparecem aqui antes de chegar à produção.
+
+Uso:
+    python check_round_trips.py
+    python check_round_trips.py --verbose     # lista todas as chamadas
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+# Sem endpoint de métricas nem exportação de traces durante a verificação
+os.environ['METRICS_PORT'] = '0'
+os.environ['TRACE_EXPORTER'] = ''
+os.environ['REALTIME_SOURCE'] = 'off'
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+# install_fakes() desliga time.sleep das páginas; a latência simulada usa o original
+_sleep = time.sleep
+
+# Conjunto fixo de dados: dois usuários, 40 cards
+USERS = {
+    'u1': 'ash@pokebinder.test',
+    'u2': 'misty@pokebinder.test',
+}
+CARD_NAMES = ['Pikachu', 'Charizard', 'Bulbasaur', 'Squirtle', 'Mew', 'Eevee', 'Gengar', 'Snorlax']
+LANGUAGES = ['Português', 'Inglês', 'Japonês']
+
+# Fonte de mudanças em memória (realtime_sync), iniciada em main()
+FEED = None
+
+# data= de cada st.download_button da última execução, por rótulo (o AppTest
+# não tem o runtime que executa o callable no clique)
+DOWNLOADS = {}
+_download_button = None
+
+# Orçamento por cenário: (round trips, bytes). Cargas completas do
+# binder_cache são paginadas até uma página vazia: +1 round trip (sem bytes)
+ROUND_TRIP_BUDGETS = {
+    'auth': (0, 0),
+    'binder': (1, 10000),
+    'add': (0, 0),
+    'edit': (1, 500),
+    'detail': (1, 500),
+    'own_public': (1, 10000),
+    'visitor_public': (2, 7000),
+    'delete': (3, 20000),
+    'export': (2, 10000),
+    'public_app_all': (2, 16000),
+    'public_app_all_warm': (1, 100),
+    'public_app_user': (4, 22000),
+    'public_app_user_warm': (0, 0),
+    'public_app_realtime': (0, 0),
+}
+
+
+def build_cards():
+    """Cards do conjunto fixo (24 do primeiro usuário, 16 do segundo)"""
+    cards = []
+    for i in range(40):
+        user_id = 'u1' if i < 24 else 'u2'
+        cards.append({
+            'id': f'card-{i:03d}',
+            'user_id': user_id,
+            'user_email': USERS[user_id],
+            'name': f"{CARD_NAMES[i % len(CARD_NAMES)]} {i}",
+            'number': f"{i + 1:03d}/182",
+            'language': LANGUAGES[i % len(LANGUAGES)],
+            'estimated_value': float(i * 3 % 50),
+            'description': '',
+            'image_url': f"https://res.cloudinary.com/demo/image/upload/pokebinder/{user_id}/{i}.png",
+            'cloudinary_public_id': f"pokebinder/{user_id}/{i}",
+            'created_at': f"2024-01-{i % 28 + 1:02d}T12:00:00",
+            'updated_at': None,
+        })
+    return cards
+
+
+def _size(data):
+    return len(json.dumps(data, default=str)) if data is not None else 0
+
+
+class Recorder:
+    """
+    Chamadas gravadas: (backend, operação, bytes)
+
+    Args:
+        latency: Segundos de espera simulada por chamada (0 = sem espera)
+    """
+
+    def __init__(self, latency=0):
+        self.calls = []
+        self.latency = latency
+        self._lock = threading.Lock()
+
+    def record(self, backend, operation, nbytes=0):
+        with self._lock:
+            self.calls.append((backend, operation, nbytes))
+
+    def wait(self):
+        """Simula a latência de rede de uma chamada síncrona"""
+        if self.latency:
+            _sleep(self.latency)
+
+    def reset(self):
+        with self._lock:
+            self.calls = []
+
+    @property
+    def round_trips(self):
+        return len(self.calls)
+
+    @property
+    def bytes(self):
+        return sum(call[2] for call in self.calls)
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """Query builder do supabase-py que lê/grava em memória e grava cada execute()"""
+
+    def __init__(self, backend, table):
+        self.backend = backend
+        self.table = table
+        self.operation = 'select'
+        self.payload = None
+        self.filters = []
+        self.negate = False
+        self.single_row = False
+        self.max_rows = None
+
+    def select(self, *columns, **kwargs):
+        return self
+
+    def insert(self, data):
+        self.operation, self.payload = 'insert', data
+        return self
+
+    def update(self, data):
+        self.operation, self.payload = 'update', data
+        return self
+
+    def delete(self):
+        self.operation = 'delete'
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: str(row.get(column)) == str(value))
+        return self
+
+    @property
+    def not_(self):
+        self.negate = True
+        return self
+
+    def is_(self, column, value):
+        negate = self.negate
+        self.negate = False
+        self.filters.append(lambda row: (row.get(column) is None) != negate)
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, count):
+        self.max_rows = count
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    def execute(self):
+        self.backend.recorder.wait()
+        rows = self.backend.tables.setdefault(self.table, [])
+        matched = [row for row in rows if all(check(row) for check in self.filters)]
+
+        if self.operation == 'insert':
+            data = [dict(self.payload, id=f"card-{uuid.uuid4().hex[:12]}")]
+            rows.extend(data)
+        elif self.operation == 'update':
+            for row in matched:
+                row.update(self.payload)
+            data = matched
+        elif self.operation == 'delete':
+            for row in matched:
+                if row in rows:
+                    rows.remove(row)
+            data = matched
+        else:
+            data = matched[:self.max_rows] if self.max_rows else matched
+
+        if self.single_row:
+            data = data[0] if data else None
+        self.backend.recorder.record('supabase', f"{self.table}.{self.operation}",
+                                     _size(self.payload) + _size(data))
+        return _Result(data)
+
+
+class _FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.email = USERS[user_id]
+
+
+class _FakeAuthResponse:
+    def __init__(self, user):
+        self.user = user
+
+
+class FakeAuth:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def sign_in_with_password(self, credentials):
+        self.backend.recorder.wait()
+        self.backend.recorder.record('supabase', 'auth.sign_in', _size(credentials))
+        return _FakeAuthResponse(_FakeUser('u1'))
+
+    def sign_up(self, credentials):
+        self.backend.recorder.record('supabase', 'auth.sign_up', _size(credentials))
+        return _FakeAuthResponse(_FakeUser('u1'))
+
+    def sign_out(self):
+        self.backend.recorder.record('supabase', 'auth.sign_out')
+
+
+class FakeSupabase:
+    """Cliente Supabase em memória"""
+
+    def __init__(self, recorder, cards):
+        self.recorder = recorder
+        self.tables = {'cards': cards}
+        self.auth = FakeAuth(self)
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+class _FakeUploader:
+    def __init__(self, recorder):
+        self.recorder = recorder
+
+    def upload(self, file, public_id=None, **kwargs):
+        self.recorder.wait()
+        data = file.getvalue() if hasattr(file, 'getvalue') else b''
+        self.recorder.record('cloudinary', 'upload', len(data))
+        return {'secure_url': f"https://res.cloudinary.com/demo/{public_id}.png", 'public_id': public_id}
+
+    def destroy(self, public_id, **kwargs):
+        self.recorder.wait()
+        self.recorder.record('cloudinary', 'destroy')
+        return {'result': 'ok'}
+
+
+class _FakeApi:
+    def __init__(self, recorder):
+        self.recorder = recorder
+
+    def resource(self, public_id, **kwargs):
+        self.recorder.record('cloudinary', 'resource')
+        return {'secure_url': '', 'width': 1, 'height': 1, 'format': 'png', 'bytes': 1, 'created_at': ''}
+
+
+class _FakeCloudinaryImage:
+    def __init__(self, public_id):
+        self.public_id = public_id
+
+    def build_url(self, **kwargs):
+        # Montar a URL é local, não conta como round trip
+        return f"https://res.cloudinary.com/demo/image/upload/{self.public_id}"
+
+
+class FakeCloudinary:
+    """SDK do Cloudinary em memória (uploader, api e CloudinaryImage)"""
+
+    def __init__(self, recorder):
+        self.uploader = _FakeUploader(recorder)
+        self.api = _FakeApi(recorder)
+        self.CloudinaryImage = _FakeCloudinaryImage
+
+
+# Filtro or= da paginação por keyset de fetch_changes: (coluna, id) depois da última linha
+_KEYSET = re.compile(r'\((\w+)\.gt\."(.*)",and\(\1\.eq\."\2",(\w+)\.gt\."(.*)"\)\)')
+
+
+def _after_keyset(row, condition):
+    column, stamp, key, last = _KEYSET.fullmatch(condition).groups()
+    value = str(row.get(column) or '')
+    return value > stamp or (value == stamp and str(row.get(key)) > last)
+
+
+def _async_filter(rows, params):
+    """Aplica os parâmetros PostgREST usados pelo app (filtros, ordem e página)"""
+    for column, condition in params.items():
+        if column in ('select', 'order', 'limit', 'offset'):
+            continue
+        if column == 'or':
+            rows = [row for row in rows if _after_keyset(row, condition)]
+        elif condition.startswith('eq.'):
+            rows = [row for row in rows if str(row.get(column)) == condition[3:]]
+        elif condition == 'not.is.null':
+            rows = [row for row in rows if row.get(column) is not None]
+        elif condition == 'is.null':
+            rows = [row for row in rows if row.get(column) is None]
+        elif condition.startswith('gte.'):
+            rows = [row for row in rows if row.get(column) and str(row[column]) >= condition[4:]]
+        elif condition.startswith('gt.'):
+            rows = [row for row in rows if row.get(column) and str(row[column]) > condition[3:]]
+    if 'order' in params:
+        for clause in reversed(params['order'].split(',')):
+            column, _, direction = clause.partition('.')
+            rows = sorted(rows, key=lambda row: str(row.get(column) or ''), reverse=direction == 'desc')
+    offset = int(params.get('offset', 0))
+    if 'limit' in params:
+        rows = rows[offset:offset + int(params['limit'])]
+    columns = params.get('select', '*')
+    if columns != '*':
+        names = columns.split(',')
+        rows = [{name: row.get(name) for name in names} for row in rows]
+    return rows
+
+
+def install_fakes(recorder, cards):
+    """Substitui as camadas de dados e de imagens pelos fakes gravadores"""
+    import config
+    import async_data
+    import binder_cache
+    import cloudinary_utils
+
+    client = FakeSupabase(recorder, cards)
+    config.get_supabase = lambda: client
+    config.warm_up_connections = lambda *args, **kwargs: None
+
+    async def fake_select(operation, table, params):
+        if recorder.latency:
+            await asyncio.sleep(recorder.latency)
+        rows = _async_filter(client.tables.get(table, []), params)
+        recorder.record('supabase', f"{table}.select", _size(rows))
+        return rows
+    async_data.select = fake_select
+
+    fake_cloudinary = FakeCloudinary(recorder)
+    cloudinary_utils.configure_cloudinary = lambda: fake_cloudinary
+    binder_cache.clear()
+
+    global _download_button
+    import streamlit
+    if _download_button is None:
+        _download_button = streamlit.download_button
+
+    def download_button(label, data, *args, **kwargs):
+        DOWNLOADS[label] = data
+        return _download_button(label, data, *args, **kwargs)
+    streamlit.download_button = download_button
+    DOWNLOADS.clear()
+
+    # As páginas esperam alguns segundos antes de redirecionar
+    time.sleep = lambda seconds: None
+
+
+def _login(at, user_id='u1'):
+    at.session_state['user'] = _FakeUser(user_id)
+
+
+def _scenarios():
+    """(nome, script, preparação, ação medida) de cada cenário"""
+    app = os.path.join(BASE_DIR, 'app.py')
+    public_app = os.path.join(BASE_DIR, 'public_app.py')
+
+    def page(name):
+        def setup(at):
+            _login(at)
+            at.session_state['current_page'] = name
+        return setup
+
+    def with_state(key, value):
+        def setup(at):
+            _login(at)
+            at.session_state[key] = value
+        return setup
+
+    def visitor(at):
+        at.query_params['user'] = USERS['u2']
+
+    def search_user(at):
+        at.session_state['search_email'] = USERS['u2']
+
+    def click_delete(at):
+        at.button(key='delete_card-000').click().run()
+
+    def click_export(at):
+        # O que o Streamlit faz no clique: chama o callable e converte o retorno em bytes
+        from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+        data = DOWNLOADS["⬇️ Baixar exportação"]()
+        body, _ = convert_data_to_bytes_and_infer_mime(
+            data, unsupported_error=TypeError(f"tipo não suportado no download: {type(data).__name__}"))
+        if body.count(b'\n') != 1 + sum(1 for card in build_cards() if card['user_email'] == USERS['u1']):
+            raise AssertionError("exportação incompleta")
+
+    def rerun(at):
+        at.run()
+
+    def publish_and_rerun(at):
+        # Card novo chega pelo listener de mudanças: a página reflete sem consultar
+        card = dict(build_cards()[-1], id='card-new', name="Mewtwo 99",
+                    created_at="2024-02-01T12:00:00", updated_at="2024-02-01T12:00:00")
+        FEED.publish('INSERT', card)
+        at.run()
+
+    return [
+        ('auth', app, lambda at: None, None),
+        ('binder', app, page("Meu Binder"), None),
+        ('add', app, page("Adicionar Card"), None),
+        ('edit', app, with_state('editing_card', 'card-001'), None),
+        ('detail', app, with_state('viewing_card', 'card-001'), None),
+        ('own_public', app, page("Minha Página Pública"), None),
+        ('visitor_public', app, visitor, None),
+        ('delete', app, page("Meu Binder"), click_delete),
+    ('export', app, page("Meu Binder"), click_export),
+        ('public_app_all', public_app, lambda at: None, None),
+        ('public_app_all_warm', public_app, lambda at: None, rerun),
+        ('public_app_user', public_app, search_user, None),
+        ('public_app_user_warm', public_app, search_user, rerun),
+        ('public_app_realtime', public_app, lambda at: None, publish_and_rerun),
+    ]
+
+
+class ActionError:
+    """Falha da ação medida (mesma interface das exceções do AppTest)"""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def run_scenario(recorder, script, setup, action):
+    """Executa o cenário e retorna a exceção da página (se houver)"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(script, default_timeout=30)
+    setup(at)
+    recorder.reset()
+    at.run()
+    if action is not None and not at.exception:
+        recorder.reset()
+        try:
+            action(at)
+        except Exception as e:
+            return [ActionError(f"{type(e).__name__}: {e}")]
+    return at.exception
+
+
+def report(name, recorder, exception, verbose):
+    """Imprime o resultado do cenário e retorna True se estiver no orçamento"""
+    max_trips, max_bytes = ROUND_TRIP_BUDGETS[name]
+    ok = not exception and recorder.round_trips <= max_trips and recorder.bytes <= max_bytes
+    status = "✅" if ok else "❌"
+    print(f"{status} {name}: {recorder.round_trips} round trips (máx {max_trips}), "
+          f"{recorder.bytes} bytes (máx {max_bytes})")
+
+    if exception:
+        print(f"     erro na página: {exception[0].message}")
+    counts = Counter(f"{backend}:{operation}" for backend, operation, _ in recorder.calls)
+    if verbose or not ok:
+        for call, count in counts.most_common():
+            print(f"     {count}x {call}")
+    return ok
+
+
+def main():
+    """Função principal"""
+    print("🎴 MyPokeBinder - Orçamento de Round Trips por Página")
+    print("=" * 50)
+
+    verbose = '--verbose' in sys.argv[1:]
+    recorder = Recorder()
+
+    # Com o listener conectado os binders ficam no intervalo longo de deltas
+    global FEED
+    import realtime_sync
+    FEED = realtime_sync.LocalChangeFeed()
+    realtime_sync.start(FEED)
+
+    all_ok = True
+    for name, script, setup, action in _scenarios():
+        # Cada cenário parte do mesmo conjunto de dados
+        install_fakes(recorder, build_cards())
+        exception = run_scenario(recorder, script, setup, action)
+        if not report(name, recorder, exception, verbose):
+            all_ok = False
+
+    print("=" * 50)
+    if all_ok:
+        print("🎉 Todas as páginas estão dentro do orçamento!")
+    else:
+        print("⚠️ Orçamento de round trips excedido")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,6 @@
 import os
+import threading
 from dotenv import load_dotenv
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
 
 # Carrega as variáveis de ambiente
 load_dotenv()
@@ -12,9 +10,30 @@ CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
 CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
 CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
 
-# Valida se as variáveis estão configuradas
-if not all([CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET]):
-    raise ValueError("""
+# O SDK é importado e configurado apenas no primeiro uso
+_configured = False
+_config_lock = threading.Lock()
+
+def configure_cloudinary():
+    """
+    Importa e configura o SDK do Cloudinary no primeiro uso
+    
+    Returns:
+        module: Módulo cloudinary já configurado (com uploader e api carregados)
+    """
+    global _configured
+    import cloudinary
+    import cloudinary.uploader
+    import cloudinary.api
+    
+    if _configured:
+        return cloudinary
+    
+    with _config_lock:
+        if not _configured:
+            # Valida se as variáveis estão configuradas
+            if not all([CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET]):
+                raise ValueError("""
     Configurações do Cloudinary não encontradas!
     
     Certifique-se de que o arquivo .env contém:
@@ -22,13 +41,16 @@ if not all([CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET]):
     CLOUDINARY_API_KEY=sua_api_key
     CLOUDINARY_API_SECRET=sua_api_secret
     """)
-
-# Configura o Cloudinary
-cloudinary.config(
-    cloud_name=CLOUDINARY_CLOUD_NAME,
-    api_key=CLOUDINARY_API_KEY,
-    api_secret=CLOUDINARY_API_SECRET
-)
+            
+            # Configura o Cloudinary
+            cloudinary.config(
+                cloud_name=CLOUDINARY_CLOUD_NAME,
+                api_key=CLOUDINARY_API_KEY,
+                api_secret=CLOUDINARY_API_SECRET
+            )
+            _configured = True
+    
+    return cloudinary
 
 # Configurações padrão para uploads
 DEFAULT_UPLOAD_CONFIG = {
@@ -36,6 +58,8 @@ DEFAULT_UPLOAD_CONFIG = {
     'resource_type': 'image',
     'allowed_formats': ['png', 'jpg', 'jpeg', 'gif', 'webp'],
     'max_file_size': 10 * 1024 * 1024,  # 10MB
+    # Orçamento de pixels (largura x altura) conferido no cabeçalho, antes de decodificar
+    'max_pixels': int(os.getenv("IMAGE_MAX_PIXELS", str(40 * 1000 * 1000))),
     'max_dimensions': (800, 800),
     'quality': 'auto',
     'fetch_format': 'auto'
@@ -59,6 +83,7 @@ def get_cloudinary_config():
 
 def validate_cloudinary_connection():
     """Valida se a conexão com o Cloudinary está funcionando"""
+    cloudinary = configure_cloudinary()
     try:
         # Tenta fazer uma operação simples
         result = cloudinary.api.ping()
@@ -1,12 +1,14 @@
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
-from PIL import Image
 import io
+import uuid
 import streamlit as st
-from datetime import datetime
-from cloudinary_config import cloudinary, DEFAULT_UPLOAD_CONFIG, IMAGE_TRANSFORMATIONS
+from cloudinary_config import configure_cloudinary, DEFAULT_UPLOAD_CONFIG, IMAGE_TRANSFORMATIONS
+from image_header import read_header
+from limiter import acquire
+from metrics import observe
+from resilience import TIMEOUTS, call
+from tracing import span, traced
 
+@traced('image.upload_flow')
 def upload_image_to_cloudinary(image_file, user_id, folder=None):
     """
     Faz upload de uma imagem para o Cloudinary
@@ -24,35 +26,57 @@ def upload_image_to_cloudinary(image_file, user_id, folder=None):
         if folder is None:
             folder = DEFAULT_UPLOAD_CONFIG['folder']
         
-        # Lê a imagem
-        image = Image.open(image_file)
+        # PIL e o SDK só são carregados quando há upload
+        from PIL import Image
+        cloudinary = configure_cloudinary()
+        
+        # Formato e dimensões pelo cabeçalho: nada é decodificado fora do orçamento
+        header = read_header(image_file)
+        max_pixels = DEFAULT_UPLOAD_CONFIG['max_pixels']
+        if header is None or header[1] * header[2] > max_pixels:
+            raise ValueError("imagem inválida ou acima do limite de pixels")
+        # Segunda barreira: o próprio PIL recusa imagens acima do orçamento
+        Image.MAX_IMAGE_PIXELS = max_pixels
         
-        # Redimensiona se necessário
         max_width, max_height = DEFAULT_UPLOAD_CONFIG['max_dimensions']
-        if image.size[0] > max_width or image.size[1] > max_height:
-            image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+        with span('image.prepare') as prepare_span:
+            # Lê a imagem (só com o decodificador do formato identificado)
+            image = Image.open(image_file, formats=[header[0].upper()])
+            if prepare_span is not None:
+                prepare_span.set_attribute('source_size', f"{image.size[0]}x{image.size[1]}")
+            
+            # Redimensiona se necessário
+            if image.size[0] > max_width or image.size[1] > max_height:
+                image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+            
+            # Converte para bytes
+            img_byte_arr = io.BytesIO()
+            image.save(img_byte_arr, format='PNG', optimize=True)
+            img_byte_arr.seek(0)
         
-        # Converte para bytes
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='PNG', optimize=True)
-        img_byte_arr.seek(0)
+        # Nome único para o arquivo (uploads no mesmo segundo não se sobrescrevem)
+        public_id = f"{folder}/{user_id}/{uuid.uuid4().hex}"
         
-        # Nome único para o arquivo
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        public_id = f"{folder}/{user_id}/{timestamp}"
+        def upload():
+            # Cada tentativa envia o arquivo desde o início
+            img_byte_arr.seek(0)
+            return cloudinary.uploader.upload(
+                img_byte_arr,
+                public_id=public_id,
+                folder=folder,
+                resource_type=DEFAULT_UPLOAD_CONFIG['resource_type'],
+                transformation=[
+                    {"width": max_width, "height": max_height, "crop": "limit"},
+                    {"quality": DEFAULT_UPLOAD_CONFIG['quality'], 
+                     "fetch_format": DEFAULT_UPLOAD_CONFIG['fetch_format']}
+                ],
+                timeout=TIMEOUTS['upload']
+            )
         
-        # Upload para o Cloudinary
-        result = cloudinary.uploader.upload(
-            img_byte_arr,
-            public_id=public_id,
-            folder=folder,
-            resource_type=DEFAULT_UPLOAD_CONFIG['resource_type'],
-            transformation=[
-                {"width": max_width, "height": max_height, "crop": "limit"},
-                {"quality": DEFAULT_UPLOAD_CONFIG['quality'], 
-                 "fetch_format": DEFAULT_UPLOAD_CONFIG['fetch_format']}
-            ]
-        )
+        # Upload para o Cloudinary (o public_id é fixo, então repetir é seguro)
+        with acquire('upload'), observe('cloudinary', 'upload_image') as obs:
+            obs.add_bytes(img_byte_arr.getbuffer().nbytes)
+            result = call('cloudinary', upload, idempotent=True)
         
         return {
             'url': result['secure_url'],
@@ -74,7 +98,10 @@ def delete_image_from_cloudinary(public_id):
         bool: True se deletado com sucesso, False caso contrário
     """
     try:
-        result = cloudinary.uploader.destroy(public_id)
+        cloudinary = configure_cloudinary()
+        with acquire('upload'), observe('cloudinary', 'delete_image'):
+            result = call('cloudinary', cloudinary.uploader.destroy, public_id,
+                          timeout=TIMEOUTS['upload'], idempotent=True)
         return result.get('result') == 'ok'
     except Exception as e:
         st.error(f"Erro ao deletar imagem: {str(e)}")
@@ -94,6 +121,7 @@ def get_optimized_image_url(public_id, width=300, height=300, crop="fill"):
         str: URL otimizada da imagem
     """
     try:
+        cloudinary = configure_cloudinary()
         return cloudinary.CloudinaryImage(public_id).build_url(
             width=width,
             height=height,
@@ -105,10 +133,15 @@ def get_optimized_image_url(public_id, width=300, height=300, crop="fill"):
         st.error(f"Erro ao gerar URL da imagem: {str(e)}")
         return None
 
+@traced('image.validate')
 def validate_image_file(image_file):
     """
     Valida arquivo de imagem
     
+    O formato vem dos magic bytes e as dimensões do cabeçalho (o tipo e o
+    tamanho informados pelo navegador não são usados); a imagem não é
+    decodificada.
+    
     Args:
         image_file: Arquivo de imagem do Streamlit
     
@@ -118,17 +151,29 @@ def validate_image_file(image_file):
     if image_file is None:
         return False, "Nenhuma imagem selecionada"
     
-    # Verificar tipo de arquivo
-    allowed_types = [f'image/{fmt}' for fmt in DEFAULT_UPLOAD_CONFIG['allowed_formats']]
-    if image_file.type not in allowed_types:
-        return False, f"Tipo de arquivo não suportado. Use: {', '.join(DEFAULT_UPLOAD_CONFIG['allowed_formats'])}"
-    
-    # Verificar tamanho
+    # Verificar tamanho (bytes realmente recebidos)
+    image_file.seek(0, io.SEEK_END)
+    size = image_file.tell()
+    image_file.seek(0)
     max_size = DEFAULT_UPLOAD_CONFIG['max_file_size']
-    if image_file.size > max_size:
+    if size > max_size:
         max_size_mb = max_size / (1024 * 1024)
         return False, f"Arquivo muito grande. Máximo {max_size_mb}MB"
     
+    # Verificar tipo de arquivo pelo conteúdo
+    allowed_formats = DEFAULT_UPLOAD_CONFIG['allowed_formats']
+    header = read_header(image_file)
+    if header is None or header[0] not in allowed_formats:
+        return False, f"Tipo de arquivo não suportado. Use: {', '.join(allowed_formats)}"
+    
+    # Verificar dimensões (uma imagem pequena em bytes pode ter bilhões de pixels)
+    _, width, height = header
+    max_pixels = DEFAULT_UPLOAD_CONFIG['max_pixels']
+    if width < 1 or height < 1:
+        return False, "Imagem sem dimensões válidas"
+    if width * height > max_pixels:
+        return False, f"Imagem muito grande ({width}x{height}). Máximo {max_pixels / 1_000_000:.0f} megapixels"
+    
     return True, "OK"
 
 def get_image_info(public_id):
@@ -142,7 +187,10 @@ def get_image_info(public_id):
         dict: Informações da imagem
     """
     try:
-        result = cloudinary.api.resource(public_id)
+        cloudinary = configure_cloudinary()
+        with acquire('admin'), observe('cloudinary', 'get_image_info'):
+            result = call('cloudinary', cloudinary.api.resource, public_id,
+                          timeout=TIMEOUTS['admin'], idempotent=True)
         return {
             'url': result['secure_url'],
             'width': result['width'],
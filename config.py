@@ -1,6 +1,7 @@
 import os
+import sys
+import threading
 from dotenv import load_dotenv
-from supabase import create_client, Client
 
 # Carrega as variáveis de ambiente
 load_dotenv()
@@ -9,8 +10,123 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-# Inicializa o cliente Supabase
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Chave de serviço (ignora RLS): apenas para jobs administrativos como o image_gc.py
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+# Pool HTTP (keep-alive) compartilhado por todos os clientes do processo
+HTTP_POOL_SIZE = int(os.getenv("SUPABASE_HTTP_POOL_SIZE", "20"))
+HTTP_TIMEOUT = float(os.getenv("SUPABASE_HTTP_TIMEOUT", "30"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_HTTP_KEEPALIVE", "60"))
+WARM_CONNECTIONS = int(os.getenv("SUPABASE_WARM_CONNECTIONS", "2"))
+
+# Chave do cliente de cada sessão no st.session_state
+SESSION_CLIENT_KEY = "_supabase_client"
+
+# Transporte e cliente do processo são criados apenas no primeiro uso
+_http_client = None
+_supabase_client = None
+_supabase_lock = threading.RLock()
+_warmed_up = False
+
+def get_http_client():
+    """Retorna o cliente httpx compartilhado (pool limitado de conexões keep-alive)"""
+    global _http_client
+    if _http_client is None:
+        with _supabase_lock:
+            if _http_client is None:
+                import httpx
+                from limiter import limited_transport
+                from metrics import record_response_bytes
+                from resilience import resilient_transport
+                _http_client = httpx.Client(
+                    timeout=HTTP_TIMEOUT,
+                    follow_redirects=True,
+                    # Soma o tamanho de cada resposta à métrica da chamada em andamento
+                    event_hooks={'response': [record_response_bytes]},
+                    # Prazo, novas tentativas e circuito por fora dos limites de
+                    # taxa/concorrência do processo (leituras e gravações)
+                    transport=resilient_transport(limited_transport(httpx.HTTPTransport(limits=httpx.Limits(
+                        max_connections=HTTP_POOL_SIZE,
+                        max_keepalive_connections=HTTP_POOL_SIZE,
+                        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+                    ))))
+                )
+    return _http_client
+
+def create_supabase_client(key=None):
+    """
+    Cria um cliente Supabase com contexto de autenticação próprio
+
+    Todos os clientes usam o mesmo pool HTTP, então criar um cliente não abre
+    conexões novas nem refaz handshake TLS. Os headers de autenticação são
+    enviados por requisição, então clientes diferentes não se misturam.
+
+    Args:
+        key: Chave da API (padrão: SUPABASE_KEY)
+    """
+    from supabase import create_client, ClientOptions
+    options = ClientOptions(httpx_client=get_http_client())
+    return create_client(SUPABASE_URL, key or SUPABASE_KEY, options)
+
+def _get_session_state():
+    """Retorna o st.session_state se estivermos dentro de uma sessão Streamlit"""
+    if "streamlit" not in sys.modules:
+        return None
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return sys.modules["streamlit"].session_state
+
+def get_supabase():
+    """
+    Retorna o cliente Supabase adequado ao contexto
+
+    Dentro de uma sessão Streamlit cada sessão tem seu próprio cliente (login e
+    logout não afetam outros usuários). Fora dela (scripts) é usado um cliente
+    único do processo. Em ambos os casos o cliente é criado no primeiro uso.
+    """
+    global _supabase_client
+    session_state = _get_session_state()
+    if session_state is not None:
+        client = session_state.get(SESSION_CLIENT_KEY)
+        if client is None:
+            client = create_supabase_client()
+            session_state[SESSION_CLIENT_KEY] = client
+        return client
+
+    if _supabase_client is None:
+        with _supabase_lock:
+            if _supabase_client is None:
+                _supabase_client = create_supabase_client()
+    return _supabase_client
+
+def _open_connection():
+    try:
+        get_http_client().get(f"{SUPABASE_URL}/rest/v1/", headers={"apikey": SUPABASE_KEY})
+    except Exception:
+        # Aquecimento é apenas otimização; falhas aparecem nas chamadas reais
+        pass
+
+def is_admin(user_email):
+    """Verifica se o email está em ADMIN_EMAILS (lista separada por vírgulas)"""
+    admins = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+    return bool(user_email) and user_email.lower() in admins
+
+def warm_up_connections(count=WARM_CONNECTIONS):
+    """Abre conexões keep-alive em segundo plano (uma vez por processo)"""
+    global _warmed_up
+    with _supabase_lock:
+        if _warmed_up or not SUPABASE_URL or count <= 0:
+            return
+        _warmed_up = True
+    for _ in range(count):
+        threading.Thread(target=_open_connection, daemon=True).start()
+
+def __getattr__(name):
+    # Compatibilidade com scripts que ainda fazem `from config import supabase`
+    if name == "supabase":
+        return get_supabase()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Configurações do Streamlit
 STREAMLIT_CONFIG = {
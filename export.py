@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Exportação de binders (CSV, JSONL, Parquet ou ZIP com as imagens)
+
+Os cards são lidos em páginas por keyset (id > último id da página anterior)
+e cada página é gravada assim que chega, então a memória usada não depende
+do tamanho da coleção. No ZIP, as imagens são baixadas em paralelo (no
+máximo EXPORT_IMAGE_CONCURRENCY ao mesmo tempo, em lotes pequenos) e
+gravadas no arquivo à medida que chegam; a planilha cards.csv é montada em
+um arquivo temporário e entra no ZIP no final (o que cresce com a coleção
+é só o diretório central do ZIP, algumas centenas de bytes por imagem).
+
+Uso:
+    python export.py --user a@b.com --format csv -o binder.csv
+    python export.py --user a@b.com --format zip -o binder.zip
+    python export.py --all --format parquet -o backup.parquet    # tabela inteira
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import posixpath
+import sys
+import tempfile
+import time
+import zipfile
+from urllib.parse import urlsplit
+
+import async_data
+from metrics import observe
+from tracing import span
+
+# Cards por consulta e downloads de imagem simultâneos
+PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+IMAGE_CONCURRENCY = int(os.getenv("EXPORT_IMAGE_CONCURRENCY", "16"))
+
+# Imagens baixadas por lote (limita a memória com imagens em trânsito)
+IMAGE_BATCH = IMAGE_CONCURRENCY * 4
+
+# Colunas exportadas, na ordem do arquivo
+EXPORT_COLUMNS = [
+    'id', 'user_email', 'name', 'number', 'number_prefix', 'set_number', 'set_total',
+    'language', 'estimated_value', 'description', 'image_url', 'created_at', 'updated_at',
+]
+
+# Extensão do arquivo e tipo MIME de cada formato
+EXPORT_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'jsonl': ('jsonl', 'application/x-ndjson'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'zip': ('zip', 'application/zip'),
+}
+
+_image_client = None
+
+
+def iter_card_pages(user_email=None, page_size=PAGE_SIZE):
+    """
+    Páginas de cards em ordem de id (um usuário ou a tabela inteira)
+
+    Termina na primeira página vazia, não na primeira página curta: o
+    PostgREST corta cada resposta no max-rows do servidor (1000 por padrão),
+    então uma página menor que page_size não indica o fim.
+
+    Yields:
+        list: Cards da página (até page_size)
+    """
+    last_id = None
+    while True:
+        page = async_data.run(async_data.fetch_cards_after(last_id, user_email, page_size))
+        if not page:
+            return
+        yield page
+        last_id = page[-1]['id']
+
+
+def export_row(card):
+    """Linha exportada de um card (apenas EXPORT_COLUMNS)"""
+    row = {column: card.get(column) for column in EXPORT_COLUMNS}
+    if row['number_prefix'] is None and row['set_number'] is None:
+        # Linhas anteriores à migration 004
+        from card_numbers import number_columns
+        row.update(number_columns(card.get('number')))
+    return row
+
+
+class CsvExport:
+    """CSV com cabeçalho, uma linha por card"""
+
+    def __init__(self, out, columns=EXPORT_COLUMNS):
+        self._text = io.TextIOWrapper(out, encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(self._text, fieldnames=columns, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._text.flush()
+        # Devolve o arquivo sem fechá-lo (quem abriu decide)
+        self._text.detach()
+
+
+class JsonlExport:
+    """Um objeto JSON por linha"""
+
+    def __init__(self, out):
+        self._out = out
+
+    def write(self, rows):
+        self._out.write(''.join(json.dumps(row, ensure_ascii=False, default=str) + '\n'
+                                for row in rows).encode('utf-8'))
+
+    def close(self):
+        self._out.flush()
+
+
+class ParquetExport:
+    """Parquet com um row group por página"""
+
+    def __init__(self, out):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._schema = pa.schema([
+            ('id', pa.string()), ('user_email', pa.string()), ('name', pa.string()),
+            ('number', pa.string()), ('number_prefix', pa.string()),
+            ('set_number', pa.int32()), ('set_total', pa.int32()), ('language', pa.string()),
+            ('estimated_value', pa.float64()), ('description', pa.string()), ('image_url', pa.string()),
+            ('created_at', pa.string()), ('updated_at', pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(out, self._schema, compression='zstd')
+
+    def write(self, rows):
+        columns = {field.name: [row.get(field.name) for row in rows] for field in self._schema}
+        columns['estimated_value'] = [None if value is None else float(value) for value in columns['estimated_value']]
+        for name in ('id', 'created_at', 'updated_at'):
+            columns[name] = [None if value is None else str(value) for value in columns[name]]
+        self._writer.write_table(self._pa.table(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def _image_name(card):
+    """Caminho da imagem dentro do ZIP (images/<id>.<ext>)"""
+    extension = posixpath.splitext(urlsplit(card.get('image_url') or '').path)[1].lower() or '.jpg'
+    return f"images/{card['id']}{extension}"
+
+
+def _get_image_client():
+    """Cliente httpx assíncrono das imagens (criado dentro do event loop de async_data)"""
+    global _image_client
+    if _image_client is None:
+        import httpx
+        from config import HTTP_TIMEOUT
+        _image_client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=IMAGE_CONCURRENCY,
+                                max_keepalive_connections=IMAGE_CONCURRENCY)
+        )
+    return _image_client
+
+
+async def download_image(url):
+    """Baixa uma imagem (bytes)"""
+    with observe('cloudinary', 'download_image') as obs:
+        response = await _get_image_client().get(url)
+        response.raise_for_status()
+        obs.add_bytes(len(response.content))
+    return response.content
+
+
+async def _download_batch(cards, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(card):
+        async with semaphore:
+            return await download_image(card['image_url'])
+
+    return await asyncio.gather(*(one(card) for card in cards), return_exceptions=True)
+
+
+class ZipExport:
+    """ZIP com cards.csv e a pasta images/ (imagens baixadas em paralelo)"""
+
+    def __init__(self, out, concurrency=IMAGE_CONCURRENCY):
+        self._zip = zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_STORED)
+        self._concurrency = concurrency
+        self._sheet_file = tempfile.TemporaryFile()
+        self._sheet = CsvExport(self._sheet_file, EXPORT_COLUMNS + ['image_file'])
+        self.missing_images = []
+
+    def write(self, rows):
+        for start in range(0, len(rows), IMAGE_BATCH):
+            batch = rows[start:start + IMAGE_BATCH]
+            with_image = [row for row in batch if row.get('image_url')]
+            images = async_data.run(_download_batch(with_image, self._concurrency))
+            for row, image in zip(with_image, images):
+                if isinstance(image, Exception):
+                    self.missing_images.append(f"{row['id']}\t{row['image_url']}\t{type(image).__name__}")
+                    continue
+                # Imagens já são comprimidas: gravadas sem recompressão
+                self._zip.writestr(_image_name(row), image)
+                row['image_file'] = _image_name(row)
+            self._sheet.write(batch)
+
+    def close(self):
+        self._sheet.close()
+        self._sheet_file.seek(0)
+        with self._zip.open('cards.csv', 'w', force_zip64=True) as entry:
+            # Cópia em blocos (a planilha pode ser grande)
+            for chunk in iter(lambda: self._sheet_file.read(1024 * 1024), b''):
+                entry.write(chunk)
+        self._sheet_file.close()
+        if self.missing_images:
+            self._zip.writestr('missing_images.txt', '\n'.join(self.missing_images) + '\n')
+        self._zip.close()
+
+
+EXPORTERS = {
+    'csv': CsvExport,
+    'jsonl': JsonlExport,
+    'parquet': ParquetExport,
+    'zip': ZipExport,
+}
+
+
+def write_export(out, export_format, user_email=None, progress=None):
+    """
+    Grava a exportação em um arquivo binário aberto
+
+    Args:
+        out: Arquivo binário de destino
+        export_format: 'csv', 'jsonl', 'parquet' ou 'zip'
+        user_email: Dono dos cards (None exporta a tabela inteira)
+        progress: Função chamada com o total de cards já gravados (opcional)
+
+    Returns:
+        int: Quantidade de cards exportados
+    """
+    with span('export.write', format=export_format, scope=user_email or 'all'):
+        exporter = EXPORTERS[export_format](out)
+        total = 0
+        try:
+            for page in iter_card_pages(user_email):
+                exporter.write([export_row(card) for card in page])
+                total += len(page)
+                if progress:
+                    progress(total)
+        finally:
+            exporter.close()
+    return total
+
+
+def export_to_tempfile(export_format, user_email=None):
+    """
+    Exportação gravada em um arquivo temporário no disco (para download)
+
+    Returns:
+        Arquivo aberto para leitura binária, no início. O arquivo sai do
+        disco logo depois de aberto (POSIX) ou quando é fechado (Windows).
+    """
+    fd, path = tempfile.mkstemp(prefix='pokebinder-export-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            write_export(out, export_format, user_email)
+        # O_TEMPORARY (só no Windows) apaga o arquivo quando ele é fechado
+        flags = os.O_RDONLY | getattr(os, 'O_BINARY', 0) | getattr(os, 'O_TEMPORARY', 0)
+        reader = os.fdopen(os.open(path, flags), 'rb')
+    except BaseException:
+        os.remove(path)
+        raise
+    if not hasattr(os, 'O_TEMPORARY'):
+        os.remove(path)
+    return reader
+
+
+def export_file_name(export_format, user_email=None):
+    """Nome sugerido do arquivo (ex.: pokebinder-ash_exemplo.com-20240101.zip)"""
+    extension = EXPORT_FORMATS[export_format][0]
+    scope = (user_email or 'todos').replace('@', '_')
+    return f"pokebinder-{scope}-{time.strftime('%Y%m%d')}.{extension}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Exporta binders para CSV, JSONL, Parquet ou ZIP com imagens")
+    scope = parser.add_mutually_exclusive_group(required=True)
+    scope.add_argument('--user', help="email do dono do binder")
+    scope.add_argument('--all', action='store_true', help="exporta a tabela inteira (backup)")
+    parser.add_argument('--format', choices=sorted(EXPORTERS), default='csv')
+    parser.add_argument('-o', '--output', help="arquivo de saída (padrão: nome gerado)")
+    return parser.parse_args()
+
+
+def main():
+    """Função principal"""
+    args = parse_args()
+    user_email = None if args.all else args.user
+    output = args.output or export_file_name(args.format, user_email)
+
+    print("🎴 MyPokeBinder - Exportação")
+    print("=" * 50)
+    started = time.perf_counter()
+
+    def progress(total):
+        print(f"\r📦 {total} cards exportados", end='', flush=True)
+
+    partial = f"{output}.partial"
+    try:
+        with open(partial, 'wb') as out:
+            total = write_export(out, args.format, user_email, progress)
+        os.replace(partial, output)
+    except Exception as e:
+        print(f"\n❌ Erro na exportação: {e}")
+        if os.path.exists(partial):
+            os.remove(partial)
+        return False
+
+    print(f"\n✅ {total} cards em {time.perf_counter() - started:.1f}s → {os.path.abspath(output)}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
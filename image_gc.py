@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Coleta de imagens órfãs no Cloudinary
+
+Primeiro é consumida a fila image_deletions (migration 005): fotos
+substituídas em update_card e fotos de cards deletados, enfileiradas por
+trigger na mesma transação da troca. Cada lote de até 100 é conferido contra
+os cards ativos e deletado com uma chamada só. A fila é lida com a chave de
+serviço (SUPABASE_SERVICE_ROLE_KEY), já que o app não tem acesso a ela.
+
+Depois, a reconciliação completa compara os assets da pasta pokebinder/ com os cloudinary_public_id dos
+cards ativos e remove a diferença: imagens substituídas em update_card,
+imagens de cards deletados cujo destroy falhou e uploads cujo insert do
+card não chegou a acontecer (o que escapou da fila).
+
+    1. lista a pasta pela Admin API (páginas de 500, por next_cursor)
+    2. lê os public_id dos cards ativos em páginas por keyset
+    3. guarda os dois conjuntos em um SQLite em disco (a memória não
+       depende do tamanho do acervo) e calcula a diferença com NOT EXISTS
+    4. deleta as órfãs em lotes de 100 (máximo de delete_resources)
+
+A pasta é listada antes dos cards: um upload feito durante a execução ou
+já tem o card gravado quando os cards são lidos, ou é mais novo que a
+carência (IMAGE_GC_GRACE_HOURS) e fica para a próxima rodada.
+
+A Admin API tem cota por hora. Cada resposta informa o saldo; quando ele
+chega a IMAGE_GC_RATE_LIMIT_RESERVE a coleta espera a renovação da cota
+(o saldo restante fica para o app), e respostas 420/429 são repetidas
+depois da espera.
+
+Uso:
+    python image_gc.py --dry-run                     # apenas o relatório
+    python image_gc.py --dry-run --report orfas.tsv  # relatório com a lista completa
+    python image_gc.py                               # fila + reconciliação completa
+    python image_gc.py --queue-only                  # só a fila (barato, pode rodar a cada poucos minutos)
+"""
+
+import argparse
+import calendar
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import async_data
+from cloudinary_config import configure_cloudinary, DEFAULT_UPLOAD_CONFIG
+from config import create_supabase_client, SUPABASE_SERVICE_ROLE_KEY
+from limiter import acquire
+from metrics import observe
+from tracing import span
+
+# Uploads mais novos que isso nunca são considerados órfãos (horas)
+GRACE_HOURS = float(os.getenv("IMAGE_GC_GRACE_HOURS", "24"))
+
+# Fotos substituídas há menos que isso continuam na fila (páginas e snapshots
+# em cache ainda podem mostrá-las) (minutos)
+QUEUE_DELAY_MINUTES = float(os.getenv("IMAGE_GC_QUEUE_DELAY_MINUTES", "10"))
+
+# Chamadas da Admin API deixadas para o app antes de esperar a renovação da cota
+RATE_LIMIT_RESERVE = int(os.getenv("IMAGE_GC_RATE_LIMIT_RESERVE", "50"))
+
+# Espera quando a API não informa a renovação da cota e tentativas após 420/429
+RATE_LIMIT_BACKOFF = 60
+RATE_LIMIT_RETRIES = 5
+
+# Limites da Admin API: assets por página da listagem e ids por delete_resources
+LIST_PAGE_SIZE = 500
+DELETE_BATCH = 100
+
+# Cards lidos por consulta
+CARD_PAGE_SIZE = 1000
+
+# Acima dessa fração de órfãs a coleta recusa deletar sem --force
+# (ex.: chave do Supabase sem acesso aos cards faria tudo parecer órfão)
+MAX_ORPHAN_RATIO = 0.5
+
+SAMPLE_SIZE = 10
+
+
+class AdminApi:
+    """Chamadas da Admin API respeitando a cota informada pelo Cloudinary"""
+
+    def __init__(self, cloudinary, reserve=RATE_LIMIT_RESERVE, sleep=time.sleep):
+        self.api = cloudinary.api
+        self.reserve = reserve
+        self.sleep = sleep
+        self.remaining = None
+        self.reset_at = None
+
+    def _wait_reset(self, reason):
+        wait = RATE_LIMIT_BACKOFF
+        if self.reset_at is not None:
+            wait = max(calendar.timegm(self.reset_at) - time.time(), 1)
+        print(f"⏳ {reason}: aguardando {wait:.0f}s pela renovação da cota da Admin API")
+        self.sleep(wait)
+        self.reset_at = None
+
+    def call(self, operation, *args, **kwargs):
+        from cloudinary.exceptions import RateLimited
+
+        if self.remaining is not None and self.remaining <= self.reserve:
+            self._wait_reset(f"saldo de {self.remaining} chamadas")
+            self.remaining = None
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                with acquire('admin'), observe('cloudinary', operation):
+                    result = getattr(self.api, operation)(*args, **kwargs)
+                break
+            except RateLimited:
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                self._wait_reset("limite atingido")
+
+        self.remaining = getattr(result, 'rate_limit_remaining', None)
+        self.reset_at = getattr(result, 'rate_limit_reset_at', None)
+        return result
+
+
+class ImageSets:
+    """Assets do Cloudinary e public_id referenciados, em um SQLite em disco"""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS assets (
+                public_id TEXT PRIMARY KEY, bytes INTEGER, created_at TEXT
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS referenced (public_id TEXT PRIMARY KEY) WITHOUT ROWID;
+            DELETE FROM assets;
+            DELETE FROM referenced;
+        """)
+
+    def add_assets(self, resources):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO assets VALUES (?, ?, ?)",
+            ((r['public_id'], r.get('bytes') or 0, r.get('created_at') or '') for r in resources)
+        )
+
+    def add_referenced(self, public_ids):
+        self.db.executemany("INSERT OR IGNORE INTO referenced VALUES (?)", ((p,) for p in public_ids))
+
+    def count(self, table):
+        return self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    _ORPHANS = """
+        FROM assets a
+        WHERE NOT EXISTS (SELECT 1 FROM referenced r WHERE r.public_id = a.public_id)
+    """
+
+    def orphan_totals(self, cutoff):
+        """(órfãs, bytes das órfãs, órfãs ainda na carência)"""
+        return self.db.execute(
+            "SELECT COUNT(*) FILTER (WHERE a.created_at < :cutoff),"
+            " COALESCE(SUM(a.bytes) FILTER (WHERE a.created_at < :cutoff), 0),"
+            " COUNT(*) FILTER (WHERE a.created_at >= :cutoff)" + self._ORPHANS,
+            {'cutoff': cutoff}
+        ).fetchone()
+
+    def orphans(self, cutoff):
+        """Órfãs fora da carência, em ordem de public_id: (public_id, bytes, created_at)"""
+        return self.db.execute(
+            "SELECT a.public_id, a.bytes, a.created_at" + self._ORPHANS +
+            " AND a.created_at < ? ORDER BY a.public_id", (cutoff,)
+        )
+
+    def close(self):
+        self.db.close()
+
+
+def list_assets(admin, sets, prefix):
+    """Lista a pasta do Cloudinary para o conjunto de assets"""
+    cursor = None
+    while True:
+        params = {'type': 'upload', 'prefix': prefix, 'max_results': LIST_PAGE_SIZE}
+        if cursor:
+            params['next_cursor'] = cursor
+        page = admin.call('resources', **params)
+        sets.add_assets(page.get('resources', []))
+        cursor = page.get('next_cursor')
+        if not cursor:
+            return
+
+
+def list_referenced(sets):
+    """
+    Lê os public_id dos cards ativos para o conjunto de referenciados
+
+    Termina só na página vazia: uma página curta pode ser o corte de max-rows
+    do PostgREST, e um referenciado que faltar aqui vira órfã deletada.
+    """
+    last_id = None
+    while True:
+        page = async_data.run(async_data.fetch_cards_after(
+            last_id, limit=CARD_PAGE_SIZE, columns='id,cloudinary_public_id'))
+        if not page:
+            return
+        sets.add_referenced(card['cloudinary_public_id'] for card in page if card.get('cloudinary_public_id'))
+        last_id = page[-1]['id']
+
+
+def delete_batch(admin, public_ids):
+    """
+    Deleta até DELETE_BATCH imagens com uma chamada
+
+    Returns:
+        tuple: (deletadas, já inexistentes, ids que falharam)
+    """
+    result = admin.call('delete_resources', public_ids, type='upload')
+    statuses = result.get('deleted', {})
+    deleted = [public_id for public_id in public_ids if statuses.get(public_id) == 'deleted']
+    not_found = [public_id for public_id in public_ids if statuses.get(public_id) == 'not_found']
+    failed = [public_id for public_id in public_ids if statuses.get(public_id) not in ('deleted', 'not_found')]
+    return deleted, not_found, failed
+
+
+def delete_orphans(admin, rows):
+    """
+    Deleta as órfãs em lotes de DELETE_BATCH
+
+    Returns:
+        tuple: (deletadas, já inexistentes, ids que falharam)
+    """
+    deleted = not_found = 0
+    failed = []
+    while True:
+        batch = [row[0] for row in rows.fetchmany(DELETE_BATCH)]
+        if not batch:
+            return deleted, not_found, failed
+        batch_deleted, batch_not_found, batch_failed = delete_batch(admin, batch)
+        deleted += len(batch_deleted)
+        not_found += len(batch_not_found)
+        failed.extend(batch_failed)
+        print(f"\r🗑️  {deleted} imagens deletadas", end='', flush=True)
+
+
+def drain_queue(admin, client, dry_run=False, delay_minutes=QUEUE_DELAY_MINUTES):
+    """
+    Consome a fila image_deletions em lotes de DELETE_BATCH
+
+    Imagens que voltaram a ser usadas por um card ativo saem da fila sem
+    serem deletadas; as que falharam ficam para a próxima execução.
+
+    Returns:
+        tuple: (deletadas, ainda em uso, ids que falharam)
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(minutes=delay_minutes)).isoformat()
+    deleted = in_use = 0
+    failed = []
+    last_id = None
+    while True:
+        query = client.table('image_deletions').select('public_id').lte('queued_at', cutoff)
+        if last_id is not None:
+            query = query.gt('public_id', last_id)
+        with observe('supabase', 'image_gc_queue') as obs:
+            rows = query.order('public_id').limit(DELETE_BATCH).execute().data
+            obs.set_result(rows)
+        batch = [row['public_id'] for row in rows]
+        if not batch:
+            break
+        last_id = batch[-1]
+
+        referenced = async_data.run(async_data.fetch_referenced_public_ids(batch))
+        unused = [public_id for public_id in batch if public_id not in referenced]
+        in_use += len(referenced)
+        if dry_run:
+            deleted += len(unused)
+        else:
+            done = list(referenced)
+            if unused:
+                batch_deleted, batch_not_found, batch_failed = delete_batch(admin, unused)
+                deleted += len(batch_deleted)
+                done += batch_deleted + batch_not_found
+                failed.extend(batch_failed)
+            if done:
+                with observe('supabase', 'image_gc_dequeue'):
+                    client.table('image_deletions').delete().in_('public_id', done).execute()
+
+    verb = "seriam deletadas" if dry_run else "deletadas"
+    print(f"📬 Fila: {deleted} {verb}, {in_use} ainda em uso")
+    if failed:
+        print(f"⚠️ {len(failed)} da fila não foram deletadas (ex.: {', '.join(failed[:3])})")
+    return deleted, in_use, failed
+
+
+def write_report(path, rows):
+    """Grava a lista de órfãs em TSV (public_id, bytes, created_at)"""
+    with open(path, 'w', encoding='utf-8') as report:
+        report.write("public_id\tbytes\tcreated_at\n")
+        for public_id, size, created_at in rows:
+            report.write(f"{public_id}\t{size}\t{created_at}\n")
+
+
+def collect(admin, dry_run=False, report=None, state=None, grace_hours=GRACE_HOURS, force=False):
+    """
+    Reconciliação completa: assets da pasta menos public_id dos cards ativos
+
+    Args:
+        admin: AdminApi
+        dry_run: Apenas calcula e imprime o relatório
+        report: Arquivo TSV com a lista completa de órfãs (opcional)
+        state: Arquivo SQLite dos conjuntos (padrão: temporário)
+        grace_hours: Carência para uploads recentes
+        force: Deleta mesmo acima de MAX_ORPHAN_RATIO
+
+    Returns:
+        bool: True se a coleta terminou sem falhas
+    """
+    prefix = f"{DEFAULT_UPLOAD_CONFIG['folder']}/"
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=grace_hours)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    with tempfile.TemporaryDirectory() as workdir:
+        sets = ImageSets(state or os.path.join(workdir, 'image_gc.sqlite3'))
+        try:
+            with span('image_gc.list'):
+                list_assets(admin, sets, prefix)
+                list_referenced(sets)
+            sets.db.commit()
+
+            assets = sets.count('assets')
+            orphans, orphan_bytes, recent = sets.orphan_totals(cutoff)
+            print(f"☁️  {assets} imagens em {prefix}")
+            print(f"🎴 {sets.count('referenced')} imagens referenciadas por cards ativos")
+            print(f"🧹 {orphans} órfãs ({orphan_bytes / 1024 / 1024:.1f} MB)"
+                  f", {recent} recentes mantidas pela carência de {grace_hours:g}h")
+            for public_id, size, created_at in sets.orphans(cutoff).fetchmany(SAMPLE_SIZE):
+                print(f"   {public_id}  {size / 1024:.0f} KB  {created_at}")
+            if orphans > SAMPLE_SIZE:
+                print(f"   ... e mais {orphans - SAMPLE_SIZE}")
+            if report:
+                write_report(report, sets.orphans(cutoff))
+                print(f"📝 Lista completa em {os.path.abspath(report)}")
+
+            if dry_run or not orphans:
+                return True
+            if orphans > assets * MAX_ORPHAN_RATIO and not force:
+                print(f"❌ Mais de {MAX_ORPHAN_RATIO:.0%} das imagens pareceram órfãs; "
+                      "confira o acesso à tabela cards ou use --force")
+                return False
+
+            with span('image_gc.delete', orphans=orphans):
+                deleted, not_found, failed = delete_orphans(admin, sets.orphans(cutoff))
+            print(f"\n✅ {deleted} deletadas, {not_found} já não existiam")
+            if failed:
+                print(f"⚠️ {len(failed)} não foram deletadas (ex.: {', '.join(failed[:3])})")
+            return not failed
+        finally:
+            sets.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Remove do Cloudinary as imagens que nenhum card usa")
+    parser.add_argument('--dry-run', action='store_true', help="apenas mostra o que seria deletado")
+    parser.add_argument('--queue-only', action='store_true', help="consome só a fila image_deletions")
+    parser.add_argument('--report', help="grava a lista de órfãs em TSV")
+    parser.add_argument('--state', help="arquivo SQLite dos conjuntos (mantido para inspeção)")
+    parser.add_argument('--grace-hours', type=float, default=GRACE_HOURS,
+                        help=f"carência para uploads recentes (padrão: {GRACE_HOURS:g})")
+    parser.add_argument('--force', action='store_true',
+                        help=f"deleta mesmo com mais de {MAX_ORPHAN_RATIO:.0%} de órfãs")
+    return parser.parse_args()
+
+
+def main():
+    """Função principal"""
+    args = parse_args()
+
+    print("🎴 MyPokeBinder - Coleta de imagens órfãs")
+    print("=" * 50)
+    if args.dry_run:
+        print("🔍 Dry run: nada será deletado")
+
+    try:
+        admin = AdminApi(configure_cloudinary())
+        ok = True
+        if SUPABASE_SERVICE_ROLE_KEY:
+            with span('image_gc.queue'):
+                _, _, failed = drain_queue(admin, create_supabase_client(SUPABASE_SERVICE_ROLE_KEY), args.dry_run)
+            ok = not failed
+        else:
+            print("⚠️ SUPABASE_SERVICE_ROLE_KEY não configurada: fila image_deletions ignorada")
+        if args.queue_only:
+            return ok
+        return collect(admin, args.dry_run, args.report, args.state, args.grace_hours, args.force) and ok
+    except Exception as e:
+        print(f"\n❌ Erro na coleta: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
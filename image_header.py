@@ -0,0 +1,125 @@
+"""
+Formato e dimensões de uma imagem lidos só do cabeçalho (sem decodificar)
+
+O formato vem dos magic bytes do arquivo, não do tipo informado pelo
+navegador, e as dimensões vêm do cabeçalho de cada formato:
+
+    PNG   chunk IHDR (sempre o primeiro, logo após a assinatura)
+    JPEG  primeiro marcador SOFn (os segmentos antes dele são pulados com seek)
+    GIF   logical screen descriptor
+    WEBP  chunk VP8 / VP8L / VP8X do contêiner RIFF
+
+Lê no máximo algumas dezenas de bytes (mais os saltos entre segmentos do
+JPEG), então custa microssegundos e nada de memória mesmo para um PNG de
+10 MB que descomprime para gigabytes. Puro Python: não carrega o PIL.
+"""
+
+import struct
+
+# Marcadores SOFn do JPEG (C4, C8 e CC são DHT, JPG e DAC, não frames)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Segmentos do JPEG percorridos antes de desistir de achar o SOFn
+_JPEG_MAX_SEGMENTS = 256
+
+
+def _png(file, head):
+    if head[12:16] != b'IHDR':
+        return None
+    width, height = struct.unpack('>II', head[16:24])
+    return 'png', width, height
+
+
+def _gif(file, head):
+    width, height = struct.unpack('<HH', head[6:10])
+    return 'gif', width, height
+
+
+def _webp(file, head):
+    if len(head) < 30:
+        return None
+    chunk = head[12:16]
+    data = head[20:30]
+    if chunk == b'VP8 ' and data[3:6] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', data[6:10])
+        return 'webp', width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and data[:1] == b'\x2f':
+        bits = struct.unpack('<I', data[1:5])[0]
+        return 'webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        width = int.from_bytes(data[4:7], 'little') + 1
+        height = int.from_bytes(data[7:10], 'little') + 1
+        return 'webp', width, height
+    return None
+
+
+def _jpeg(file, head):
+    file.seek(2)
+    for _ in range(_JPEG_MAX_SEGMENTS):
+        byte = file.read(1)
+        if byte != b'\xff':
+            return None
+        marker = file.read(1)
+        while marker == b'\xff':
+            # Bytes de preenchimento entre marcadores
+            marker = file.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+        if code == 0x01 or 0xD0 <= code <= 0xD8:
+            # Marcadores sem segmento
+            continue
+        if code in (0xD9, 0xDA):
+            # Fim da imagem ou início dos dados sem nenhum frame: inválido
+            return None
+        size = file.read(2)
+        if len(size) < 2:
+            return None
+        length = struct.unpack('>H', size)[0]
+        if code in _JPEG_SOF:
+            frame = file.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack('>HH', frame[1:5])
+            return 'jpeg', width, height
+        if length < 2:
+            return None
+        file.seek(length - 2, 1)
+    return None
+
+
+# Assinatura no início do arquivo -> leitor do cabeçalho
+_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', _png),
+    (b'\xff\xd8\xff', _jpeg),
+    (b'GIF87a', _gif),
+    (b'GIF89a', _gif),
+]
+
+
+def read_header(file):
+    """
+    Identifica o formato e as dimensões de uma imagem
+
+    Args:
+        file: Arquivo binário com seek (ex.: UploadedFile do Streamlit)
+
+    Returns:
+        tuple: (formato, largura, altura), com formato 'png', 'jpeg', 'gif'
+               ou 'webp'; None se não for uma imagem reconhecida. O arquivo
+               volta para o início.
+    """
+    try:
+        file.seek(0)
+        head = file.read(32)
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return _webp(file, head)
+        for signature, reader in _SIGNATURES:
+            if head.startswith(signature):
+                return reader(file, head)
+        return None
+    except (OSError, struct.error):
+        # Cabeçalho truncado
+        return None
+    finally:
+        file.seek(0)
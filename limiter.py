@@ -0,0 +1,243 @@
+"""
+Limites de concorrência e de taxa das chamadas externas (por processo)
+
+Cada classe de chamada tem um token bucket (requisições por segundo, com
+rajada de até um segundo) e um semáforo (chamadas simultâneas):
+
+    read     leituras do Supabase (GET)
+    write    gravações do Supabase (POST/PATCH/DELETE, inclusive login)
+    upload   uploads e destroy do Cloudinary
+    admin    Admin API do Cloudinary (cota por hora)
+
+Quem chega com o limite saturado espera na fila até o prazo da classe. Se
+a fila já está cheia, ou se o prazo não seria cumprido (o próximo token só
+sai depois dele, ou nenhuma vaga abre a tempo), a chamada é descartada na
+hora com Overloaded, em vez de somar mais uma requisição ao provedor que já
+está devolvendo 429 ou estourando timeout.
+
+As chamadas do Supabase passam pelo limitador no transporte httpx
+(limited_transport), então nenhum call site precisa mudar; as do SDK do
+Cloudinary usam acquire() diretamente. Código assíncrono usa acquire_async(),
+que não bloqueia o event loop.
+
+Configuração por classe (0 desliga o limite de taxa):
+    LIMIT_<CLASSE>_RATE          requisições por segundo
+    LIMIT_<CLASSE>_CONCURRENCY   chamadas simultâneas
+    LIMIT_<CLASSE>_TIMEOUT       espera máxima na fila (segundos)
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from metrics import counter, gauge, histogram
+
+# Chamadas aguardando na fila por vaga simultânea (múltiplo da concorrência)
+QUEUE_FACTOR = 4
+
+# Intervalo entre tentativas de quem espera no event loop (segundos)
+ASYNC_POLL_INTERVAL = 0.005
+
+QUEUE_DEPTH = gauge('pokebinder_limiter_queue_depth', 'Chamadas aguardando vaga no limitador')
+IN_FLIGHT = gauge('pokebinder_limiter_in_flight', 'Chamadas externas em andamento')
+WAIT_SECONDS = histogram('pokebinder_limiter_wait_seconds', 'Espera na fila do limitador')
+SHED = counter('pokebinder_limiter_shed_total', 'Chamadas descartadas pelo limitador')
+
+
+class Overloaded(Exception):
+    """Chamada descartada: o limite da classe está saturado"""
+
+    def __init__(self, kind, reason):
+        super().__init__(f"Serviço sobrecarregado ({kind}): tente novamente em instantes")
+        self.kind = kind
+        self.reason = reason
+
+
+class Limiter:
+    """Token bucket + semáforo com fila limitada e prazo de espera"""
+
+    def __init__(self, kind, rate, concurrency, timeout, max_queue=None):
+        self.kind = kind
+        self.rate = rate
+        self.burst = max(rate, 1)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_queue = concurrency * QUEUE_FACTOR if max_queue is None else max_queue
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.waiting = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+
+    def _shed(self, reason):
+        SHED.inc(kind=self.kind, reason=reason)
+        raise Overloaded(self.kind, reason)
+
+    def _admit(self, deadline):
+        """Entra na fila e reserva um token; retorna quanto esperar pelo token"""
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self._shed('queue_full')
+            wait = 0.0
+            if self.rate:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens < 1:
+                    wait = (1 - self.tokens) / self.rate
+                    if now + wait > deadline:
+                        self._shed('rate')
+                self.tokens -= 1
+            self.waiting += 1
+            QUEUE_DEPTH.set(self.waiting, kind=self.kind)
+        return wait
+
+    def _take_slot(self):
+        """Ocupa uma vaga se houver (chamado com o lock)"""
+        if self.in_flight >= self.concurrency:
+            return False
+        self.in_flight += 1
+        IN_FLIGHT.set(self.in_flight, kind=self.kind)
+        return True
+
+    def _leave_queue(self, started):
+        with self._lock:
+            self.waiting -= 1
+            QUEUE_DEPTH.set(self.waiting, kind=self.kind)
+        WAIT_SECONDS.observe(time.monotonic() - started, kind=self.kind)
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+            IN_FLIGHT.set(self.in_flight, kind=self.kind)
+            self._slot_freed.notify()
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """Reserva uma vaga (bloqueia a thread até o prazo)"""
+        started = time.monotonic()
+        deadline = started + (self.timeout if timeout is None else timeout)
+        wait = self._admit(deadline)
+        try:
+            if wait:
+                time.sleep(wait)
+            with self._lock:
+                while not self._take_slot():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._shed('timeout')
+                    self._slot_freed.wait(remaining)
+        finally:
+            self._leave_queue(started)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def acquire_async(self, timeout=None):
+        """Reserva uma vaga sem bloquear o event loop"""
+        started = time.monotonic()
+        deadline = started + (self.timeout if timeout is None else timeout)
+        wait = self._admit(deadline)
+        try:
+            if wait:
+                await asyncio.sleep(wait)
+            while True:
+                with self._lock:
+                    if self._take_slot():
+                        break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._shed('timeout')
+                await asyncio.sleep(min(remaining, ASYNC_POLL_INTERVAL))
+        finally:
+            self._leave_queue(started)
+        try:
+            yield
+        finally:
+            self._release()
+
+
+def _from_env(kind, rate, concurrency, timeout):
+    prefix = f"LIMIT_{kind.upper()}"
+    return Limiter(
+        kind,
+        rate=float(os.getenv(f"{prefix}_RATE", str(rate))),
+        concurrency=int(os.getenv(f"{prefix}_CONCURRENCY", str(concurrency))),
+        timeout=float(os.getenv(f"{prefix}_TIMEOUT", str(timeout))),
+    )
+
+
+LIMITS = {
+    'read': _from_env('read', rate=50, concurrency=20, timeout=5),
+    'write': _from_env('write', rate=20, concurrency=10, timeout=10),
+    'upload': _from_env('upload', rate=5, concurrency=4, timeout=30),
+    'admin': _from_env('admin', rate=2, concurrency=2, timeout=10),
+}
+
+
+def acquire(kind, timeout=None):
+    """
+    Reserva uma vaga da classe (context manager síncrono)
+
+    Uso:
+        with acquire('upload'):
+            cloudinary.uploader.upload(...)
+
+    Raises:
+        Overloaded: fila cheia ou prazo esgotado
+    """
+    return LIMITS[kind].acquire(timeout)
+
+
+def acquire_async(kind, timeout=None):
+    """Versão assíncrona de acquire() (async with)"""
+    return LIMITS[kind].acquire_async(timeout)
+
+
+def request_kind(request):
+    """Classe de uma requisição HTTP ao Supabase"""
+    return 'read' if request.method in ('GET', 'HEAD') else 'write'
+
+
+@functools.cache
+def _transport_classes():
+    import httpx
+
+    class LimitedTransport(httpx.BaseTransport):
+        def __init__(self, transport):
+            self._transport = transport
+
+        def handle_request(self, request):
+            with acquire(request_kind(request)):
+                return self._transport.handle_request(request)
+
+        def close(self):
+            self._transport.close()
+
+    class AsyncLimitedTransport(httpx.AsyncBaseTransport):
+        def __init__(self, transport):
+            self._transport = transport
+
+        async def handle_async_request(self, request):
+            async with acquire_async(request_kind(request)):
+                return await self._transport.handle_async_request(request)
+
+        async def aclose(self):
+            await self._transport.aclose()
+
+    return LimitedTransport, AsyncLimitedTransport
+
+
+def limited_transport(transport):
+    """Envolve um transporte httpx (síncrono ou assíncrono) com os limites read/write"""
+    import httpx
+    sync_class, async_class = _transport_classes()
+    if isinstance(transport, httpx.AsyncBaseTransport):
+        return async_class(transport)
+    return sync_class(transport)
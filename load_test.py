@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Teste de carga com sessões simultâneas do app.py e do public_app.py
+
+Cada sessão é um AppTest do Streamlit percorrendo uma jornada roteirizada
+(navegar por todas as coleções, buscar um usuário, filtrar, abrir um card,
+adicionar e deletar cards). O Supabase e o Cloudinary são substituídos pelos
+fakes em memória de check_round_trips.py, com uma latência simulada por
+chamada, então o teste mede o custo do lado Python sem tocar em serviços reais.
+
+Relatório:
+    - p50/p95/p99 da latência de cada execução (rerun) por jornada
+    - throughput total (reruns por segundo)
+    - memória por sessão (tracemalloc, em uma fase separada)
+
+Termina com código 1 se alguma jornada registrar erro ou não medir nenhum
+rerun (o relatório sozinho esconderia uma jornada quebrada).
+
+Uso:
+    python load_test.py
+    python load_test.py --sessions 20 --duration 60 --latency 80
+    python load_test.py --journeys public_browse,visitor
+"""
+
+import argparse
+import gc
+import io
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from itertools import cycle
+
+from check_round_trips import BASE_DIR, USERS, Recorder, build_cards, install_fakes
+
+APP = os.path.join(BASE_DIR, 'app.py')
+PUBLIC_APP = os.path.join(BASE_DIR, 'public_app.py')
+
+# Sessões usadas na fase de medição de memória (por jornada)
+MEMORY_SESSIONS = 5
+
+
+def _share_test_runtime():
+    """
+    Permite vários AppTest rodando ao mesmo tempo
+
+    O AppTest instala um runtime falso global no início de cada execução e o
+    remove no fim; com sessões simultâneas, uma execução terminando removeria o
+    runtime de outra. Aqui Runtime.instance() passa a cair no último runtime
+    visto quando o global já foi removido.
+    """
+    from streamlit.runtime import Runtime
+    shared = {}
+
+    def instance(cls):
+        current = cls._instance
+        if current is not None:
+            shared['runtime'] = current
+            return current
+        if 'runtime' in shared:
+            return shared['runtime']
+        raise RuntimeError("Runtime hasn't been created!")
+
+    def exists(cls):
+        return cls._instance is not None or 'runtime' in shared
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+
+
+def _use_plain_search_input():
+    """
+    Troca o campo de busca do grid (st_keyup) pelo st.text_input
+
+    O AppTest não enxerga componentes customizados, então as jornadas não
+    conseguiriam digitar no st_keyup; o st.text_input tem a mesma chave e
+    dispara o mesmo rerun a cada busca.
+    """
+    import streamlit as st
+    import card_grid
+    card_grid.search_input = lambda label, key: st.text_input(label, key=key)
+
+
+def _sample_png():
+    """Imagem PNG pequena para o formulário de cadastro"""
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (600, 840), (255, 204, 0)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _button(at, label):
+    return next(button for button in at.button if button.label == label)
+
+
+def _text_input(at, label):
+    return next(widget for widget in at.text_input if widget.label == label)
+
+
+class Session:
+    """Uma sessão de navegador: um AppTest e os tempos de cada execução"""
+
+    def __init__(self, script):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(script, default_timeout=60)
+        self.latencies = []
+
+    def step(self, action):
+        """Executa uma interação (que dispara um rerun) e mede o tempo"""
+        started = time.perf_counter()
+        action()
+        self.latencies.append(time.perf_counter() - started)
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+
+
+def journey_public_browse(session_id, png):
+    """public_app: todas as coleções, filtro, ordenação, busca de um usuário"""
+    session = Session(PUBLIC_APP)
+    at = session.at
+    session.step(at.run)
+    session.step(lambda: at.text_input(key='all_filter_name').input('pika').run())
+    session.step(lambda: at.selectbox(key='all_sort').select('Valor').run())
+    session.step(lambda: at.text_input(key='all_filter_name').input('').run())
+    session.step(lambda: _button(at, f"👤 {USERS['u2']}").click().run())
+    session.step(lambda: at.text_input(key='user_filter_name').input('mew').run())
+    session.step(lambda: _button(at, "🔄 Limpar Filtros").click().run())
+    return session
+
+
+def journey_visitor(session_id, png):
+    """app.py?user=: página pública de um usuário, filtro e detalhe de um card"""
+    session = Session(APP)
+    at = session.at
+    at.query_params['user'] = USERS['u2']
+    session.step(at.run)
+    session.step(lambda: at.text_input(key='view_filter_name').input('char').run())
+    first_card = next(button for button in at.button if (button.key or '').startswith('view_public_'))
+    session.step(lambda: first_card.click().run())
+    session.step(lambda: _button(at, "Voltar").click().run())
+    return session
+
+
+def journey_owner(session_id, png):
+    """app.py logado: login, binder, detalhe, cadastro e exclusão de um card"""
+    session = Session(APP)
+    at = session.at
+    session.step(at.run)
+    at.text_input(key='login_email').input(USERS['u1'])
+    at.text_input(key='login_password').input('senha')
+    session.step(lambda: _button(at, "Entrar").click().run())
+    session.step(lambda: at.button(key='view_card-001').click().run())
+    session.step(lambda: _button(at, "Voltar").click().run())
+
+    # Cadastro de um card com nome único desta sessão
+    card_name = f"Carga {session_id}"
+    session.step(lambda: _button(at, "➕ Adicionar Card").click().run())
+    _text_input(at, "Nome do Card").input(card_name)
+    at.text_input(key='card_num_1').input('25')
+    at.text_input(key='card_num_2').input('102')
+    at.file_uploader[0].set_value(("card.png", png, "image/png"))
+    session.step(lambda: _button(at, "Cadastrar Card").click().run())
+
+    # Volta ao binder já filtrado pelo card novo e o deleta
+    session.step(lambda: at.text_input(key='binder_filter_name').input(card_name).run())
+    delete = next(button for button in at.button if (button.key or '').startswith('delete_card-')
+                  and button.key != 'delete_card-001')
+    session.step(lambda: delete.click().run())
+    return session
+
+
+JOURNEYS = {
+    'public_browse': journey_public_browse,
+    'visitor': journey_visitor,
+    'owner': journey_owner,
+}
+
+
+def percentile(values, fraction):
+    """Percentil por posição mais próxima (values ordenados)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def run_load(journeys, sessions, duration, png):
+    """
+    Dispara sessões simultâneas até o fim do prazo
+
+    Returns:
+        tuple: (latências por jornada, erros por jornada, tempo total em segundos)
+    """
+    latencies = {name: [] for name in journeys}
+    errors = {name: [] for name in journeys}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    counter = iter(range(10 ** 9))
+
+    def worker(journey_names):
+        for name in cycle(journey_names):
+            if time.perf_counter() >= deadline:
+                return
+            with lock:
+                session_id = next(counter)
+            try:
+                session = JOURNEYS[name](session_id, png)
+                recorded = session.latencies
+            except Exception as e:
+                recorded = []
+                with lock:
+                    errors[name].append(f"{type(e).__name__}: {e}")
+            with lock:
+                latencies[name].extend(recorded)
+
+    started = time.perf_counter()
+    threads = []
+    for i in range(sessions):
+        # Cada sessão começa por uma jornada diferente para misturar a carga
+        order = journeys[i % len(journeys):] + journeys[:i % len(journeys)]
+        thread = threading.Thread(target=worker, args=(order,), name=f"session-{i}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def measure_memory(journeys, png):
+    """
+    Memória retida por sessão de cada jornada (tracemalloc)
+
+    Returns:
+        dict: jornada -> bytes por sessão
+    """
+    result = {}
+    for name in journeys:
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        alive = [JOURNEYS[name](f"mem-{name}-{i}", png) for i in range(MEMORY_SESSIONS)]
+        gc.collect()
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        result[name] = (current - baseline) / len(alive)
+        del alive
+    return result
+
+
+def print_report(latencies, errors, elapsed, memory, sessions):
+    """
+    Imprime a tabela de latências, o throughput e a memória por sessão
+
+    Returns:
+        bool: True se todas as jornadas mediram reruns sem nenhum erro
+    """
+    print()
+    print(f"{'Jornada':<15} {'Reruns':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'máx':>8} {'Erros':>6} {'Mem/sessão':>11}")
+    print("-" * 78)
+    total = 0
+    for name, values in latencies.items():
+        values = sorted(values)
+        total += len(values)
+        mem = memory.get(name)
+        mem_text = f"{mem / 1024:.0f} KiB" if mem is not None else "-"
+        print(f"{name:<15} {len(values):>7} "
+              f"{percentile(values, 0.50) * 1000:>6.0f}ms {percentile(values, 0.95) * 1000:>6.0f}ms "
+              f"{percentile(values, 0.99) * 1000:>6.0f}ms {(values[-1] if values else 0) * 1000:>6.0f}ms "
+              f"{len(errors[name]):>6} {mem_text:>11}")
+    print("-" * 78)
+    print(f"{sessions} sessões simultâneas, {elapsed:.1f}s: {total} reruns, "
+          f"{total / elapsed if elapsed else 0:.1f} reruns/s")
+
+    all_ok = True
+    for name, messages in errors.items():
+        for message in sorted(set(messages))[:3]:
+            print(f"❌ {name}: {message}")
+        if messages or not latencies[name]:
+            all_ok = False
+        if not latencies[name]:
+            print(f"❌ {name}: nenhum rerun medido")
+    return all_ok
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Teste de carga com sessões simultâneas")
+    parser.add_argument('--sessions', type=int, default=10, help="sessões simultâneas (padrão 10)")
+    parser.add_argument('--duration', type=float, default=30, help="duração em segundos (padrão 30)")
+    parser.add_argument('--latency', type=float, default=50,
+                        help="latência simulada por chamada ao backend em ms (padrão 50)")
+    parser.add_argument('--journeys', default=','.join(JOURNEYS),
+                        help=f"jornadas separadas por vírgula ({', '.join(JOURNEYS)})")
+    parser.add_argument('--no-memory', action='store_true', help="pula a medição de memória por sessão")
+    return parser.parse_args()
+
+
+def main():
+    """Função principal"""
+    args = parse_args()
+    journeys = [name.strip() for name in args.journeys.split(',') if name.strip()]
+    unknown = [name for name in journeys if name not in JOURNEYS]
+    if unknown:
+        raise SystemExit(f"Jornadas desconhecidas: {', '.join(unknown)}")
+
+    print("🎴 MyPokeBinder - Teste de Carga")
+    print("=" * 50)
+    print(f"Sessões: {args.sessions}  Duração: {args.duration:.0f}s  "
+          f"Latência simulada: {args.latency:.0f}ms  Jornadas: {', '.join(journeys)}")
+
+    recorder = Recorder(latency=args.latency / 1000)
+    install_fakes(recorder, build_cards())
+    _share_test_runtime()
+    _use_plain_search_input()
+    png = _sample_png()
+
+    latencies, errors, elapsed = run_load(journeys, args.sessions, args.duration, png)
+    backend_calls = recorder.round_trips
+
+    memory = {}
+    memory_ok = True
+    if not args.no_memory:
+        recorder.latency = 0
+        try:
+            memory = measure_memory(journeys, png)
+        except Exception as e:
+            print(f"❌ Medição de memória: {type(e).__name__}: {e}")
+            memory_ok = False
+
+    all_ok = print_report(latencies, errors, elapsed, memory, args.sessions) and memory_ok
+    print(f"Chamadas ao backend durante a carga: {backend_calls}")
+    if not all_ok:
+        print("⚠️ Jornadas com erro: os números acima não valem como medição")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
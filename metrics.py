@@ -0,0 +1,312 @@
+"""
+Métricas de latência, volume e erros das chamadas externas e das páginas
+
+Cada chamada ao Supabase ou ao Cloudinary é envolvida por observe(), que
+registra um histograma de latência, contadores de erro, número de linhas e
+tamanho do payload (e abre um span, se o rastreamento estiver ligado). As métricas ficam em memória no processo e são expostas
+no formato texto do Prometheus em /metrics (start_metrics_server).
+"""
+
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from profiling import record_call
+from tracing import span
+
+# Limites dos buckets (segundos, linhas e bytes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+ROW_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Exceções de controle de fluxo do Streamlit (st.rerun/st.stop) não são erros
+_CONTROL_FLOW_EXCEPTIONS = {'RerunException', 'StopException'}
+
+_registry_lock = threading.Lock()
+_metrics = {}
+
+# Observação em andamento (usada pelos hooks HTTP para atribuir bytes)
+current_observation = contextvars.ContextVar('current_observation', default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(label_key, extra=None):
+    items = list(label_key) + (list(extra.items()) if extra else [])
+    if not items:
+        return ''
+    escaped = [
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in items
+    ]
+    return '{' + ','.join(escaped) + '}'
+
+
+class Counter:
+    """Contador monotônico com labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, None, value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce (ex.: tamanho de fila)"""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Histograma cumulativo com buckets fixos"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels):
+        counts, _ = self._values.get(_label_key(labels), ([0], 0.0))
+        return sum(counts)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", key, {'le': repr(float(bound))}, cumulative))
+            cumulative += counts[-1]
+            samples.append((f"{self.name}_bucket", key, {'le': '+Inf'}, cumulative))
+            samples.append((f"{self.name}_sum", key, None, total))
+            samples.append((f"{self.name}_count", key, None, cumulative))
+        return samples
+
+
+def _register(metric):
+    with _registry_lock:
+        return _metrics.setdefault(metric.name, metric)
+
+
+def counter(name, help_text):
+    """Retorna (criando se necessário) um contador registrado"""
+    return _register(Counter(name, help_text))
+
+
+def gauge(name, help_text):
+    """Retorna (criando se necessário) um gauge registrado"""
+    return _register(Gauge(name, help_text))
+
+
+def histogram(name, help_text, buckets=LATENCY_BUCKETS):
+    """Retorna (criando se necessário) um histograma registrado"""
+    return _register(Histogram(name, help_text, buckets))
+
+
+# Métricas das chamadas externas
+CALL_DURATION = histogram('pokebinder_backend_call_duration_seconds',
+                          'Latência das chamadas ao Supabase e ao Cloudinary')
+CALL_ERRORS = counter('pokebinder_backend_call_errors_total',
+                      'Chamadas ao Supabase e ao Cloudinary que falharam')
+CALL_ROWS = histogram('pokebinder_backend_call_rows',
+                      'Linhas retornadas/gravadas por chamada', ROW_BUCKETS)
+CALL_BYTES = histogram('pokebinder_backend_call_payload_bytes',
+                       'Bytes recebidos/enviados por chamada', BYTE_BUCKETS)
+
+# Métricas das páginas (uma execução completa do script Streamlit)
+RENDER_DURATION = histogram('pokebinder_page_render_duration_seconds',
+                            'Tempo de cada execução (rerun) de página')
+RENDER_ERRORS = counter('pokebinder_page_render_errors_total',
+                        'Execuções de página que terminaram com exceção')
+
+
+class Observation:
+    """Dados de uma chamada em andamento (preenchidos por quem chama)"""
+
+    def __init__(self, backend, operation):
+        self.backend = backend
+        self.operation = operation
+        self.rows = None
+        self.bytes = None
+
+    def add_bytes(self, amount):
+        self.bytes = (self.bytes or 0) + amount
+
+    def set_result(self, data):
+        """Registra o número de linhas de um resultado do Supabase"""
+        if isinstance(data, list):
+            self.rows = len(data)
+        elif data is not None:
+            self.rows = 1
+        else:
+            self.rows = 0
+
+
+def _is_error(exc_type):
+    return exc_type is not None and exc_type.__name__ not in _CONTROL_FLOW_EXCEPTIONS
+
+
+@contextmanager
+def observe(backend, operation):
+    """
+    Mede uma chamada externa
+
+    Uso:
+        with observe('supabase', 'get_user_cards') as obs:
+            result = ...execute()
+            obs.set_result(result.data)
+
+    Args:
+        backend: 'supabase' ou 'cloudinary'
+        operation: Nome da operação (normalmente o nome da função)
+    """
+    obs = Observation(backend, operation)
+    with span(f"{backend}.{operation}", backend=backend) as call_span:
+        token = current_observation.set(obs)
+        started = time.perf_counter()
+        try:
+            yield obs
+        except BaseException as e:
+            if _is_error(type(e)):
+                CALL_ERRORS.inc(backend=backend, operation=operation, error=type(e).__name__)
+            raise
+        finally:
+            current_observation.reset(token)
+            elapsed = time.perf_counter() - started
+            CALL_DURATION.observe(elapsed, backend=backend, operation=operation)
+            record_call(backend, operation, elapsed, obs.rows)
+            if obs.rows is not None:
+                CALL_ROWS.observe(obs.rows, backend=backend, operation=operation)
+            if obs.bytes is not None:
+                CALL_BYTES.observe(obs.bytes, backend=backend, operation=operation)
+            if call_span is not None:
+                call_span.set_attribute('rows', obs.rows)
+                call_span.set_attribute('bytes', obs.bytes)
+
+
+@contextmanager
+def observe_render(app, page):
+    """Mede uma execução completa de página (raiz do trace da execução)"""
+    with span(f"{app}.render", new_trace=True, app=app, page=page):
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            if _is_error(type(e)):
+                RENDER_ERRORS.inc(app=app, page=page, error=type(e).__name__)
+            raise
+        finally:
+            RENDER_DURATION.observe(time.perf_counter() - started, app=app, page=page)
+
+
+def record_response_bytes(response):
+    """Hook de resposta httpx: soma o tamanho do corpo à observação atual"""
+    obs = current_observation.get()
+    if obs is not None:
+        response.read()
+        obs.add_bytes(len(response.content))
+
+
+def render_prometheus():
+    """Gera o texto no formato de exposição do Prometheus"""
+    lines = []
+    with _registry_lock:
+        metrics = list(_metrics.values())
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, label_key, extra, value in metric.samples():
+            lines.append(f"{name}{_format_labels(label_key, extra)} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Sem log por requisição (o Prometheus consulta com frequência)
+        pass
+
+
+_server = None
+_server_failed = False
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(default_port):
+    """
+    Sobe o endpoint /metrics em uma thread (uma vez por processo)
+
+    A porta vem de METRICS_PORT (ou default_port); METRICS_PORT=0 desativa.
+    O endpoint escuta em METRICS_HOST (padrão 127.0.0.1, apenas local).
+
+    Returns:
+        int | None: Porta em uso, ou None se desativado/indisponível
+    """
+    global _server, _server_failed
+    port = int(os.getenv("METRICS_PORT", default_port))
+    if port == 0:
+        return None
+    with _server_lock:
+        if _server_failed:
+            return None
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((os.getenv("METRICS_HOST", "127.0.0.1"), port), _MetricsHandler)
+            except OSError:
+                # Porta ocupada (ex.: outro processo do app); métricas seguem só em memória
+                _server_failed = True
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server.server_address[1]
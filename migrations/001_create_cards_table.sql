@@ -25,24 +25,31 @@ CREATE INDEX IF NOT EXISTS idx_cards_created_at ON cards(created_at);
 -- Habilitar RLS (Row Level Security)
 ALTER TABLE cards ENABLE ROW LEVEL SECURITY;
 
+-- Remover políticas existentes (CREATE POLICY não aceita IF NOT EXISTS)
+DROP POLICY IF EXISTS "Users can view their own cards" ON cards;
+DROP POLICY IF EXISTS "Users can insert their own cards" ON cards;
+DROP POLICY IF EXISTS "Users can update their own cards" ON cards;
+DROP POLICY IF EXISTS "Users can delete their own cards" ON cards;
+DROP POLICY IF EXISTS "Public can view all cards" ON cards;
+
 -- Política para usuários verem apenas seus próprios cards
-CREATE POLICY IF NOT EXISTS "Users can view their own cards" ON cards
+CREATE POLICY "Users can view their own cards" ON cards
     FOR SELECT USING (auth.uid() = user_id);
 
 -- Política para usuários inserirem seus próprios cards
-CREATE POLICY IF NOT EXISTS "Users can insert their own cards" ON cards
+CREATE POLICY "Users can insert their own cards" ON cards
     FOR INSERT WITH CHECK (auth.uid() = user_id);
 
 -- Política para usuários atualizarem seus próprios cards
-CREATE POLICY IF NOT EXISTS "Users can update their own cards" ON cards
+CREATE POLICY "Users can update their own cards" ON cards
     FOR UPDATE USING (auth.uid() = user_id);
 
 -- Política para usuários deletarem seus próprios cards
-CREATE POLICY IF NOT EXISTS "Users can delete their own cards" ON cards
+CREATE POLICY "Users can delete their own cards" ON cards
     FOR DELETE USING (auth.uid() = user_id);
 
 -- Política para visualização pública (apenas leitura)
-CREATE POLICY IF NOT EXISTS "Public can view all cards" ON cards
+CREATE POLICY "Public can view all cards" ON cards
     FOR SELECT USING (true);
 
 -- Função para atualizar o campo updated_at automaticamente
@@ -55,7 +62,8 @@ END;
 $$ language 'plpgsql';
 
 -- Trigger para atualizar updated_at automaticamente
-CREATE TRIGGER IF NOT EXISTS update_cards_updated_at 
+DROP TRIGGER IF EXISTS update_cards_updated_at ON cards;
+CREATE TRIGGER update_cards_updated_at
     BEFORE UPDATE ON cards 
     FOR EACH ROW 
     EXECUTE FUNCTION update_updated_at_column();
@@ -0,0 +1,42 @@
+-- Migration: 002_soft_delete_cards.sql
+-- Descrição: Exclusão lógica (tombstones) e consultas incrementais por updated_at
+
+-- Coluna de email do dono (também criada por add_user_email_column.sql)
+ALTER TABLE cards ADD COLUMN IF NOT EXISTS user_email TEXT;
+
+-- Cards deletados ficam como tombstone até serem expurgados
+ALTER TABLE cards ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP WITH TIME ZONE;
+
+-- Linhas inseridas já nascem com updated_at preenchido (o trigger cobre os UPDATEs).
+-- O trigger de updated_at (001) trocaria created_at por NOW() no backfill e
+-- marcaria todas as linhas como recém-alteradas: fica desligado durante o UPDATE
+ALTER TABLE cards DISABLE TRIGGER update_cards_updated_at;
+UPDATE cards SET updated_at = created_at WHERE updated_at IS NULL;
+ALTER TABLE cards ENABLE TRIGGER update_cards_updated_at;
+ALTER TABLE cards ALTER COLUMN updated_at SET DEFAULT NOW();
+
+-- Índices das consultas de mudanças desde um cursor (todos os cards ou por usuário)
+CREATE INDEX IF NOT EXISTS idx_cards_updated_at ON cards(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_cards_user_email_updated_at ON cards(user_email, updated_at, id);
+
+-- Leituras normais só enxergam cards ativos
+CREATE INDEX IF NOT EXISTS idx_cards_active_user_email ON cards(user_email) WHERE deleted_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_cards_active_user_id ON cards(user_id) WHERE deleted_at IS NULL;
+
+-- Remove tombstones mais antigos que a retenção; clientes com cursor mais
+-- antigo que isso precisam recarregar o binder inteiro
+CREATE OR REPLACE FUNCTION purge_card_tombstones(retention INTERVAL DEFAULT INTERVAL '30 days')
+RETURNS INTEGER AS $$
+DECLARE
+    purged INTEGER;
+BEGIN
+    DELETE FROM cards WHERE deleted_at IS NOT NULL AND deleted_at < NOW() - retention;
+    GET DIAGNOSTICS purged = ROW_COUNT;
+    RETURN purged;
+END;
+$$ language 'plpgsql' SECURITY DEFINER SET search_path = public;
+
+-- Apaga cards de qualquer usuário: o EXECUTE padrão de PUBLIC deixaria a chave
+-- anon chamar /rpc/purge_card_tombstones, então só a service role pode
+REVOKE EXECUTE ON FUNCTION purge_card_tombstones(INTERVAL) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION purge_card_tombstones(INTERVAL) TO service_role;
@@ -0,0 +1,45 @@
+-- Migration: 003_realtime_cards.sql
+-- Descrição: Publica as mudanças da tabela cards para o listener de realtime_sync
+
+-- Supabase Realtime: a tabela precisa fazer parte da publicação supabase_realtime
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_publication WHERE pubname = 'supabase_realtime')
+       AND NOT EXISTS (
+           SELECT 1 FROM pg_publication_tables
+           WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'cards'
+       ) THEN
+        ALTER PUBLICATION supabase_realtime ADD TABLE cards;
+    END IF;
+END $$;
+
+-- Postgres self-hosted (REALTIME_SOURCE=pg): NOTIFY no canal cards_changes.
+-- O payload do NOTIFY é limitado a 8000 bytes; linhas maiores seguem só com a
+-- chave e o listener recupera o restante pelo delta de updated_at.
+CREATE OR REPLACE FUNCTION notify_card_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    payload TEXT;
+BEGIN
+    payload := json_build_object(
+        'type', TG_OP,
+        'commit_timestamp', NOW(),
+        'record', CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE row_to_json(NEW) END,
+        'old_record', CASE WHEN TG_OP = 'INSERT' THEN NULL ELSE json_build_object('id', OLD.id) END
+    )::TEXT;
+    IF octet_length(payload) > 7900 THEN
+        payload := json_build_object(
+            'type', TG_OP,
+            'commit_timestamp', NOW(),
+            'old_record', json_build_object('id', COALESCE(NEW.id, OLD.id))
+        )::TEXT;
+    END IF;
+    PERFORM pg_notify('cards_changes', payload);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS notify_cards_changes ON cards;
+CREATE TRIGGER notify_cards_changes
+    AFTER INSERT OR UPDATE OR DELETE ON cards
+    FOR EACH ROW EXECUTE FUNCTION notify_card_change();
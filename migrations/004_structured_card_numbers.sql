@@ -0,0 +1,42 @@
+-- Migration: 004_structured_card_numbers.sql
+-- Descrição: Número do card em colunas indexadas (prefixo, número e total da coleção)
+
+ALTER TABLE cards ADD COLUMN IF NOT EXISTS number_prefix TEXT NOT NULL DEFAULT '';
+ALTER TABLE cards ADD COLUMN IF NOT EXISTS set_number INTEGER;
+ALTER TABLE cards ADD COLUMN IF NOT EXISTS set_total INTEGER;
+
+-- Mesmas regras de card_numbers.parse_card_number(): dígitos no fim de cada
+-- lado da barra; o que vem antes dos dígitos do lado esquerdo é o prefixo
+CREATE OR REPLACE FUNCTION card_number_parts(number TEXT,
+                                             OUT number_prefix TEXT,
+                                             OUT set_number INTEGER,
+                                             OUT set_total INTEGER)
+AS $$
+DECLARE
+    left_part TEXT := split_part(COALESCE(number, ''), '/', 1);
+    right_part TEXT := split_part(COALESCE(number, ''), '/', 2);
+    left_digits TEXT := substring(left_part FROM '(\d+)\s*$');
+    right_digits TEXT := substring(right_part FROM '(\d+)\s*$');
+BEGIN
+    number_prefix := '';
+    IF left_digits IS NULL OR length(ltrim(left_digits, '0')) > 9 THEN
+        RETURN;
+    END IF;
+    set_number := left_digits::INTEGER;
+    number_prefix := upper(btrim(regexp_replace(left_part, '[\s-]*\d+\s*$', '')));
+    IF right_digits IS NOT NULL AND length(ltrim(right_digits, '0')) <= 9 THEN
+        set_total := right_digits::INTEGER;
+    END IF;
+END;
+$$ language 'plpgsql' IMMUTABLE;
+
+-- Preenche as linhas existentes (o app grava as colunas em add_card/update_card)
+UPDATE cards
+SET (number_prefix, set_number, set_total) = (SELECT * FROM card_number_parts(number))
+WHERE (number_prefix, set_number, set_total) IS DISTINCT FROM (SELECT * FROM card_number_parts(number));
+
+-- Ordenação por número e intervalos dentro de uma coleção ("cards 1 a 50 de TG30")
+CREATE INDEX IF NOT EXISTS idx_cards_active_user_set_number
+    ON cards(user_email, number_prefix, set_total, set_number, id) WHERE deleted_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_cards_active_set_number
+    ON cards(number_prefix, set_total, set_number, id) WHERE deleted_at IS NULL;
@@ -0,0 +1,36 @@
+-- Migration: 005_image_deletion_queue.sql
+-- Descrição: Fila de imagens do Cloudinary a remover (fotos trocadas e cards deletados)
+
+-- O app nunca lê nem grava esta tabela diretamente: o trigger abaixo enfileira
+-- e o image_gc.py (com a service role key) consome em lotes
+CREATE TABLE IF NOT EXISTS image_deletions (
+    public_id TEXT PRIMARY KEY,
+    queued_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_image_deletions_queued_at ON image_deletions(queued_at);
+
+-- Sem políticas: com RLS habilitado, apenas a service role acessa a fila
+ALTER TABLE image_deletions ENABLE ROW LEVEL SECURITY;
+
+-- Enfileira a foto antiga na mesma transação do UPDATE que a substitui
+-- (ou que marca o card como deletado)
+CREATE OR REPLACE FUNCTION queue_replaced_card_image()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF OLD.cloudinary_public_id IS NOT NULL AND (
+        NEW.cloudinary_public_id IS DISTINCT FROM OLD.cloudinary_public_id
+        OR (NEW.deleted_at IS NOT NULL AND OLD.deleted_at IS NULL)
+    ) THEN
+        INSERT INTO image_deletions (public_id)
+        VALUES (OLD.cloudinary_public_id)
+        ON CONFLICT (public_id) DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql' SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS queue_replaced_card_image ON cards;
+CREATE TRIGGER queue_replaced_card_image
+    AFTER UPDATE OF cloudinary_public_id, deleted_at ON cards
+    FOR EACH ROW EXECUTE FUNCTION queue_replaced_card_image();
@@ -0,0 +1,212 @@
+"""
+Motor de verificações de inicialização (preflight) dos scripts start*.py
+
+As verificações independentes rodam em paralelo, cada uma com seu prazo.
+Uma verificação só começa depois que suas dependências passaram. Resultados
+bem-sucedidos podem ficar em cache por alguns minutos (arquivo local), então
+um loop de reinício do container não refaz chamadas de rede a cada boot.
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Arquivo de cache dos resultados bem-sucedidos
+CACHE_FILE = Path(".preflight_cache.json")
+
+# Prazo padrão de cada verificação (segundos)
+DEFAULT_TIMEOUT = 15
+
+# Estados possíveis de uma verificação
+STATUS_OK = "OK"
+STATUS_FAILED = "FALHOU"
+STATUS_TIMEOUT = "TIMEOUT"
+STATUS_SKIPPED = "PULADO"
+STATUS_CACHED = "CACHE"
+
+
+class Check:
+    """
+    Definição de uma verificação
+
+    Args:
+        name: Nome exibido na tabela
+        func: Função sem argumentos que retorna True/False
+        timeout: Prazo em segundos
+        depends_on: Nomes das verificações que precisam passar antes
+        cache_ttl: Segundos em que um sucesso fica em cache (0 = sem cache)
+    """
+
+    def __init__(self, name, func, timeout=DEFAULT_TIMEOUT, depends_on=(), cache_ttl=0):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+        self.depends_on = tuple(depends_on)
+        self.cache_ttl = cache_ttl
+
+
+class _ThreadOutput(io.TextIOBase):
+    """stdout que separa a saída de cada thread de verificação"""
+
+    def __init__(self, original):
+        self.original = original
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is not None:
+            return buffer.write(text)
+        return self.original.write(text)
+
+    def flush(self):
+        self.original.flush()
+
+
+def _environment_fingerprint():
+    """Identifica a configuração atual (.env e interpretador) para invalidar o cache"""
+    digest = hashlib.sha256(sys.executable.encode('utf-8'))
+    env_file = Path(".env")
+    if env_file.exists():
+        digest.update(env_file.read_bytes())
+    return digest.hexdigest()
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache_path, cache):
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+
+
+def _run_with_output(check, holder, output):
+    output.local.buffer = io.StringIO()
+    try:
+        holder['ok'] = bool(check.func())
+    except Exception as e:
+        print(f"❌ Erro inesperado: {e}")
+        holder['ok'] = False
+    finally:
+        holder['output'] = output.local.buffer.getvalue()
+        output.local.buffer = None
+
+
+def run_checks(checks, cache_path=CACHE_FILE, use_cache=True):
+    """
+    Executa as verificações em paralelo respeitando dependências e prazos
+
+    Args:
+        checks: Lista de Check
+        cache_path: Arquivo de cache dos sucessos
+        use_cache: Se False, ignora o cache existente (ainda grava novos sucessos)
+
+    Returns:
+        list: Dicionários com name, status e elapsed (ms), na ordem das verificações
+    """
+    names = {check.name for check in checks}
+    for check in checks:
+        unknown = [dep for dep in check.depends_on if dep not in names]
+        if unknown:
+            raise ValueError(f"Verificação {check.name} depende de verificações inexistentes: {unknown}")
+
+    fingerprint = _environment_fingerprint()
+    cache = _load_cache(cache_path)
+    if cache.get('fingerprint') != fingerprint:
+        cache = {'fingerprint': fingerprint, 'checks': {}}
+    now = time.time()
+
+    results = {}
+    running = {}
+    pending = list(checks)
+
+    output = _ThreadOutput(sys.stdout)
+    original_stdout = sys.stdout
+    sys.stdout = output
+    try:
+        while pending or running:
+            # Inicia as verificações cujas dependências já terminaram
+            for check in list(pending):
+                dep_status = [results.get(dep, {}).get('status') for dep in check.depends_on]
+                if any(status is None for status in dep_status):
+                    continue
+                pending.remove(check)
+
+                if any(status not in (STATUS_OK, STATUS_CACHED) for status in dep_status):
+                    results[check.name] = {'name': check.name, 'status': STATUS_SKIPPED, 'elapsed': 0}
+                    continue
+
+                cached_at = cache['checks'].get(check.name)
+                if use_cache and check.cache_ttl and cached_at and now - cached_at < check.cache_ttl:
+                    results[check.name] = {'name': check.name, 'status': STATUS_CACHED, 'elapsed': 0}
+                    continue
+
+                holder = {}
+                thread = threading.Thread(target=_run_with_output, args=(check, holder, output), daemon=True)
+                thread.start()
+                running[check.name] = (check, thread, holder, time.perf_counter())
+
+            # Recolhe as que terminaram ou estouraram o prazo
+            for name, (check, thread, holder, started) in list(running.items()):
+                elapsed = time.perf_counter() - started
+                if not thread.is_alive():
+                    status = STATUS_OK if holder.get('ok') else STATUS_FAILED
+                    if holder.get('output'):
+                        original_stdout.write(holder['output'])
+                elif elapsed > check.timeout:
+                    status = STATUS_TIMEOUT
+                    original_stdout.write(f"⏱️ {name}: sem resposta em {check.timeout}s\n")
+                else:
+                    continue
+
+                del running[name]
+                results[name] = {'name': name, 'status': status, 'elapsed': elapsed * 1000}
+                if status == STATUS_OK and check.cache_ttl:
+                    cache['checks'][name] = time.time()
+
+            if running:
+                time.sleep(0.01)
+    finally:
+        sys.stdout = original_stdout
+
+    _save_cache(cache_path, cache)
+    return [results[check.name] for check in checks]
+
+
+def print_timing_table(results, total_elapsed=None):
+    """Exibe a tabela de tempos das verificações"""
+    width = max([len(result['name']) for result in results] + [len("Verificação")])
+    print()
+    print(f"{'Verificação'.ljust(width)}  {'Status':<8}  {'Tempo':>9}")
+    print("-" * (width + 22))
+    for result in results:
+        print(f"{result['name'].ljust(width)}  {result['status']:<8}  {result['elapsed']:>7.0f}ms")
+    if total_elapsed is not None:
+        print("-" * (width + 22))
+        print(f"{'Total'.ljust(width)}  {'':<8}  {total_elapsed:>7.0f}ms")
+
+
+def run_preflight(checks, use_cache=True):
+    """
+    Executa as verificações e imprime a tabela de tempos
+
+    Returns:
+        bool: True se todas passaram (ou vieram do cache)
+    """
+    use_cache = use_cache and os.getenv("PREFLIGHT_NO_CACHE") != "1"
+    started = time.perf_counter()
+    results = run_checks(checks, use_cache=use_cache)
+    print_timing_table(results, (time.perf_counter() - started) * 1000)
+    return all(result['status'] in (STATUS_OK, STATUS_CACHED) for result in results)
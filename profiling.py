@@ -0,0 +1,193 @@
+"""
+Modo de profiling sob demanda (uma execução da página)
+
+Ativação:
+    - POKEBINDER_PROFILE=1 no ambiente: toda execução é perfilada
+    - ?profile=1 na URL para um administrador logado (email em ADMIN_EMAILS)
+    - ?profile=<PROFILE_TOKEN> na URL (útil no public_app, que não tem login)
+
+Com a URL, apenas uma execução é perfilada: o parâmetro é removido em seguida.
+O profiler amostral pyinstrument é usado se estiver instalado (gera HTML);
+caso contrário, cProfile (gera .prof para snakeviz/flameprof). O arquivo fica
+em PROFILE_DIR e um painel mostra o tempo por chamada de dados e por seção.
+
+Desligado, o custo é apenas a leitura de uma ContextVar em cada chamada
+externa e em cada seção.
+"""
+
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import is_admin
+from tracing import current_trace_id
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", ".profiles")
+
+# Coletor da execução perfilada atual (None quando o profiling está desligado)
+current_collector = contextvars.ContextVar('profiling_collector', default=None)
+
+
+class RerunCollector:
+    """Tempos de chamadas externas e seções de uma execução"""
+
+    def __init__(self):
+        self.calls = []
+        self.sections = []
+
+    def add_call(self, backend, operation, elapsed, rows=None):
+        self.calls.append((backend, operation, elapsed, rows))
+
+    def add_section(self, name, elapsed):
+        self.sections.append((name, elapsed))
+
+
+def record_call(backend, operation, elapsed, rows=None):
+    """Registra uma chamada externa na execução perfilada (se houver)"""
+    collector = current_collector.get()
+    if collector is not None:
+        collector.add_call(backend, operation, elapsed, rows)
+
+
+@contextmanager
+def section(name):
+    """Marca uma seção de renderização (sem custo quando o profiling está desligado)"""
+    collector = current_collector.get()
+    if collector is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        collector.add_section(name, time.perf_counter() - started)
+
+
+def profiling_requested(query_params, user_email=None):
+    """
+    Verifica se esta execução deve ser perfilada
+
+    Args:
+        query_params: st.query_params
+        user_email: Email do usuário logado (ou None)
+
+    Returns:
+        bool: True se o profiling foi pedido por env ou por um administrador
+    """
+    if os.getenv("POKEBINDER_PROFILE") == "1":
+        return True
+    value = query_params.get('profile')
+    if not value:
+        return False
+    token = os.getenv("PROFILE_TOKEN")
+    if token and value == token:
+        return True
+    return value == "1" and is_admin(user_email)
+
+
+class _Profiler:
+    """pyinstrument (amostral) quando disponível; cProfile como alternativa"""
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+            self.kind = 'pyinstrument'
+            self._profiler = Profiler()
+        except ImportError:
+            import cProfile
+            self.kind = 'cProfile'
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self.kind == 'pyinstrument':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if self.kind == 'pyinstrument':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def save(self, path_without_ext):
+        if self.kind == 'pyinstrument':
+            path = f"{path_without_ext}.html"
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self._profiler.output_html())
+        else:
+            path = f"{path_without_ext}.prof"
+            self._profiler.dump_stats(path)
+        return path
+
+
+def run_profiled(main, app, page, query_params, user_email=None):
+    """
+    Executa main(), perfilando esta execução se foi pedido
+
+    Args:
+        main: Função principal da página
+        app: Nome da aplicação ('app' ou 'public_app')
+        page: Nome da página (para o nome do arquivo)
+        query_params: st.query_params
+        user_email: Email do usuário logado (ou None)
+    """
+    if not profiling_requested(query_params, user_email):
+        main()
+        return
+
+    # Apenas uma execução por pedido via URL
+    if 'profile' in query_params:
+        del query_params['profile']
+
+    collector = RerunCollector()
+    token = current_collector.set(collector)
+    profiler = _Profiler()
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        main()
+    finally:
+        profiler.stop()
+        total = time.perf_counter() - started
+        current_collector.reset(token)
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        path = profiler.save(os.path.join(PROFILE_DIR, f"{app}_{page}_{stamp}"))
+
+    show_breakdown(collector, total, path, profiler.kind)
+
+
+def show_breakdown(collector, total, path, kind):
+    """Painel com o tempo por chamada de dados e por seção da execução"""
+    import streamlit as st
+
+    with st.expander("⏱️ Perfil desta execução", expanded=True):
+        data_time = sum(call[2] for call in collector.calls)
+        st.markdown(f"**Tempo total:** {total * 1000:.0f} ms  •  "
+                    f"**Chamadas externas:** {len(collector.calls)} ({data_time * 1000:.0f} ms)")
+        st.caption(f"Arquivo ({kind}): `{path}`")
+        trace_id = current_trace_id()
+        if trace_id:
+            st.caption(f"Trace: `{trace_id}`")
+
+        if collector.calls:
+            st.markdown("**Chamadas de dados e imagens**")
+            st.table([
+                {
+                    'Backend': backend,
+                    'Operação': operation,
+                    'Tempo (ms)': round(elapsed * 1000, 1),
+                    'Linhas': rows if rows is not None else '',
+                }
+                for backend, operation, elapsed, rows in collector.calls
+            ])
+
+        if collector.sections:
+            st.markdown("**Seções da página**")
+            st.table([
+                {'Seção': name, 'Tempo (ms)': round(elapsed * 1000, 1)}
+                for name, elapsed in collector.sections
+            ])
@@ -1,7 +1,10 @@
 import streamlit as st
-import os
-from datetime import datetime
-from config import supabase, STREAMLIT_CONFIG
+from config import warm_up_connections
+from async_data import load_public_page
+from metrics import observe_render, start_metrics_server
+from profiling import run_profiled, section
+import realtime_sync
+from card_grid import show_card_grid, collection_stats, render_public_card, render_public_card_with_owner, DEFAULT_SORT_OPTIONS
 
 # Configuração da página
 st.set_page_config(
@@ -11,36 +14,36 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Função para buscar todos os cards
-def get_all_cards():
-    try:
-        result = supabase.table('cards').select('*').execute()
-        return result.data if result.data else []
-    except Exception as e:
-        st.error(f"Erro ao buscar cards: {str(e)}")
-        return []
+# Abre conexões keep-alive com o Supabase em segundo plano (uma vez por processo)
+warm_up_connections()
 
-# Função para buscar cards por email específico
-def get_cards_by_email(user_email):
-    try:
-        result = supabase.table('cards').select('*').eq('user_email', user_email).execute()
-        return result.data if result.data else []
-    except Exception as e:
-        st.error(f"Erro ao buscar cards por email: {str(e)}")
-        return []
+# Endpoint /metrics (Prometheus) em segundo plano (uma vez por processo)
+start_metrics_server(default_port=9465)
+
+# Listener de mudanças que atualiza os binders em cache (REALTIME_SOURCE)
+realtime_sync.start()
+
+# Mensagens de erro de cada consulta da página
+LOAD_ERROR_MESSAGES = {
+    'users': "Erro ao buscar usuários",
+    'stats': "Erro ao buscar estatísticas",
+    'cards': "Erro ao buscar cards",
+}
 
-# Função para buscar usuários únicos
-def get_unique_users():
+# Busca os dados da página (consultas independentes em paralelo)
+def load_page_data(search_email):
     try:
-        result = supabase.table('cards').select('user_email').not_.is_('user_email', 'null').execute()
-        if result.data:
-            # Extrair emails únicos
-            emails = list(set([card['user_email'] for card in result.data if card['user_email']]))
-            return sorted(emails)
-        return []
+        page = load_public_page(search_email)
     except Exception as e:
-        st.error(f"Erro ao buscar usuários: {str(e)}")
-        return []
+        st.error(f"Erro ao buscar dados: {str(e)}")
+        return {'users': [], 'stats': None, 'cards': []}
+    
+    for name, error in page['errors'].items():
+        st.error(f"{LOAD_ERROR_MESSAGES[name]}: {str(error)}")
+    
+    page['users'] = page['users'] or []
+    page['cards'] = page['cards'] or []
+    return page
 
 # Função principal
 def main():
@@ -48,17 +51,23 @@ def main():
     st.markdown("### 🌐 Visualizador Público de Coleções Pokémon")
     st.markdown("---")
     
+    # Dados da página: usuários, estatísticas e cards são buscados ao mesmo tempo
+    search_email = st.session_state.get('search_email', None)
+    with section("dados"):
+        page = load_page_data(search_email)
+    users = page['users']
+    
     # Sidebar com filtros
-    with st.sidebar:
+    with st.sidebar, section("sidebar"):
         st.header("🔍 Filtros")
         
         # Buscar por email específico
         st.subheader("👤 Buscar por Usuário")
-        search_email = st.text_input("Email do usuário", placeholder="exemplo@email.com")
+        email_input = st.text_input("Email do usuário", placeholder="exemplo@email.com")
         
         if st.button("🔍 Buscar Usuário", use_container_width=True):
-            if search_email:
-                st.session_state.search_email = search_email
+            if email_input:
+                st.session_state.search_email = email_input
                 st.rerun()
         
         # Limpar busca
@@ -71,7 +80,6 @@ def main():
         
         # Lista de usuários disponíveis
         st.subheader("👥 Usuários Disponíveis")
-        users = get_unique_users()
         if users:
             for user in users[:10]:  # Mostrar apenas os primeiros 10
                 if st.button(f"👤 {user}", key=f"user_{user}", use_container_width=True):
@@ -87,22 +95,19 @@ def main():
         
         # Estatísticas gerais
         st.subheader("📊 Estatísticas")
-        all_cards = get_all_cards()
-        if all_cards:
-            st.metric("Total de Cards", len(all_cards))
+        stats = page['stats']
+        if stats and stats['total_cards']:
+            st.metric("Total de Cards", stats['total_cards'])
             st.metric("Usuários Ativos", len(users))
-            total_value = sum(card.get('estimated_value', 0) for card in all_cards)
-            st.metric("Valor Total", f"R$ {total_value:.2f}")
+            st.metric("Valor Total", f"R$ {stats['total_value']:.2f}")
     
     # Conteúdo principal
-    search_email = st.session_state.get('search_email', None)
-    
     if search_email:
         # Mostrar cards de um usuário específico
         st.header(f"🎴 Coleção de {search_email}")
         st.info(f"Visualizando cards do usuário: {search_email}")
         
-        cards = get_cards_by_email(search_email)
+        cards = page['cards']
         
         if not cards:
             st.warning(f"Nenhum card encontrado para {search_email}")
@@ -113,145 +118,48 @@ def main():
             - O usuário não compartilhou sua coleção
             """)
         else:
-            # Estatísticas do usuário
+            # Estatísticas do usuário (das colunas já preparadas para o grid)
+            totals = collection_stats(cards)
             col1, col2, col3, col4 = st.columns(4)
             with col1:
-                st.metric("Total de Cards", len(cards))
+                st.metric("Total de Cards", totals['total_cards'])
             with col2:
-                total_value = sum(card.get('estimated_value', 0) for card in cards)
-                st.metric("Valor Total", f"R$ {total_value:.2f}")
+                st.metric("Valor Total", f"R$ {totals['total_value']:.2f}")
             with col3:
-                languages = set(card.get('language', '') for card in cards)
-                st.metric("Idiomas", len(languages))
+                st.metric("Idiomas", totals['languages'])
             with col4:
-                if cards:
-                    most_valuable = max(cards, key=lambda x: x.get('estimated_value', 0))
-                    st.metric("Card Mais Valioso", f"R$ {most_valuable.get('estimated_value', 0):.2f}")
+                st.metric("Card Mais Valioso", f"R$ {totals['max_value']:.2f}")
             
             st.markdown("---")
             
-            # Filtros para os cards do usuário
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                filter_name = st.text_input("🔍 Filtrar por nome", key="user_filter_name")
-            with col2:
-                filter_language = st.selectbox("🌍 Filtrar por idioma", 
-                                             ["Todos"] + list(set([card.get('language', '') for card in cards])), 
-                                             key="user_filter_lang")
-            with col3:
-                sort_by = st.selectbox("📊 Ordenar por", 
-                                     ["Nome", "Número", "Valor", "Data de Criação"], 
-                                     key="user_sort")
-            
-            # Aplicar filtros
-            filtered_cards = cards
-            if filter_name:
-                filtered_cards = [card for card in filtered_cards 
-                                if filter_name.lower() in card.get('name', '').lower()]
-            if filter_language != "Todos":
-                filtered_cards = [card for card in filtered_cards 
-                                if card.get('language', '') == filter_language]
-            
-            # Aplicar ordenação
-            if sort_by == "Nome":
-                filtered_cards.sort(key=lambda x: x.get('name', ''))
-            elif sort_by == "Número":
-                filtered_cards.sort(key=lambda x: x.get('number', ''))
-            elif sort_by == "Valor":
-                filtered_cards.sort(key=lambda x: x.get('estimated_value', 0), reverse=True)
-            elif sort_by == "Data de Criação":
-                filtered_cards.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-            
-            # Exibir cards
-            if filtered_cards:
-                st.markdown(f"**Mostrando {len(filtered_cards)} de {len(cards)} cards**")
-                
-                cols = st.columns(4)
-                for i, card in enumerate(filtered_cards):
-                    with cols[i % 4]:
-                        st.image(card.get('image_url', ''), width=150, use_container_width=True)
-                        st.markdown(f"**{card.get('name', '')}**")
-                        st.markdown(f"📋 Nº {card.get('number', '')}")
-                        st.markdown(f"💰 R$ {card.get('estimated_value', 0):.2f}")
-                        st.markdown(f"🌍 {card.get('language', '')}")
-            else:
-                st.info("🔍 Nenhum card encontrado com os filtros aplicados.")
+            show_card_grid(cards, "user", render_public_card)
     
     else:
         # Mostrar todos os cards
         st.header("🎴 Todas as Coleções")
         st.info("Visualizando todos os cards de todos os usuários")
         
-        all_cards = get_all_cards()
+        all_cards = page['cards']
         
         if not all_cards:
             st.warning("Nenhum card encontrado no sistema")
         else:
-            # Estatísticas gerais
+            # Estatísticas gerais (das colunas já preparadas para o grid)
+            totals = collection_stats(all_cards)
             col1, col2, col3, col4 = st.columns(4)
             with col1:
-                st.metric("Total de Cards", len(all_cards))
+                st.metric("Total de Cards", totals['total_cards'])
             with col2:
-                total_value = sum(card.get('estimated_value', 0) for card in all_cards)
-                st.metric("Valor Total", f"R$ {total_value:.2f}")
+                st.metric("Valor Total", f"R$ {totals['total_value']:.2f}")
             with col3:
-                languages = set(card.get('language', '') for card in all_cards)
-                st.metric("Idiomas", len(languages))
+                st.metric("Idiomas", totals['languages'])
             with col4:
-                users = get_unique_users()
                 st.metric("Usuários", len(users))
             
             st.markdown("---")
             
-            # Filtros gerais
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                filter_name = st.text_input("🔍 Filtrar por nome", key="all_filter_name")
-            with col2:
-                filter_language = st.selectbox("🌍 Filtrar por idioma", 
-                                             ["Todos"] + list(set([card.get('language', '') for card in all_cards])), 
-                                             key="all_filter_lang")
-            with col3:
-                sort_by = st.selectbox("📊 Ordenar por", 
-                                     ["Nome", "Número", "Valor", "Data de Criação", "Usuário"], 
-                                     key="all_sort")
-            
-            # Aplicar filtros
-            filtered_cards = all_cards
-            if filter_name:
-                filtered_cards = [card for card in filtered_cards 
-                                if filter_name.lower() in card.get('name', '').lower()]
-            if filter_language != "Todos":
-                filtered_cards = [card for card in filtered_cards 
-                                if card.get('language', '') == filter_language]
-            
-            # Aplicar ordenação
-            if sort_by == "Nome":
-                filtered_cards.sort(key=lambda x: x.get('name', ''))
-            elif sort_by == "Número":
-                filtered_cards.sort(key=lambda x: x.get('number', ''))
-            elif sort_by == "Valor":
-                filtered_cards.sort(key=lambda x: x.get('estimated_value', 0), reverse=True)
-            elif sort_by == "Data de Criação":
-                filtered_cards.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-            elif sort_by == "Usuário":
-                filtered_cards.sort(key=lambda x: x.get('user_email', ''))
-            
-            # Exibir cards
-            if filtered_cards:
-                st.markdown(f"**Mostrando {len(filtered_cards)} de {len(all_cards)} cards**")
-                
-                cols = st.columns(4)
-                for i, card in enumerate(filtered_cards):
-                    with cols[i % 4]:
-                        st.image(card.get('image_url', ''), width=150, use_container_width=True)
-                        st.markdown(f"**{card.get('name', '')}**")
-                        st.markdown(f"📋 Nº {card.get('number', '')}")
-                        st.markdown(f"💰 R$ {card.get('estimated_value', 0):.2f}")
-                        st.markdown(f"🌍 {card.get('language', '')}")
-                        st.markdown(f"👤 {card.get('user_email', 'N/A')}")
-            else:
-                st.info("🔍 Nenhum card encontrado com os filtros aplicados.")
+            show_card_grid(all_cards, "all", render_public_card_with_owner,
+                           sort_options=DEFAULT_SORT_OPTIONS + ["Usuário"])
     
     # Footer
     st.markdown("---")
@@ -268,4 +176,6 @@ def main():
     """)
 
 if __name__ == "__main__":
-    main()
+    page_label = "user" if st.session_state.get('search_email') else "all"
+    with observe_render("public_app", page_label):
+        run_profiled(main, "public_app", page_label, st.query_params)
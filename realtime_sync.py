@@ -0,0 +1,242 @@
+"""
+Listener de mudanças da tabela cards que atualiza os caches em memória
+
+Cada INSERT/UPDATE/DELETE em cards chega como um evento e é aplicado nos
+binders em cache (binder_cache.apply_change), junto com o diretório de
+usuários e as estatísticas derivados deles. Enquanto o listener está
+conectado os binders consultam o delta apenas a cada
+BINDER_LIVE_DELTA_INTERVAL segundos; se a conexão cai, volta o intervalo
+curto até reconectar.
+
+Fontes de eventos (REALTIME_SOURCE):
+    supabase   Supabase Realtime (postgres_changes), requer a migration 003
+    pg         LISTEN/NOTIFY do Postgres (self-hosted), requer psycopg e DATABASE_URL
+    off        desativado (padrão)
+
+LocalChangeFeed é uma fonte em memória para verificações e scripts: quem
+grava chama publish() e o evento segue o mesmo caminho dos reais.
+
+O listener roda no event loop de async_data, o mesmo onde vive o estado do
+binder_cache, então os eventos são aplicados sem locks de thread.
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+
+import async_data
+import binder_cache
+from config import SUPABASE_URL, SUPABASE_KEY
+from metrics import counter, gauge
+
+REALTIME_SOURCE = os.getenv("REALTIME_SOURCE", "off").lower()
+
+# Canal do NOTIFY disparado pelo trigger da migration 003
+NOTIFY_CHANNEL = "cards_changes"
+
+# Espera entre tentativas de reconexão (segundos, com jitter)
+RECONNECT_MIN = 1.0
+RECONNECT_MAX = 60.0
+
+# Prazo para a inscrição no canal ser confirmada (segundos)
+SUBSCRIBE_TIMEOUT = 15.0
+
+EVENTS = counter('pokebinder_realtime_events_total', 'Mudanças da tabela cards recebidas pelo listener')
+CONNECTED = gauge('pokebinder_realtime_connected', 'Listener de mudanças conectado (1) ou não (0)')
+
+_started = None
+_start_lock = threading.Lock()
+
+
+def normalize_change(change_type, record=None, old_record=None, commit_timestamp=None):
+    """Evento no formato aceito por binder_cache.apply_change()"""
+    return {
+        'type': str(change_type).upper(),
+        'record': record or {},
+        'old_record': old_record or {},
+        'commit_timestamp': commit_timestamp,
+    }
+
+
+class LocalChangeFeed:
+    """
+    Fonte em memória para verificações
+
+    publish() é chamado de fora do event loop (ex.: thread da página) e só
+    retorna depois que o evento foi aplicado nos caches.
+    """
+
+    name = 'local'
+
+    def __init__(self):
+        self._queue = None
+
+    def publish(self, change_type, record=None, old_record=None):
+        async_data.run(self._publish(normalize_change(change_type, record, old_record)))
+
+    async def _publish(self, change):
+        if self._queue is not None:
+            self._queue.put_nowait(change)
+            await self._queue.join()
+
+    async def run(self, on_change, on_status):
+        self._queue = asyncio.Queue()
+        on_status(True)
+        while True:
+            change = await self._queue.get()
+            try:
+                on_change(change)
+            finally:
+                self._queue.task_done()
+
+
+class SupabaseRealtimeSource:
+    """postgres_changes da tabela cards via Supabase Realtime (websocket)"""
+
+    name = 'supabase'
+
+    def __init__(self, url=SUPABASE_URL, key=SUPABASE_KEY, table='cards', schema='public'):
+        self.url = url
+        self.key = key
+        self.table = table
+        self.schema = schema
+
+    async def run(self, on_change, on_status):
+        from realtime import AsyncRealtimeClient, RealtimePostgresChangesListenEvent, RealtimeSubscribeStates
+
+        # A reconexão fica com o supervisor: cliente novo a cada tentativa
+        client = AsyncRealtimeClient(f"{self.url}/realtime/v1", self.key, auto_reconnect=False)
+        failed = asyncio.Event()
+        subscribed = asyncio.Event()
+
+        def on_payload(payload):
+            data = payload['data']
+            on_change(normalize_change(data['type'], data.get('record'), data.get('old_record'),
+                                       data.get('commit_timestamp')))
+
+        def on_subscribe(state, error):
+            if state == RealtimeSubscribeStates.SUBSCRIBED:
+                subscribed.set()
+            else:
+                failed.set()
+
+        try:
+            await client.connect()
+            channel = client.channel(f"pokebinder-{self.table}")
+            channel.on_postgres_changes(RealtimePostgresChangesListenEvent.All, on_payload,
+                                        table=self.table, schema=self.schema)
+            await channel.subscribe(on_subscribe)
+            await asyncio.wait_for(subscribed.wait(), SUBSCRIBE_TIMEOUT)
+            on_status(True)
+
+            while not failed.is_set():
+                # A tarefa de leitura do cliente termina quando o websocket fecha
+                listen_task = client._listen_task
+                if listen_task is None or listen_task.done():
+                    break
+                await asyncio.sleep(1)
+            raise ConnectionError("Conexão com o Supabase Realtime encerrada")
+        finally:
+            await client.close()
+
+
+class PgNotifySource:
+    """LISTEN/NOTIFY do Postgres (trigger notify_card_change da migration 003)"""
+
+    name = 'pg'
+
+    def __init__(self, dsn=None, channel=NOTIFY_CHANNEL):
+        self.dsn = dsn or os.getenv("DATABASE_URL")
+        self.channel = channel
+
+    async def run(self, on_change, on_status):
+        import psycopg
+
+        if not self.dsn:
+            raise RuntimeError("DATABASE_URL não configurada para REALTIME_SOURCE=pg")
+        async with await psycopg.AsyncConnection.connect(self.dsn, autocommit=True) as connection:
+            await connection.execute(f"LISTEN {self.channel}")
+            on_status(True)
+            async for notify in connection.notifies():
+                payload = json.loads(notify.payload)
+                on_change(normalize_change(payload.get('type'), payload.get('record'),
+                                           payload.get('old_record'), payload.get('commit_timestamp')))
+
+
+SOURCES = {
+    'supabase': SupabaseRealtimeSource,
+    'pg': PgNotifySource,
+}
+
+
+def source_from_env():
+    """Fonte configurada em REALTIME_SOURCE (ou None se desativado)"""
+    if REALTIME_SOURCE in ('', 'off', '0', 'false'):
+        return None
+    if REALTIME_SOURCE not in SOURCES:
+        print(f"⚠️ REALTIME_SOURCE desconhecida: {REALTIME_SOURCE}")
+        return None
+    if REALTIME_SOURCE == 'supabase' and not SUPABASE_URL:
+        return None
+    return SOURCES[REALTIME_SOURCE]()
+
+
+def _on_change(change):
+    EVENTS.inc(type=change['type'])
+    binder_cache.apply_change(change)
+
+
+async def _supervise(source):
+    """Mantém a fonte conectada, com backoff exponencial e jitter entre tentativas"""
+    delay = RECONNECT_MIN
+
+    def on_status(connected):
+        nonlocal delay
+        CONNECTED.set(1 if connected else 0, source=source.name)
+        binder_cache.set_live(connected)
+        if connected:
+            delay = RECONNECT_MIN
+
+    while True:
+        try:
+            await source.run(_on_change, on_status)
+        except asyncio.CancelledError:
+            on_status(False)
+            raise
+        except Exception as e:
+            print(f"⚠️ Listener de mudanças ({source.name}) desconectado: {type(e).__name__}: {e}")
+        on_status(False)
+        await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+        delay = min(delay * 2, RECONNECT_MAX)
+
+
+def start(source=None):
+    """
+    Inicia o listener no event loop de async_data (uma vez por processo)
+
+    Args:
+        source: Fonte de eventos; None usa a configurada em REALTIME_SOURCE
+
+    Returns:
+        concurrent.futures.Future | None: Tarefa do listener, ou None se desativado
+    """
+    global _started
+    with _start_lock:
+        if _started is not None:
+            return _started
+        source = source or source_from_env()
+        if source is None:
+            return None
+        _started = asyncio.run_coroutine_threadsafe(_supervise(source), async_data._get_loop())
+    return _started
+
+
+def stop():
+    """Encerra o listener (o cache volta ao intervalo curto de deltas)"""
+    global _started
+    with _start_lock:
+        if _started is not None:
+            _started.cancel()
+            _started = None
@@ -0,0 +1,314 @@
+"""
+Timeouts, novas tentativas e circuit breakers das chamadas externas
+
+    timeout     cada chamada tem prazo próprio por classe (leitura, gravação,
+                upload, Admin API), em vez de ficar presa indefinidamente
+    tentativas  falhas transitórias (conexão, timeout, 429/502/503/504) são
+                repetidas com backoff exponencial e jitter completo, mas só
+                em chamadas idempotentes: GET/HEAD do PostgREST e chamadas do
+                Cloudinary com public_id fixo. INSERT e UPDATE condicional
+                nunca são repetidos (a resposta perdida pode ter sido gravada)
+    circuito    depois de CIRCUIT_FAILURES falhas transitórias seguidas de uma
+                dependência, as chamadas a ela falham na hora com CircuitOpen
+                durante CIRCUIT_RESET segundos; então uma chamada de teste
+                decide se o circuito fecha ou abre de novo
+
+Com o circuito aberto, as leituras que têm cópia local (binders do
+binder_cache, card do formulário de edição) seguem com os dados em cache
+em vez de esvaziar a página; is_unavailable() identifica esse caso.
+
+As chamadas do Supabase passam por aqui no transporte httpx
+(resilient_transport, por fora do limitador: cada nova tentativa disputa
+vaga de novo); as do SDK do Cloudinary usam call().
+"""
+
+import asyncio
+import functools
+import os
+import random
+import sys
+import threading
+import time
+
+from limiter import request_kind
+from metrics import counter, gauge
+
+# Prazo de cada chamada por classe (segundos)
+TIMEOUTS = {
+    'read': float(os.getenv("TIMEOUT_READ", "10")),
+    'write': float(os.getenv("TIMEOUT_WRITE", "15")),
+    'upload': float(os.getenv("TIMEOUT_UPLOAD", "60")),
+    'admin': float(os.getenv("TIMEOUT_ADMIN", "15")),
+}
+
+# Tentativas extras e backoff (base * 2^tentativa, limitado a BACKOFF_CAP, com jitter completo)
+RETRIES = int(os.getenv("RETRY_ATTEMPTS", "2"))
+BACKOFF_BASE = 0.2
+BACKOFF_CAP = 5.0
+
+# Circuit breaker: falhas seguidas para abrir e segundos até a chamada de teste
+CIRCUIT_FAILURES = int(os.getenv("CIRCUIT_FAILURES", "5"))
+CIRCUIT_RESET = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+# Respostas HTTP que indicam falha transitória
+RETRY_STATUSES = {429, 502, 503, 504}
+
+CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+RETRIES_TOTAL = counter('pokebinder_backend_retries_total', 'Novas tentativas de chamadas externas')
+CIRCUIT_STATE = gauge('pokebinder_circuit_state', 'Estado do circuito (0 fechado, 1 teste, 2 aberto)')
+CIRCUIT_REJECTED = counter('pokebinder_circuit_rejected_total', 'Chamadas recusadas com o circuito aberto')
+STALE_READS = counter('pokebinder_stale_reads_total', 'Leituras atendidas com dados em cache por falha da dependência')
+
+
+class CircuitOpen(Exception):
+    """Dependência fora do ar: chamada recusada sem tentar"""
+
+    def __init__(self, backend, retry_in):
+        super().__init__(f"{backend.capitalize()} indisponível no momento: tente novamente em {retry_in:.0f}s")
+        self.backend = backend
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Circuito por dependência (fechado -> aberto -> teste -> fechado)"""
+
+    def __init__(self, backend, failures=CIRCUIT_FAILURES, reset=CIRCUIT_RESET):
+        self.backend = backend
+        self.failures = failures
+        self.reset = reset
+        self.state = CLOSED
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set(0, backend=backend)
+
+    def _set_state(self, state):
+        self.state = state
+        CIRCUIT_STATE.set(_STATE_VALUES[state], backend=self.backend)
+
+    def allow(self):
+        """Libera a chamada ou levanta CircuitOpen"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            retry_in = self.opened_at + self.reset - time.monotonic()
+            if self.state == OPEN and retry_in <= 0:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                # Uma chamada de teste por vez
+                self._probing = True
+                return
+            CIRCUIT_REJECTED.inc(backend=self.backend)
+            raise CircuitOpen(self.backend, max(retry_in, 0))
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.consecutive >= self.failures:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def release(self):
+        """Chamada terminou sem dizer nada sobre a dependência (ex.: 404)"""
+        with self._lock:
+            self._probing = False
+
+
+BREAKERS = {
+    'supabase': CircuitBreaker('supabase'),
+    'cloudinary': CircuitBreaker('cloudinary'),
+    # Cache compartilhado (shared_cache): com o L2 fora, cada réplica segue só com o próprio cache
+    'redis': CircuitBreaker('redis'),
+}
+
+
+def backoff(attempt):
+    """Espera antes da tentativa seguinte (jitter completo)"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def is_transient(exc):
+    """Falha que pode passar sozinha (rede, timeout, sobrecarga do provedor)"""
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    httpx = sys.modules.get('httpx')
+    if httpx is not None and isinstance(exc, httpx.TransportError):
+        return True
+    errors = sys.modules.get('cloudinary.exceptions')
+    if errors is not None and isinstance(exc, (errors.GeneralError, errors.RateLimited)):
+        # GeneralError: 500/503, erro de socket ou timeout do urllib3
+        return True
+    return False
+
+
+def is_unavailable(exc):
+    """A dependência está fora (vale a pena cair para dados em cache)"""
+    return isinstance(exc, CircuitOpen) or is_transient(exc)
+
+
+def record_stale(source):
+    """Conta uma leitura atendida com dados em cache"""
+    STALE_READS.inc(source=source)
+
+
+def call(backend, function, *args, idempotent=False, retries=RETRIES, **kwargs):
+    """
+    Executa uma chamada síncrona com circuito e novas tentativas
+
+    Args:
+        backend: 'supabase' ou 'cloudinary'
+        function: Chamada a executar (recebe args/kwargs)
+        idempotent: Pode ser repetida sem efeito duplicado
+        retries: Tentativas extras em falhas transitórias
+
+    Raises:
+        CircuitOpen: dependência fora, chamada não tentada
+    """
+    breaker = BREAKERS[backend]
+    attempts = retries + 1 if idempotent else 1
+    for attempt in range(attempts):
+        breaker.allow()
+        try:
+            result = function(*args, **kwargs)
+        except Exception as e:
+            if not is_transient(e):
+                breaker.release()
+                raise
+            if type(e).__name__ == 'RateLimited':
+                # Limite de taxa, não dependência fora
+                breaker.release()
+            else:
+                breaker.record_failure()
+            if attempt + 1 >= attempts:
+                raise
+            RETRIES_TOTAL.inc(backend=backend, error=type(e).__name__)
+            time.sleep(backoff(attempt))
+            continue
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+        return result
+
+
+def _retry_after(response):
+    """Segundos pedidos pelo servidor em Retry-After (ou None)"""
+    try:
+        return min(float(response.headers.get('retry-after')), BACKOFF_CAP)
+    except (TypeError, ValueError):
+        return None
+
+
+def _with_timeout(request):
+    """Aplica o prazo da classe da requisição (leitura ou gravação)"""
+    seconds = TIMEOUTS[request_kind(request)]
+    request.extensions = {**request.extensions,
+                          'timeout': {'connect': seconds, 'read': seconds, 'write': seconds, 'pool': seconds}}
+    return request
+
+
+def _outcome(breaker, response):
+    """Registra a resposta no circuito; True se vale outra tentativa"""
+    if response.status_code in RETRY_STATUSES:
+        if response.status_code != 429:
+            # 429 é limite de taxa, não dependência fora
+            breaker.record_failure()
+        else:
+            breaker.release()
+        return True
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return False
+
+
+@functools.cache
+def _transport_classes():
+    import httpx
+
+    class ResilientTransport(httpx.BaseTransport):
+        def __init__(self, transport, backend):
+            self._transport = transport
+            self._breaker = BREAKERS[backend]
+            self._backend = backend
+
+        def handle_request(self, request):
+            _with_timeout(request)
+            attempts = RETRIES + 1 if request.method in ('GET', 'HEAD') else 1
+            for attempt in range(attempts):
+                self._breaker.allow()
+                try:
+                    response = self._transport.handle_request(request)
+                except httpx.TransportError as e:
+                    self._breaker.record_failure()
+                    if attempt + 1 >= attempts:
+                        raise
+                    RETRIES_TOTAL.inc(backend=self._backend, error=type(e).__name__)
+                    time.sleep(backoff(attempt))
+                    continue
+                except BaseException:
+                    self._breaker.release()
+                    raise
+                if not _outcome(self._breaker, response) or attempt + 1 >= attempts:
+                    return response
+                response.close()
+                RETRIES_TOTAL.inc(backend=self._backend, error=str(response.status_code))
+                time.sleep(_retry_after(response) or backoff(attempt))
+
+        def close(self):
+            self._transport.close()
+
+    class AsyncResilientTransport(httpx.AsyncBaseTransport):
+        def __init__(self, transport, backend):
+            self._transport = transport
+            self._breaker = BREAKERS[backend]
+            self._backend = backend
+
+        async def handle_async_request(self, request):
+            _with_timeout(request)
+            attempts = RETRIES + 1 if request.method in ('GET', 'HEAD') else 1
+            for attempt in range(attempts):
+                self._breaker.allow()
+                try:
+                    response = await self._transport.handle_async_request(request)
+                except httpx.TransportError as e:
+                    self._breaker.record_failure()
+                    if attempt + 1 >= attempts:
+                        raise
+                    RETRIES_TOTAL.inc(backend=self._backend, error=type(e).__name__)
+                    await asyncio.sleep(backoff(attempt))
+                    continue
+                except BaseException:
+                    self._breaker.release()
+                    raise
+                if not _outcome(self._breaker, response) or attempt + 1 >= attempts:
+                    return response
+                await response.aclose()
+                RETRIES_TOTAL.inc(backend=self._backend, error=str(response.status_code))
+                await asyncio.sleep(_retry_after(response) or backoff(attempt))
+
+        async def aclose(self):
+            await self._transport.aclose()
+
+    return ResilientTransport, AsyncResilientTransport
+
+
+def resilient_transport(transport, backend='supabase'):
+    """Envolve um transporte httpx (síncrono ou assíncrono) com prazo, tentativas e circuito"""
+    import httpx
+    sync_class, async_class = _transport_classes()
+    if isinstance(transport, httpx.AsyncBaseTransport):
+        return async_class(transport, backend)
+    return sync_class(transport, backend)
@@ -1,85 +1,236 @@
 #!/usr/bin/env python3
 """
 Script para executar migrations do banco de dados
+
+As migrations aplicadas ficam registradas na tabela `schema_migrations`
+(versão + checksum). Cada migration pendente é aplicada pela função
+`apply_migration`, que roda em uma única transação protegida por um
+advisory lock do Postgres, então execuções concorrentes não se atropelam.
+Quando não há nada pendente, a inicialização custa uma única consulta.
+
+apply_migration executa SQL arbitrário como dono do banco, então só a
+service role pode chamá-la (SUPABASE_SERVICE_ROLE_KEY): a chave anon lê o
+ledger, mas não aplica migrations.
 """
 
+import hashlib
 import os
 import sys
-from config import supabase
+from config import get_supabase, create_supabase_client, SUPABASE_SERVICE_ROLE_KEY
+
+MIGRATIONS_DIR = "migrations"
+
+# Códigos de erro de tabela inexistente (Postgres e cache de schema do PostgREST)
+MISSING_TABLE_CODES = {'42P01', 'PGRST205'}
+
+_service_client = None
+
+# Tabela de controle e função que aplica uma migration de forma atômica
+LEDGER_SETUP_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version TEXT PRIMARY KEY,
+    checksum TEXT NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE schema_migrations ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Public can view schema migrations" ON schema_migrations;
+CREATE POLICY "Public can view schema migrations" ON schema_migrations
+    FOR SELECT USING (true);
+
+CREATE OR REPLACE FUNCTION apply_migration(p_version text, p_checksum text, p_sql text)
+RETURNS text
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    existing_checksum text;
+BEGIN
+    -- Serializa runners concorrentes até o fim da transação
+    PERFORM pg_advisory_xact_lock(hashtext('schema_migrations'));
+
+    SELECT checksum INTO existing_checksum FROM schema_migrations WHERE version = p_version;
+    IF FOUND THEN
+        IF existing_checksum <> p_checksum THEN
+            RAISE EXCEPTION 'Migration % já aplicada com checksum diferente', p_version;
+        END IF;
+        RETURN 'skipped';
+    END IF;
+
+    EXECUTE p_sql;
+    INSERT INTO schema_migrations (version, checksum) VALUES (p_version, p_checksum);
+    RETURN 'applied';
+END;
+$$;
+
+-- O Postgres concede EXECUTE a PUBLIC por padrão: sem isso, qualquer um com a
+-- chave anon rodaria SQL como dono do banco por /rpc/apply_migration
+REVOKE EXECUTE ON FUNCTION apply_migration(text, text, text) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION apply_migration(text, text, text) TO service_role;
+"""
+
+def migration_checksum(sql_content):
+    """Calcula o checksum de uma migration (independente de CRLF/LF)"""
+    normalized = sql_content.replace('\r\n', '\n').strip()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+def load_migration(migration_file):
+    """Lê um arquivo de migration e retorna (versão, checksum, sql)"""
+    with open(migration_file, 'r', encoding='utf-8') as f:
+        sql_content = f.read()
+    version = os.path.splitext(os.path.basename(migration_file))[0]
+    return version, migration_checksum(sql_content), sql_content
+
+def list_migration_files(migrations_dir=MIGRATIONS_DIR):
+    """Lista os arquivos de migration em ordem"""
+    if not os.path.exists(migrations_dir):
+        return []
+    return sorted(
+        os.path.join(migrations_dir, file)
+        for file in os.listdir(migrations_dir)
+        if file.endswith('.sql')
+    )
+
+def get_service_client():
+    """Cliente com a service role (o único que pode chamar apply_migration)"""
+    global _service_client
+    if _service_client is None:
+        if not SUPABASE_SERVICE_ROLE_KEY:
+            raise ValueError("SUPABASE_SERVICE_ROLE_KEY não configurada: necessária para aplicar migrations")
+        _service_client = create_supabase_client(SUPABASE_SERVICE_ROLE_KEY)
+    return _service_client
+
+def is_missing_table(error):
+    """Erro do PostgREST de tabela inexistente"""
+    return getattr(error, 'code', None) in MISSING_TABLE_CODES
+
+def setup_ledger():
+    """Cria a tabela schema_migrations e a função apply_migration"""
+    get_service_client().rpc('exec_sql', {'sql': LEDGER_SETUP_SQL}).execute()
+
+def fetch_applied_migrations():
+    """
+    Busca as migrations já aplicadas (uma única consulta)
+
+    Returns:
+        dict: versão -> checksum
+    """
+    try:
+        result = get_supabase().table('schema_migrations').select('version, checksum').execute()
+    except Exception as e:
+        if not is_missing_table(e):
+            raise
+        # Primeira execução: a tabela de controle ainda não existe
+        print("🔧 Criando tabela de controle schema_migrations...")
+        setup_ledger()
+        result = get_supabase().table('schema_migrations').select('version, checksum').execute()
+    return {row['version']: row['checksum'] for row in (result.data or [])}
 
 def run_migration(migration_file):
-    """Executa um arquivo de migration"""
+    """Aplica um arquivo de migration via apply_migration (transação + lock)"""
     try:
-        with open(migration_file, 'r', encoding='utf-8') as f:
-            sql_content = f.read()
-        
+        version, checksum, sql_content = load_migration(migration_file)
+
         print(f"Executando migration: {migration_file}")
-        
-        # Executar o SQL
-        result = supabase.rpc('exec_sql', {'sql': sql_content}).execute()
-        
-        print(f"✅ Migration {migration_file} executada com sucesso!")
+
+        result = get_service_client().rpc('apply_migration', {
+            'p_version': version,
+            'p_checksum': checksum,
+            'p_sql': sql_content
+        }).execute()
+
+        if result.data == 'skipped':
+            print(f"⏭️  Migration {version} já havia sido aplicada por outro processo")
+        else:
+            print(f"✅ Migration {migration_file} executada com sucesso!")
         return True
-        
+
     except Exception as e:
         print(f"❌ Erro ao executar migration {migration_file}: {str(e)}")
         return False
 
-def run_all_migrations():
-    """Executa todas as migrations na ordem"""
-    migrations_dir = "migrations"
-    
-    if not os.path.exists(migrations_dir):
-        print(f"❌ Diretório {migrations_dir} não encontrado")
-        return False
-    
-    # Listar arquivos de migration em ordem
-    migration_files = []
-    for file in os.listdir(migrations_dir):
-        if file.endswith('.sql'):
-            migration_files.append(os.path.join(migrations_dir, file))
-    
-    migration_files.sort()  # Ordenar por nome
-    
+def run_pending_migrations(migrations_dir=MIGRATIONS_DIR):
+    """
+    Aplica apenas as migrations pendentes, na ordem
+
+    Returns:
+        bool: True se o banco ficou atualizado
+    """
+    migration_files = list_migration_files(migrations_dir)
     if not migration_files:
-        print("❌ Nenhum arquivo de migration encontrado")
+        print(f"❌ Nenhum arquivo de migration encontrado em {migrations_dir}")
+        return False
+
+    try:
+        applied = fetch_applied_migrations()
+    except Exception as e:
+        print(f"❌ Erro ao consultar schema_migrations: {str(e)}")
         return False
-    
+
+    pending = []
+    for migration_file in migration_files:
+        version, checksum, _ = load_migration(migration_file)
+        if version not in applied:
+            pending.append(migration_file)
+        elif applied[version] != checksum:
+            print(f"❌ Migration {version} foi alterada depois de aplicada (checksum diferente)")
+            print("   Crie uma nova migration em vez de editar uma já aplicada")
+            return False
+
+    if not pending:
+        print(f"✅ Banco atualizado ({len(applied)} migrations aplicadas, nenhuma pendente)")
+        return True
+
     print(f"🎴 MyPokeBinder - Executando Migrations")
     print("=" * 50)
-    
+
     success_count = 0
-    total_count = len(migration_files)
-    
-    for migration_file in migration_files:
+    for migration_file in pending:
         if run_migration(migration_file):
             success_count += 1
         else:
             print(f"⚠️  Parando execução devido a erro na migration {migration_file}")
             break
-    
+
     print("=" * 50)
-    print(f"📊 Resultado: {success_count}/{total_count} migrations executadas com sucesso")
-    
-    if success_count == total_count:
+    print(f"📊 Resultado: {success_count}/{len(pending)} migrations pendentes aplicadas")
+
+    if success_count == len(pending):
         print("🎉 Todas as migrations foram executadas com sucesso!")
         return True
     else:
         print("❌ Algumas migrations falharam")
         return False
 
+def show_status(migrations_dir=MIGRATIONS_DIR):
+    """Exibe o estado de cada migration"""
+    applied = fetch_applied_migrations()
+    for migration_file in list_migration_files(migrations_dir):
+        version, checksum, _ = load_migration(migration_file)
+        if version not in applied:
+            print(f"⏳ {version} (pendente)")
+        elif applied[version] != checksum:
+            print(f"⚠️  {version} (alterada depois de aplicada)")
+        else:
+            print(f"✅ {version}")
+
 def main():
     """Função principal"""
+    if len(sys.argv) > 1 and sys.argv[1] == '--status':
+        show_status()
+        return True
     if len(sys.argv) > 1:
         # Executar migration específica
         migration_file = sys.argv[1]
         if os.path.exists(migration_file):
-            run_migration(migration_file)
+            return run_migration(migration_file)
         else:
             print(f"❌ Arquivo de migration não encontrado: {migration_file}")
+            return False
     else:
-        # Executar todas as migrations
-        run_all_migrations()
+        # Executar as migrations pendentes
+        return run_pending_migrations()
 
 if __name__ == "__main__":
-    main()
+    sys.exit(0 if main() else 1)
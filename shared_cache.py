@@ -0,0 +1,244 @@
+"""
+Cache compartilhado entre réplicas (dois níveis)
+
+    L1  LRU em memória do processo, na frente do L2 (entradas pequenas e
+        muito lidas, como o diretório de usuários e as estatísticas)
+    L2  cache de rede com protocolo Redis (Redis, Valkey, KeyDB...), comum
+        a todas as réplicas do app.py, do public_app.py e da API
+
+As chaves levam a versão do conjunto de dados ("pokebinder:summary:v42").
+Cada gravação de card incrementa a versão (bump), então nenhuma réplica
+precisa apagar nada: as chaves antigas deixam de ser lidas e expiram pelo
+TTL. A mesma versão diz ao binder_cache de cada réplica se houve gravação
+desde a última sincronização (sem gravação, o delta não é consultado).
+
+SHARED_CACHE_URL:
+    (vazio)      desligado: cada processo só com o próprio cache
+    memory://    stand-in local em memória, com a mesma interface do L2
+                 (verificações e desenvolvimento com uma réplica)
+    redis://...  servidor compatível com Redis (requer o pacote opcional redis)
+
+Falhas do L2 nunca derrubam a página: a leitura vira miss, a gravação é
+ignorada e a versão fica desconhecida (o binder_cache volta aos deltas
+por intervalo). Com o circuito 'redis' aberto (resilience) o L2 nem é
+consultado.
+
+Todo o estado vive no event loop de async_data, como o binder_cache.
+"""
+
+import json
+import os
+import time
+import zlib
+from collections import OrderedDict
+
+from metrics import counter, observe
+from resilience import BREAKERS, CircuitOpen
+
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL", "")
+
+# Prefixo das chaves no L2 (várias instalações podem dividir o servidor)
+KEY_PREFIX = os.getenv("SHARED_CACHE_PREFIX", "pokebinder:")
+
+# TTL das entradas no L2 e no L1 (segundos)
+L2_TTL = int(os.getenv("SHARED_CACHE_TTL", "3600"))
+L1_TTL = 60
+
+# Entradas no L1 do processo
+L1_MAX_ENTRIES = int(os.getenv("SHARED_CACHE_L1_ENTRIES", "128"))
+
+# Por quanto tempo uma versão lida do L2 é reaproveitada (segundos)
+VERSION_TTL = float(os.getenv("SHARED_CACHE_VERSION_TTL", "1"))
+
+# Prazo de cada operação no L2 (segundos): o L2 é um atalho, não pode atrasar a página
+L2_TIMEOUT = 0.5
+
+HITS = counter('pokebinder_shared_cache_hits_total', 'Leituras atendidas pelo cache compartilhado')
+MISSES = counter('pokebinder_shared_cache_misses_total', 'Leituras que não acharam a chave no cache compartilhado')
+ERRORS = counter('pokebinder_shared_cache_errors_total', 'Falhas do L2 (tratadas como miss)')
+
+# Resultado de um comando que falhou (diferente de None, que é "chave ausente")
+FAILED = object()
+
+_store = None
+_l1 = OrderedDict()
+_versions = {}
+
+
+class MemoryStore:
+    """Stand-in do L2 em memória (subconjunto assíncrono da API do redis-py)"""
+
+    def __init__(self):
+        self.data = {}
+
+    def _live(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    async def get(self, key):
+        return self._live(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    async def incr(self, key):
+        value = int(self._live(key) or 0) + 1
+        self.data[key] = (str(value).encode(), None)
+        return value
+
+
+def enabled():
+    return bool(SHARED_CACHE_URL)
+
+
+def _get_store():
+    """Cliente do L2, criado no primeiro uso (dentro do event loop de async_data)"""
+    global _store
+    if _store is None:
+        if SHARED_CACHE_URL.startswith('memory://'):
+            _store = MemoryStore()
+        else:
+            import redis.asyncio as redis
+            _store = redis.from_url(SHARED_CACHE_URL, socket_timeout=L2_TIMEOUT,
+                                    socket_connect_timeout=L2_TIMEOUT)
+    return _store
+
+
+async def _call(operation, *args, **kwargs):
+    """Executa um comando no L2; FAILED (e contagem de erro) se falhar"""
+    breaker = BREAKERS['redis']
+    try:
+        breaker.allow()
+    except CircuitOpen:
+        return FAILED
+    try:
+        with observe('redis', operation) as obs:
+            result = await getattr(_get_store(), operation)(*args, **kwargs)
+            if isinstance(result, bytes):
+                obs.add_bytes(len(result))
+    except Exception as e:
+        breaker.record_failure()
+        ERRORS.inc(operation=operation, error=type(e).__name__)
+        return FAILED
+    breaker.record_success()
+    return result
+
+
+def encode(value):
+    return zlib.compress(json.dumps(value, separators=(',', ':'), default=str).encode('utf-8'), 1)
+
+
+def decode(payload):
+    return json.loads(zlib.decompress(payload))
+
+
+def _key(name, version):
+    return f"{KEY_PREFIX}{name}:v{version}"
+
+
+def _l1_get(key):
+    entry = _l1.get(key)
+    if entry is None:
+        return None
+    expires_at, value = entry
+    if expires_at <= time.monotonic():
+        del _l1[key]
+        return None
+    _l1.move_to_end(key)
+    return value
+
+
+def _l1_put(key, value):
+    _l1[key] = (time.monotonic() + L1_TTL, value)
+    _l1.move_to_end(key)
+    while len(_l1) > L1_MAX_ENTRIES:
+        _l1.popitem(last=False)
+
+
+async def version(namespace):
+    """
+    Versão atual de um conjunto de dados (ex.: 'cards')
+
+    Returns:
+        int: Versão (0 se nunca houve bump) ou None (cache desligado ou L2 fora)
+    """
+    if not enabled():
+        return None
+    cached = _versions.get(namespace)
+    if cached is not None and time.monotonic() - cached[0] < VERSION_TTL:
+        return cached[1]
+    key = f"{KEY_PREFIX}version:{namespace}"
+    value = await _call('get', key)
+    if value is FAILED:
+        return None
+    current = int(value or 0)
+    _versions[namespace] = (time.monotonic(), current)
+    return current
+
+
+async def bump(namespace):
+    """Nova versão de um conjunto de dados (chamado a cada gravação)"""
+    if not enabled():
+        return None
+    value = await _call('incr', f"{KEY_PREFIX}version:{namespace}")
+    if value is FAILED:
+        _versions.pop(namespace, None)
+        return None
+    _versions[namespace] = (time.monotonic(), int(value))
+    return int(value)
+
+
+async def get(name, version, local=True):
+    """
+    Valor de uma chave versionada (L1 e depois L2)
+
+    Args:
+        name: Nome da entrada (ex.: 'summary', 'binder:a@b.com')
+        version: Versão do conjunto de dados (de version())
+        local: Guarda no L1 ao achar no L2 (desligar para valores grandes
+               que o chamador já mantém em memória)
+    """
+    if not enabled() or version is None:
+        return None
+    key = _key(name, version)
+    value = _l1_get(key)
+    if value is not None:
+        HITS.inc(level='l1')
+        return value
+    payload = await _call('get', key)
+    if payload is FAILED or payload is None:
+        MISSES.inc()
+        return None
+    value = decode(payload)
+    HITS.inc(level='l2')
+    if local:
+        _l1_put(key, value)
+    return value
+
+
+async def put(name, version, value, local=True, ttl=L2_TTL):
+    """Grava uma chave versionada no L2 (e no L1)"""
+    if not enabled() or version is None:
+        return
+    key = _key(name, version)
+    if local:
+        _l1_put(key, value)
+    await _call('set', key, encode(value), ex=ttl)
+
+
+def bump_sync(namespace):
+    """Versão síncrona de bump() (gravações do app)"""
+    if not enabled():
+        return None
+    import async_data
+    return async_data.run(bump(namespace))
+
+
+def clear():
+    """Esvazia o L1 e as versões conhecidas (o L2 é compartilhado e fica como está)"""
+    _l1.clear()
+    _versions.clear()
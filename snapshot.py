@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Exporta as páginas públicas dos binders como arquivos estáticos
+
+Para cada usuário com cards são gerados, em SNAPSHOT_DIR:
+    users/<slug>/index.html   página pronta para servir (sem Streamlit)
+    users/<slug>/cards.json   mesmos dados em JSON (com URLs de miniatura)
+    index.html                diretório de usuários
+    manifest.json             versão de cada binder exportado
+
+A geração é incremental: uma consulta leve (id, email, número e datas)
+calcula a versão de cada binder a partir de updated_at/created_at, e apenas
+os binders cuja versão mudou são baixados e regenerados. Binders que ficaram
+vazios são removidos (depois de uma consulta por email confirmar que não
+há mais cards). Os arquivos são gravados de forma atômica, então um
+servidor estático ou uma CDN sincronizando a pasta nunca lê arquivo pela metade.
+
+Uso:
+    python snapshot.py                  # exporta o que mudou
+    python snapshot.py --force          # regenera tudo
+    python snapshot.py --user a@b.com   # apenas um usuário
+    python snapshot.py --watch 300      # repete a cada 5 minutos
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+
+# Pasta de saída e URL pública onde ela é servida (opcional)
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_BASE_URL = os.getenv("SNAPSHOT_BASE_URL", "")
+
+# Link para a versão interativa
+LIVE_APP_URL = "https://mypokebinder.streamlit.app/"
+
+# Transformação das miniaturas (mesmo tamanho do grid do app)
+THUMBNAIL_TRANSFORMATION = "c_fill,w_300,h_300,q_auto,f_auto"
+
+MANIFEST_FILE = "manifest.json"
+
+# Colunas da consulta leve usada para detectar mudanças
+VERSION_COLUMNS = "id,user_email,number,created_at,updated_at"
+
+# Colunas exportadas de cada card
+EXPORTED_FIELDS = ('id', 'name', 'number', 'language', 'estimated_value', 'description',
+                   'image_url', 'created_at', 'updated_at')
+
+
+def user_slug(user_email):
+    """Nome de pasta estável e seguro para URL a partir do email"""
+    email = user_email.strip().lower()
+    readable = re.sub(r'[^a-z0-9]+', '-', email.split('@')[0]).strip('-') or 'binder'
+    digest = hashlib.sha256(email.encode('utf-8')).hexdigest()[:10]
+    return f"{readable}-{digest}"
+
+
+def snapshot_url(user_email):
+    """URL pública do snapshot de um usuário (ou None se SNAPSHOT_BASE_URL não estiver definido)"""
+    if not SNAPSHOT_BASE_URL:
+        return None
+    return f"{SNAPSHOT_BASE_URL.rstrip('/')}/users/{user_slug(user_email)}/"
+
+
+def thumbnail_url(image_url):
+    """Acrescenta a transformação de miniatura a uma URL de upload do Cloudinary"""
+    if not image_url or '/upload/' not in image_url:
+        return image_url
+    return image_url.replace('/upload/', f"/upload/{THUMBNAIL_TRANSFORMATION}/", 1)
+
+
+def binder_versions(rows):
+    """
+    Agrupa as linhas leves por usuário e calcula a versão de cada binder
+
+    Returns:
+        dict: email -> versão (muda quando um card é incluído, alterado ou removido)
+    """
+    from card_grid import dataset_version
+
+    by_user = {}
+    for row in rows:
+        if row.get('user_email'):
+            by_user.setdefault(row['user_email'], []).append(row)
+    return {
+        email: dataset_version(sorted(cards, key=lambda card: str(card.get('id'))))
+        for email, cards in by_user.items()
+    }
+
+
+def _write_atomic(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+
+def _format_value(value):
+    return f"R$ {float(value or 0):.2f}"
+
+
+def _binder_stats(cards):
+    return {
+        'total_cards': len(cards),
+        'total_value': round(sum(float(card.get('estimated_value') or 0) for card in cards), 2),
+        'languages': sorted({card.get('language') or '' for card in cards} - {''}),
+    }
+
+
+_PAGE_STYLE = """
+body { font-family: system-ui, sans-serif; margin: 0 auto; max-width: 1200px; padding: 1.5rem; color: #262730; }
+header p, footer { color: #555; }
+.stats { display: flex; gap: 2rem; flex-wrap: wrap; margin: 1rem 0 2rem; }
+.stats div { font-size: 1.4rem; } .stats span { display: block; font-size: .85rem; color: #666; }
+.grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(200px, 1fr)); gap: 1.25rem; }
+.card { border: 1px solid #e6e6e6; border-radius: .5rem; padding: .75rem; }
+.card img { width: 100%; aspect-ratio: 1; object-fit: cover; border-radius: .25rem; }
+.card h3 { font-size: 1rem; margin: .5rem 0 .25rem; } .card p { margin: .15rem 0; font-size: .9rem; }
+ul.users { columns: 2; }
+"""
+
+
+def _page(title, body):
+    return (
+        "<!DOCTYPE html>\n<html lang=\"pt-BR\">\n<head>\n<meta charset=\"utf-8\">\n"
+        "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">\n"
+        f"<title>{html.escape(title)}</title>\n<style>{_PAGE_STYLE}</style>\n</head>\n<body>\n"
+        f"{body}\n</body>\n</html>\n"
+    )
+
+
+def render_binder_html(user_email, cards, stats, generated_at):
+    """HTML estático do binder público de um usuário"""
+    items = []
+    for card in cards:
+        items.append(
+            "<article class=\"card\">"
+            f"<img loading=\"lazy\" src=\"{html.escape(card['thumbnail_url'] or '')}\" "
+            f"alt=\"{html.escape(card['name'] or '')}\">"
+            f"<h3>{html.escape(card['name'] or '')}</h3>"
+            f"<p>📋 Nº {html.escape(card['number'] or '')}</p>"
+            f"<p>💰 {_format_value(card['estimated_value'])}</p>"
+            f"<p>🌍 {html.escape(card['language'] or '')}</p>"
+            "</article>"
+        )
+    live_url = f"{LIVE_APP_URL}?user={html.escape(user_email)}"
+    body = (
+        f"<header><h1>🎴 Binder de {html.escape(user_email)}</h1>"
+        f"<p>Versão estática gerada em {generated_at}. "
+        f"<a href=\"{live_url}\">Abrir versão interativa</a></p></header>\n"
+        "<section class=\"stats\">"
+        f"<div>{stats['total_cards']}<span>Total de Cards</span></div>"
+        f"<div>{_format_value(stats['total_value'])}<span>Valor Total</span></div>"
+        f"<div>{len(stats['languages'])}<span>Idiomas</span></div>"
+        "</section>\n"
+        f"<main class=\"grid\">{''.join(items)}</main>\n"
+        "<footer><p><a href=\"cards.json\">cards.json</a> · <a href=\"../../index.html\">Todos os binders</a></p></footer>"
+    )
+    return _page(f"Binder de {user_email} - MyPokeBinder", body)
+
+
+def render_index_html(manifest, generated_at):
+    """HTML estático com a lista de binders exportados"""
+    entries = sorted(manifest['users'].items())
+    items = ''.join(
+        f"<li><a href=\"users/{entry['slug']}/index.html\">{html.escape(email)}</a> "
+        f"({entry['count']} cards)</li>"
+        for email, entry in entries
+    )
+    body = (
+        "<header><h1>🎴 MyPokeBinder - Binders Públicos</h1>"
+        f"<p>{len(entries)} coleções · gerado em {generated_at}</p></header>\n"
+        f"<ul class=\"users\">{items}</ul>"
+    )
+    return _page("Binders Públicos - MyPokeBinder", body)
+
+
+def export_binder(out_dir, user_email, cards, version):
+    """
+    Grava HTML e JSON do binder de um usuário
+
+    Returns:
+        dict: Entrada do manifesto (slug, versão, quantidade, data)
+    """
+    generated_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    exported = []
+    for card in sorted(cards, key=lambda c: ((c.get('name') or '').lower(), str(c.get('id')))):
+        item = {field: card.get(field) for field in EXPORTED_FIELDS}
+        item['thumbnail_url'] = thumbnail_url(card.get('image_url'))
+        exported.append(item)
+    stats = _binder_stats(exported)
+
+    slug = user_slug(user_email)
+    user_dir = os.path.join(out_dir, 'users', slug)
+    document = {
+        'user_email': user_email,
+        'version': version,
+        'generated_at': generated_at,
+        'stats': stats,
+        'cards': exported,
+    }
+    _write_atomic(os.path.join(user_dir, 'cards.json'),
+                  json.dumps(document, ensure_ascii=False, indent=2))
+    _write_atomic(os.path.join(user_dir, 'index.html'),
+                  render_binder_html(user_email, exported, stats, generated_at))
+    return {'slug': slug, 'version': version, 'count': len(exported), 'generated_at': generated_at}
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'users': {}}
+
+
+def confirmed_empty(user_email):
+    """True se uma consulta direta confirma que o usuário não tem cards ativos"""
+    import async_data
+    try:
+        cards = async_data.run(async_data.fetch_cards_after(None, user_email, 1, columns='id'))
+    except Exception as e:
+        print(f"⚠️ {user_email}: não foi possível confirmar que o binder está vazio ({e}); mantido")
+        return False
+    if cards:
+        print(f"⚠️ {user_email}: ausente da listagem mas ainda tem cards; mantido")
+        return False
+    return True
+
+
+def run_snapshot(out_dir=SNAPSHOT_DIR, only_user=None, force=False):
+    """
+    Exporta os binders que mudaram desde a última execução
+
+    Args:
+        out_dir: Pasta de saída
+        only_user: Email de um único usuário (None para todos)
+        force: Regenera mesmo sem mudança de versão
+
+    Returns:
+        dict: Contagens 'updated', 'unchanged' e 'removed'
+    """
+    import async_data
+
+    manifest = load_manifest(out_dir)
+    rows = async_data.run(async_data.fetch_card_versions(VERSION_COLUMNS, only_user))
+    versions = binder_versions(rows)
+
+    known = manifest['users']
+    changed = [email for email, version in versions.items()
+               if force or known.get(email, {}).get('version') != version]
+    scope = {only_user} if only_user else set(known)
+    removed = [email for email in scope if email in known and email not in versions]
+
+    # Baixa em paralelo apenas os binders que mudaram (cada um inteiro, em páginas)
+    if changed:
+        results = async_data.gather(**{
+            f"user_{i}": async_data.fetch_cards_paged(email) for i, email in enumerate(changed)
+        })
+        for i, email in enumerate(changed):
+            cards = results[f"user_{i}"]
+            if isinstance(cards, Exception):
+                print(f"❌ {email}: {cards}")
+                continue
+            known[email] = export_binder(out_dir, email, cards, versions[email])
+            print(f"✅ {email}: {len(cards)} cards exportados")
+
+    # Só apaga o que foi publicado depois de confirmar, por email, que o binder está vazio
+    removed = [email for email in removed if confirmed_empty(email)]
+    for email in removed:
+        shutil.rmtree(os.path.join(out_dir, 'users', known[email]['slug']), ignore_errors=True)
+        del known[email]
+        print(f"🗑️ {email}: binder vazio removido")
+
+    if changed or removed or not os.path.exists(os.path.join(out_dir, 'index.html')):
+        generated_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        manifest['generated_at'] = generated_at
+        _write_atomic(os.path.join(out_dir, 'index.html'), render_index_html(manifest, generated_at))
+        _write_atomic(os.path.join(out_dir, MANIFEST_FILE), json.dumps(manifest, ensure_ascii=False, indent=2))
+
+    return {
+        'updated': len(changed),
+        'unchanged': len(versions) - len(changed),
+        'removed': len(removed),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Exporta os binders públicos como arquivos estáticos")
+    parser.add_argument('--out', default=SNAPSHOT_DIR, help=f"pasta de saída (padrão {SNAPSHOT_DIR})")
+    parser.add_argument('--user', help="exporta apenas o binder deste email")
+    parser.add_argument('--force', action='store_true', help="regenera mesmo sem mudanças")
+    parser.add_argument('--watch', type=float, default=0, help="repete a cada N segundos")
+    return parser.parse_args()
+
+
+def main():
+    """Função principal"""
+    args = parse_args()
+    print("🎴 MyPokeBinder - Snapshot Estático")
+    print("=" * 50)
+
+    while True:
+        try:
+            summary = run_snapshot(args.out, args.user, args.force)
+        except Exception as e:
+            print(f"❌ Erro ao gerar snapshot: {e}")
+            if not args.watch:
+                return False
+        else:
+            print(f"📦 {summary['updated']} atualizados, {summary['unchanged']} sem mudança, "
+                  f"{summary['removed']} removidos → {os.path.abspath(args.out)}")
+        if not args.watch:
+            return True
+        args.force = False
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -7,6 +7,11 @@ import os
 import sys
 import subprocess
 from pathlib import Path
+from preflight import Check, run_preflight
+
+# Tempo (s) em que as conexões verificadas com sucesso (Cloudinary e Supabase)
+# ficam em cache; migrations e banco de dados são verificados a cada início
+CONNECTION_CACHE_TTL = 300
 
 def print_banner():
     """Exibe o banner do MyPokeBinder"""
@@ -78,50 +83,41 @@ def check_env_file():
     print("✅ Arquivo .env configurado corretamente")
     return True
 
-def test_connections():
-    """Testa as conexões com Cloudinary e Supabase"""
-    print("🔗 Testando conexões...")
-    
+def test_cloudinary_connection():
+    """Testa a conexão com o Cloudinary"""
     try:
-        # Testar Cloudinary
         from cloudinary_config import validate_cloudinary_connection
         cloudinary_ok = validate_cloudinary_connection()
         
-        if cloudinary_ok:
+        if cloudinary_ok is True:
             print("✅ Conexão com Cloudinary: OK")
-        else:
-            print("❌ Conexão com Cloudinary: Falhou")
-            return False
+            return True
+        print("❌ Conexão com Cloudinary: Falhou")
+        return False
     except Exception as e:
         print(f"❌ Erro ao testar Cloudinary: {e}")
         return False
-    
+
+def test_supabase_connection():
+    """Testa a conexão com o Supabase"""
     try:
-        # Testar Supabase
-        from config import supabase
+        from config import get_supabase
         # Tenta uma operação simples
-        result = supabase.auth.get_user()
+        get_supabase().auth.get_user()
         print("✅ Conexão com Supabase: OK")
+        return True
     except Exception as e:
         print(f"❌ Erro ao testar Supabase: {e}")
         return False
-    
-    return True
 
 def run_migrations():
-    """Executa as migrations do banco de dados"""
-    print("🗄️ Executando migrations...")
+    """Aplica as migrations pendentes do banco de dados"""
+    print("🗄️ Verificando migrations pendentes...")
     
     try:
-        result = subprocess.run([sys.executable, "run_migrations.py"], 
-                              capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print("✅ Migrations executadas com sucesso")
-            return True
-        else:
-            print(f"❌ Erro ao executar migrations: {result.stderr}")
-            return False
+        # Executa no próprio processo: sem pendências, custa uma única consulta
+        from run_migrations import run_pending_migrations
+        return run_pending_migrations()
     except Exception as e:
         print(f"❌ Erro ao executar migrations: {e}")
         return False
@@ -145,21 +141,21 @@ def main():
     """Função principal"""
     print_banner()
     
-    # Verificações
+    # Verificações (as independentes rodam em paralelo, cada uma com seu prazo)
     checks = [
-        ("Versão do Python", check_python_version),
-        ("Dependências", check_dependencies),
-        ("Configuração do ambiente", check_env_file),
-        ("Conexões", test_connections),
-        ("Migrations", run_migrations)
+        Check("Versão do Python", check_python_version),
+        Check("Dependências", check_dependencies, timeout=30),
+        Check("Configuração do ambiente", check_env_file),
+        Check("Cloudinary", test_cloudinary_connection, timeout=10,
+              depends_on=["Dependências", "Configuração do ambiente"], cache_ttl=CONNECTION_CACHE_TTL),
+        Check("Supabase", test_supabase_connection, timeout=10,
+              depends_on=["Dependências", "Configuração do ambiente"], cache_ttl=CONNECTION_CACHE_TTL),
+        # Sem cache: uma migration nova em migrations/ tem que rodar já no próximo start
+        Check("Migrations", run_migrations, timeout=60, depends_on=["Supabase"]),
     ]
     
-    all_passed = True
-    for check_name, check_func in checks:
-        print(f"\n🔍 {check_name}...")
-        if not check_func():
-            all_passed = False
-            break
+    print("\n🔍 Executando verificações...")
+    all_passed = run_preflight(checks)
     
     if all_passed:
         print("\n🎉 Todas as verificações passaram!")
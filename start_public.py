@@ -8,6 +8,10 @@ import os
 import sys
 import subprocess
 from pathlib import Path
+from preflight import Check, run_preflight
+
+# Tempo (s) em que a conexão verificada com sucesso fica em cache
+CONNECTION_CACHE_TTL = 300
 
 def check_python_version():
     """Verifica se a versão do Python é compatível"""
@@ -44,9 +48,9 @@ def check_env_file():
 def check_supabase_connection():
     """Testa conexão com Supabase"""
     try:
-        from config import supabase
+        from config import get_supabase
         # Teste simples de conexão
-        result = supabase.table('cards').select('id').limit(1).execute()
+        result = get_supabase().table('cards').select('id').limit(1).execute()
         print("✅ Conexão com Supabase OK")
         return True
     except Exception as e:
@@ -58,15 +62,16 @@ def main():
     print("🎴 MyPublicPokeBinder - Versão Pública")
     print("=" * 50)
     
-    # Verificações
+    # Verificações (as independentes rodam em paralelo, cada uma com seu prazo)
     checks = [
-        check_python_version(),
-        check_dependencies(),
-        check_env_file(),
-        check_supabase_connection()
+        Check("Versão do Python", check_python_version),
+        Check("Dependências", check_dependencies, timeout=30),
+        Check("Arquivo .env", check_env_file),
+        Check("Supabase", check_supabase_connection, timeout=10,
+              depends_on=["Dependências", "Arquivo .env"], cache_ttl=CONNECTION_CACHE_TTL),
     ]
     
-    if not all(checks):
+    if not run_preflight(checks):
         print("\n❌ Verificações falharam. Corrija os problemas acima.")
         return
     
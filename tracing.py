@@ -0,0 +1,267 @@
+"""
+Spans de rastreamento (estilo OpenTelemetry) da interface, dados e imagens
+
+Cada execução de página abre um span raiz com um trace id próprio
+(observe_render); chamadas externas (observe) e etapas marcadas com span()
+ou @traced viram spans filhos. Quando o span raiz termina, o trace inteiro é
+entregue ao exportador configurado.
+
+Exportadores (TRACE_EXPORTER):
+    - vazio (padrão): rastreamento desligado, span() não custa quase nada
+    - jsonl: um span por linha em TRACE_FILE (padrão traces/spans.jsonl)
+    - otlp-file: um ExportTraceServiceRequest OTLP/JSON por trace em
+      TRACE_FILE (padrão traces/traces.otlp.jsonl), legível por visualizadores
+      e pelo receiver de arquivo do OpenTelemetry Collector
+
+Outros destinos podem ser plugados com set_exporter().
+"""
+
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "mypokebinder")
+
+# Exceções de controle de fluxo do Streamlit (st.rerun/st.stop) não são erros
+_CONTROL_FLOW_EXCEPTIONS = {'RerunException', 'StopException'}
+
+# Span ativo no contexto atual
+current_span = contextvars.ContextVar('current_span', default=None)
+
+_exporter = None
+_exporter_loaded = False
+_exporter_lock = threading.Lock()
+
+
+class _Trace:
+    """Spans já finalizados de um trace"""
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+
+
+class Span:
+    """Uma operação com início, fim, atributos e estado"""
+
+    def __init__(self, name, trace, parent_id, attributes):
+        self.name = name
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = 'UNSET'
+        self.error = None
+
+    @property
+    def trace_id(self):
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self):
+        end_ns = self.end_ns or time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_error(self, exc):
+        self.status = 'ERROR'
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': round(self.duration_ms, 3),
+            'attributes': self.attributes,
+            'status': self.status,
+            'error': self.error,
+        }
+
+
+class InMemoryExporter:
+    """Guarda os spans exportados em uma lista (útil em scripts de verificação)"""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        with self._lock:
+            self.spans.extend(spans)
+
+
+class JsonLinesExporter:
+    """Grava um span por linha (JSON) em um arquivo local"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _write_lines(self, lines):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for line in lines:
+                    f.write(line + '\n')
+
+    def export(self, spans):
+        self._write_lines(json.dumps(span.to_dict(), ensure_ascii=False, default=str) for span in spans)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items()]
+
+
+class OtlpFileExporter(JsonLinesExporter):
+    """Grava cada trace como uma linha OTLP/JSON (formato do file exporter do OpenTelemetry)"""
+
+    _STATUS_CODES = {'UNSET': 0, 'OK': 1, 'ERROR': 2}
+
+    def _otlp_span(self, span):
+        encoded = {
+            'traceId': span.trace_id,
+            'spanId': span.span_id,
+            'name': span.name,
+            'kind': 1,
+            'startTimeUnixNano': str(span.start_ns),
+            'endTimeUnixNano': str(span.end_ns),
+            'attributes': _otlp_attributes(span.attributes),
+            'status': {'code': self._STATUS_CODES[span.status]},
+        }
+        if span.parent_id:
+            encoded['parentSpanId'] = span.parent_id
+        if span.error:
+            encoded['status']['message'] = span.error
+        return encoded
+
+    def export(self, spans):
+        request = {
+            'resourceSpans': [{
+                'resource': {'attributes': _otlp_attributes({'service.name': SERVICE_NAME})},
+                'scopeSpans': [{
+                    'scope': {'name': 'pokebinder.tracing'},
+                    'spans': [self._otlp_span(span) for span in spans],
+                }],
+            }]
+        }
+        self._write_lines([json.dumps(request, ensure_ascii=False)])
+
+
+def _exporter_from_env():
+    kind = os.getenv("TRACE_EXPORTER", "").strip().lower()
+    if kind == 'jsonl':
+        return JsonLinesExporter(os.getenv("TRACE_FILE", os.path.join("traces", "spans.jsonl")))
+    if kind == 'otlp-file':
+        return OtlpFileExporter(os.getenv("TRACE_FILE", os.path.join("traces", "traces.otlp.jsonl")))
+    return None
+
+
+def get_exporter():
+    """Retorna o exportador em uso (configurado por TRACE_EXPORTER no primeiro uso)"""
+    global _exporter, _exporter_loaded
+    if not _exporter_loaded:
+        with _exporter_lock:
+            if not _exporter_loaded:
+                _exporter = _exporter_from_env()
+                _exporter_loaded = True
+    return _exporter
+
+
+def set_exporter(exporter):
+    """
+    Troca o exportador do processo
+
+    Args:
+        exporter: Objeto com export(spans), ou None para desligar o rastreamento
+    """
+    global _exporter, _exporter_loaded
+    with _exporter_lock:
+        _exporter = exporter
+        _exporter_loaded = True
+
+
+def current_trace_id():
+    """Trace id da execução atual (ou None fora de um trace)"""
+    span_in_progress = current_span.get()
+    return span_in_progress.trace_id if span_in_progress is not None else None
+
+
+@contextmanager
+def span(name, new_trace=False, **attributes):
+    """
+    Abre um span filho do span atual
+
+    Sem span atual (ou com new_trace=True) o span é raiz de um trace novo, que
+    é exportado quando ele termina.
+
+    Uso:
+        with span('image.prepare', width=800) as sp:
+            ...
+
+    Yields:
+        Span | None: None quando o rastreamento está desligado
+    """
+    exporter = get_exporter()
+    if exporter is None:
+        yield None
+        return
+
+    parent = None if new_trace else current_span.get()
+    trace = _Trace() if parent is None else parent.trace
+    opened = Span(name, trace, parent.span_id if parent is not None else None, attributes)
+    token = current_span.set(opened)
+    try:
+        yield opened
+    except BaseException as e:
+        if type(e).__name__ not in _CONTROL_FLOW_EXCEPTIONS:
+            opened.record_error(e)
+        raise
+    finally:
+        opened.end_ns = time.time_ns()
+        current_span.reset(token)
+        trace.spans.append(opened)
+        if parent is None:
+            try:
+                exporter.export(trace.spans)
+            except Exception:
+                # Falha ao exportar não pode derrubar a página
+                pass
+
+
+def traced(name):
+    """Decorador que envolve a função em um span com o nome informado"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if get_exporter() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
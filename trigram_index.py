@@ -0,0 +1,72 @@
+"""
+Índice de trigramas para a busca aproximada por nome
+
+Cada palavra do nome (em minúsculas) vira trigramas com o mesmo
+preenchimento do pg_trgm ("  pikachu " -> "  p", " pi", "pik", ...). O
+índice guarda, para cada trigrama, os ids dos nomes que o contêm (arrays
+int32), então uma consulta soma as listas dos trigramas da busca com
+np.bincount em vez de comparar a busca com cada nome.
+
+Relevância de um nome:
+    cobertura   fração dos trigramas da busca presentes no nome (filtro e 1º critério)
+    similaridade  trigramas em comum / trigramas da união (desempate: nomes mais curtos)
+
+Assim "charzard" encontra "Charizard" (7 de 9 trigramas) e não "Charmander".
+"""
+
+import math
+import re
+
+import numpy as np
+
+# Cobertura mínima para um nome entrar no resultado
+MIN_SCORE = 0.5
+
+_WORD = re.compile(r'\w+')
+
+
+def trigrams(text):
+    """Trigramas das palavras de um texto (minúsculas, preenchimento do pg_trgm)"""
+    grams = set()
+    for word in _WORD.findall((text or '').lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Índice invertido trigrama -> ids dos nomes (posições na lista recebida)"""
+
+    def __init__(self, names):
+        postings = {}
+        self.sizes = np.zeros(len(names), dtype=np.int64)
+        for name_id, name in enumerate(names):
+            grams = trigrams(name)
+            self.sizes[name_id] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(name_id)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def search(self, query, min_score=MIN_SCORE):
+        """
+        Nomes parecidos com a busca, do mais para o menos relevante
+
+        Args:
+            query: Texto digitado
+            min_score: Cobertura mínima (0 a 1)
+
+        Returns:
+            tuple: (ids dos nomes, cobertura de cada um), arrays NumPy
+        """
+        grams = trigrams(query)
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+
+        hits = np.bincount(np.concatenate(lists), minlength=len(self.sizes))
+        candidates = np.flatnonzero(hits >= math.ceil(min_score * len(grams)))
+        common = hits[candidates]
+        # Com a mesma cobertura, mais similaridade = nome com menos trigramas:
+        # uma chave inteira só (cobertura desc, tamanho asc) ordena pelos dois
+        ranking = np.argsort(self.sizes[candidates] - (common << 32), kind='stable')
+        return candidates[ranking], common[ranking] / len(grams)
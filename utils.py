@@ -1,8 +1,8 @@
 import streamlit as st
-from PIL import Image
-import io
 from datetime import datetime
-from config import supabase
+from config import get_supabase
+from metrics import observe
+from card_grid import render_grid
 
 def format_currency(value):
     """Formata valor monetário"""
@@ -34,13 +34,16 @@ def validate_image_file(image_file):
 
 def resize_image(image, max_size=(800, 800)):
     """Redimensiona imagem mantendo proporção"""
+    from PIL import Image
     image.thumbnail(max_size, Image.Resampling.LANCZOS)
     return image
 
 def get_user_by_email(email):
     """Busca usuário pelo email"""
     try:
-        result = supabase.auth.admin.list_users()
+        with observe('supabase', 'list_users') as obs:
+            result = get_supabase().auth.admin.list_users()
+            obs.set_result(result.users)
         for user in result.users:
             if user.email == email:
                 return user
@@ -52,7 +55,9 @@ def get_user_by_email(email):
 def get_user_stats(user_id):
     """Retorna estatísticas do usuário"""
     try:
-        cards = supabase.table('cards').select('*').eq('user_id', user_id).execute()
+        with observe('supabase', 'get_user_stats') as obs:
+            cards = get_supabase().table('cards').select('*').eq('user_id', user_id).is_('deleted_at', 'null').execute()
+            obs.set_result(cards.data)
         
         if not cards.data:
             return {
@@ -83,28 +88,28 @@ def display_card_grid(cards, columns=4, show_actions=True, user_id=None):
         st.info("Nenhum card encontrado.")
         return
     
-    cols = st.columns(columns)
-    for i, card in enumerate(cards):
-        with cols[i % columns]:
-            # Container para o card
-            with st.container():
-                st.image(card['image_url'], width=150, use_container_width=True)
-                st.write(f"**{card['name']}**")
-                st.write(f"Nº {card['number']}")
-                st.write(f"{format_currency(card['estimated_value'])}")
-                st.write(f"🌍 {card['language']}")
-                
-                if show_actions:
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.button("Ver", key=f"view_{card['id']}"):
-                            st.session_state.viewing_card = card['id']
+    def render_card(card):
+        # Container para o card
+        with st.container():
+            st.image(card['image_url'], width=150, use_container_width=True)
+            st.write(f"**{card['name']}**")
+            st.write(f"Nº {card['number']}")
+            st.write(f"{format_currency(card['estimated_value'])}")
+            st.write(f"🌍 {card['language']}")
+            
+            if show_actions:
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.button("Ver", key=f"view_{card['id']}"):
+                        st.session_state.viewing_card = card['id']
+                        st.rerun()
+                with col2:
+                    if user_id and card['user_id'] == user_id:
+                        if st.button("Editar", key=f"edit_{card['id']}"):
+                            st.session_state.editing_card = card['id']
                             st.rerun()
-                    with col2:
-                        if user_id and card['user_id'] == user_id:
-                            if st.button("Editar", key=f"edit_{card['id']}"):
-                                st.session_state.editing_card = card['id']
-                                st.rerun()
+    
+    render_grid(cards, render_card, columns)
 
 def display_user_stats(stats):
     """Exibe estatísticas do usuário"""